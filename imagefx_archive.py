@@ -0,0 +1,178 @@
+"""
+ImageFX 샤드 아카이브 저장소
+프롬프트마다 폴더와 작은 파일을 만드는 대신, 이미지와 이미지별 메타데이터를 크기 상한이 있는 tar 샤드에
+WebDataset 형식({key}.jpg + {key}.json)으로 이어 붙입니다. 샤드마다 옆에 오프셋 색인(.idx.jsonl)을 두어
+압축을 풀지 않고도 이미지 하나를 바로 읽을 수 있고, 샤드 자체는 학습 데이터 로더에 그대로 넣을 수 있습니다.
+
+    python imagefx_archive.py list archive/
+    python imagefx_archive.py get archive/ 20250101_120000_1a2b3c4d_1.jpg > image.jpg
+"""
+
+import io
+import os
+import re
+import sys
+import glob
+import json
+import time
+import tarfile
+import argparse
+import threading
+
+
+SHARD_PATTERN = re.compile(r"^(?P<prefix>.+)-(?P<number>\d{6})\.tar(\.part)?$")
+
+
+class ShardWriter:
+    """샘플을 크기 상한이 있는 tar 샤드에 차례로 추가하는 아카이브 (여러 워커/쓰기 스레드가 공유 가능)"""
+
+    def __init__(self, archive_dir, max_shard_bytes=1 << 30, prefix="imagefx"):
+        """
+        Args:
+            archive_dir: 샤드와 색인을 저장할 디렉토리
+            max_shard_bytes: 샤드 크기 상한 (넘으면 다음 샘플부터 새 샤드, 기본값: 1GiB)
+            prefix: 샤드 파일명 접두어 ({prefix}-000000.tar)
+        """
+        self.archive_dir = archive_dir
+        self.max_shard_bytes = max_shard_bytes
+        self.prefix = prefix
+        os.makedirs(archive_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._tar = None
+        self._index = None
+        self._shard_name = None
+        # 이전 실행의 샤드(중단되어 .part로 남은 것 포함)는 건드리지 않고 다음 번호부터 사용
+        self._next_number = self._last_number() + 1
+        self.samples = 0
+
+    def _last_number(self):
+        numbers = [-1]
+        for name in os.listdir(self.archive_dir):
+            match = SHARD_PATTERN.match(name)
+            if match and match.group("prefix") == self.prefix:
+                numbers.append(int(match.group("number")))
+        return max(numbers)
+
+    def _open_shard(self):
+        """새 샤드를 .part 파일로 열기 (닫을 때 .tar로 이름 변경)"""
+        self._shard_name = f"{self.prefix}-{self._next_number:06d}"
+        self._next_number += 1
+        base = os.path.join(self.archive_dir, self._shard_name)
+        self._tar = tarfile.open(base + ".tar.part", "w", format=tarfile.USTAR_FORMAT)
+        self._index = open(base + ".idx.jsonl", 'w', encoding='utf-8')
+
+    def _close_shard(self):
+        if self._tar is None:
+            return
+        base = os.path.join(self.archive_dir, self._shard_name)
+        self._tar.close()
+        self._index.close()
+        os.replace(base + ".tar.part", base + ".tar")
+        self._tar = self._index = None
+
+    def add(self, key, files):
+        """
+        샘플 하나(같은 key의 파일들)를 현재 샤드에 연속으로 추가
+
+        Args:
+            key: 샘플 키 (점 없이, 예: 20250101_120000_1a2b3c4d_1)
+            files: 확장자 -> 바이트 (예: {"jpg": ..., "json": ...})
+
+        Returns:
+            {"shard": 샤드 파일명, "members": {멤버 이름: (데이터 오프셋, 크기)}}
+        """
+        if "." in key or "/" in key:
+            raise ValueError(f"샘플 키에는 '.'과 '/'를 쓸 수 없습니다: {key}")
+        sample_bytes = sum(512 + len(data) + 511 for data in files.values())
+
+        with self._lock:
+            if self._tar is not None and self._tar.offset and self._tar.offset + sample_bytes > self.max_shard_bytes:
+                self._close_shard()
+            if self._tar is None:
+                self._open_shard()
+
+            members = {}
+            now = time.time()
+            for ext, data in files.items():
+                info = tarfile.TarInfo(f"{key}.{ext}")
+                info.size = len(data)
+                info.mtime = now
+                info.mode = 0o644
+                self._tar.addfile(info, io.BytesIO(data))
+                # 헤더 다음 데이터 시작 위치 (데이터는 512바이트 단위로 채워져 기록됨)
+                offset = self._tar.offset - (len(data) + 511) // 512 * 512
+                members[info.name] = (offset, len(data))
+
+            # 샤드 데이터를 먼저 내보낸 뒤 색인 기록 (중단되어도 색인이 가리키는 데이터는 항상 존재)
+            self._tar.fileobj.flush()
+            for name, (offset, size) in members.items():
+                self._index.write(json.dumps({"key": key, "name": name, "offset": offset, "size": size}) + "\n")
+            self._index.flush()
+            self.samples += 1
+            return {"shard": self._shard_name + ".tar", "members": members}
+
+    def close(self):
+        """현재 샤드를 마무리하고 .tar로 이름 변경"""
+        with self._lock:
+            self._close_shard()
+
+
+class ArchiveReader:
+    """색인으로 샤드 안의 파일을 압축 해제 없이 바로 읽는 리더"""
+
+    def __init__(self, archive_dir):
+        self.archive_dir = archive_dir
+        self.entries = {}  # 멤버 이름 -> (샤드 경로, 오프셋, 크기)
+        for index_path in sorted(glob.glob(os.path.join(archive_dir, "*.idx.jsonl"))):
+            base = index_path[:-len(".idx.jsonl")]
+            # 실행 중이거나 중단된 샤드는 .tar.part로 남아 있음
+            shard_path = base + ".tar" if os.path.exists(base + ".tar") else base + ".tar.part"
+            with open(index_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.entries[entry["name"]] = (shard_path, entry["offset"], entry["size"])
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def read(self, name):
+        """멤버 이름(예: {key}.jpg)의 바이트 반환 (없으면 KeyError)"""
+        shard_path, offset, size = self.entries[name]
+        with open(shard_path, 'rb') as f:
+            f.seek(offset)
+            return f.read(size)
+
+    def metadata(self, key):
+        """샘플의 메타데이터 JSON"""
+        return json.loads(self.read(f"{key}.json"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ImageFX 샤드 아카이브 조회")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    list_parser = subparsers.add_parser("list", help="아카이브의 멤버 목록 출력")
+    list_parser.add_argument("archive_dir")
+    get_parser = subparsers.add_parser("get", help="멤버 하나를 표준 출력으로 내보냄")
+    get_parser.add_argument("archive_dir")
+    get_parser.add_argument("name", help="멤버 이름 (예: 20250101_120000_1a2b3c4d_1.jpg)")
+    args = parser.parse_args()
+
+    reader = ArchiveReader(args.archive_dir)
+    if args.command == "list":
+        for name, (shard_path, offset, size) in reader.entries.items():
+            print(f"{name}\t{os.path.basename(shard_path)}\t{offset}\t{size}")
+    else:
+        try:
+            data = reader.read(args.name)
+        except KeyError:
+            print(f"❌ 아카이브에 없는 멤버: {args.name}", file=sys.stderr)
+            sys.exit(1)
+        sys.stdout.buffer.write(data)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+"""
+ImageFX 종단간 벤치마크
+로컬 모의 서버(imagefx_mock_server)와 헤드리스 Chrome으로 다운로더를 실행하여
+단계별 지연(p50/p95), 분당 프롬프트 수, 브라우저에서 Python으로 옮겨진 데이터 양을 측정합니다.
+
+    python imagefx_benchmark.py --scenarios polling event network cdp --prompts 5
+    python imagefx_benchmark.py --scenarios event --tabs 4 --prompts 12
+"""
+
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import tempfile
+import threading
+import functools
+import subprocess
+import urllib.request
+
+from imagefx_downloader import ImageFXDownloader, ImageFXWorkerPool
+from imagefx_metrics import configure_logging
+from imagefx_mock_server import MockImageFXServer
+from imagefx_scheduler import RetryScheduler
+
+
+# 시나리오 이름 -> ImageFXDownloader 옵션
+SCENARIOS = {
+    "polling": {"detection_mode": "polling"},
+    "event": {"detection_mode": "event"},
+    "network": {"capture_mode": "network"},
+    "keys": {"input_mode": "keys"},
+    "cdp": {"backend": "cdp"},
+}
+
+# 단계별 시간을 잴 메서드 (ImageFXDownloader와 CDPTab 공통 이름)
+STAGES = (
+    "enter_prompt",
+    "capture_current_image_hashes",
+    "click_generate_button",
+    "wait_for_network_images",
+    "wait_for_images",
+    "download_images",
+)
+
+CHROME_CANDIDATES = ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome")
+
+
+def percentile(values, pct):
+    """최근접 순위 방식 백분위수 (값이 없으면 None)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def payload_size(value):
+    """브라우저에서 돌아온 값의 대략적인 크기(바이트) (문자열 길이 합, 요소 참조 등은 0)"""
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(len(str(key)) + payload_size(item) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(payload_size(item) for item in value)
+    if isinstance(value, (int, float)):
+        return 8
+    return 0
+
+
+class BenchmarkRecorder:
+    """메서드를 감싸 단계별 소요 시간과 전송량을 기록"""
+
+    def __init__(self):
+        self.timings = {}  # 단계 -> [초]
+        self.bytes_transferred = 0
+        self.round_trips = 0
+        self._lock = threading.Lock()
+
+    def add_timing(self, stage, seconds):
+        with self._lock:
+            self.timings.setdefault(stage, []).append(seconds)
+
+    def add_transfer(self, value):
+        size = payload_size(value)
+        with self._lock:
+            self.bytes_transferred += size
+            self.round_trips += 1
+
+    def time_method(self, obj, name, stage=None):
+        """obj.name 호출 시간을 stage 이름으로 기록하도록 인스턴스 메서드 교체 (코루틴 함수도 지원)"""
+        method = getattr(obj, name, None)
+        if method is None:
+            return
+        stage = stage or name
+
+        if asyncio.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def timed(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await method(*args, **kwargs)
+                finally:
+                    self.add_timing(stage, time.perf_counter() - started)
+        else:
+            @functools.wraps(method)
+            def timed(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return method(*args, **kwargs)
+                finally:
+                    self.add_timing(stage, time.perf_counter() - started)
+        setattr(obj, name, timed)
+
+    def count_transfers(self, obj, name):
+        """obj.name의 반환값 크기를 전송량으로 기록하도록 인스턴스 메서드 교체"""
+        method = getattr(obj, name)
+
+        if asyncio.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def counted(*args, **kwargs):
+                result = await method(*args, **kwargs)
+                self.add_transfer(result)
+                return result
+        else:
+            @functools.wraps(method)
+            def counted(*args, **kwargs):
+                result = method(*args, **kwargs)
+                self.add_transfer(result)
+                return result
+        setattr(obj, name, counted)
+
+    def instrument(self, downloader):
+        """연결이 끝난 다운로더(또는 워커)에 측정 래퍼 설치"""
+        self.time_method(downloader, "process_prompt", "total")
+        if downloader.cdp_tab:
+            for stage in STAGES:
+                self.time_method(downloader.cdp_tab, stage)
+            self.count_transfers(downloader.cdp_tab, "evaluate")
+            return
+
+        for stage in STAGES:
+            self.time_method(downloader, stage)
+        for name in ("execute_script", "execute_async_script", "execute_cdp_cmd"):
+            self.count_transfers(downloader.driver, name)
+
+
+def find_chrome(explicit=None):
+    """Chrome 실행 파일 경로 찾기"""
+    if explicit:
+        return explicit
+    for name in CHROME_CANDIDATES:
+        path = shutil.which(name)
+        if path:
+            return path
+    raise RuntimeError("Chrome 실행 파일을 찾을 수 없습니다. --chrome으로 경로를 지정하세요.")
+
+
+def launch_chrome(chrome_path, debug_port, headless=True, timeout=15):
+    """
+    임시 프로필로 디버그 모드 Chrome 실행 후 DevTools가 응답할 때까지 대기
+
+    Returns:
+        (Popen, 프로필 디렉토리)
+    """
+    profile_dir = tempfile.mkdtemp(prefix="imagefx-bench-profile-")
+    command = [
+        chrome_path,
+        f"--remote-debugging-port={debug_port}",
+        f"--user-data-dir={profile_dir}",
+        "--no-first-run",
+        "--no-default-browser-check",
+        "--disable-background-timer-throttling",
+        "--disable-renderer-backgrounding",
+        "about:blank",
+    ]
+    if headless:
+        command.insert(1, "--headless=new")
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{debug_port}/json/version", timeout=1).read()
+            return process, profile_dir
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    shutil.rmtree(profile_dir, ignore_errors=True)
+    raise RuntimeError(f"Chrome DevTools가 {timeout}초 안에 응답하지 않았습니다 (포트 {debug_port})")
+
+
+def stop_chrome(process, profile_dir):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+    shutil.rmtree(profile_dir, ignore_errors=True)
+
+
+def run_scenario(name, prompts, chrome_path, server_url, debug_port=9333, tabs=1, headless=True):
+    """시나리오 하나를 새 Chrome과 새 다운로드 폴더로 실행하고 측정 결과 반환"""
+    options = SCENARIOS[name]
+    recorder = BenchmarkRecorder()
+    download_dir = tempfile.mkdtemp(prefix=f"imagefx-bench-{name}-")
+    process, profile_dir = launch_chrome(chrome_path, debug_port, headless=headless)
+    try:
+        if tabs > 1:
+            runner = ImageFXWorkerPool(debug_ports=[debug_port], tabs_per_browser=tabs, download_dir=download_dir,
+                                       pacing="fixed:0", imagefx_url=server_url, **options)
+            if not runner.start():
+                raise RuntimeError("준비된 워커가 없습니다")
+            workers = runner.workers
+        else:
+            runner = ImageFXDownloader(debug_port=debug_port, download_dir=download_dir, imagefx_url=server_url,
+                                       **options)
+            if not runner.connect_to_browser() or not runner.navigate_to_imagefx():
+                raise RuntimeError("모의 서버 페이지에 연결하지 못했습니다")
+            workers = [runner]
+
+        for worker in workers:
+            recorder.instrument(worker)
+
+        images = []
+        images_lock = threading.Lock()
+
+        def count_images(worker):
+            process_prompt = worker.process_prompt
+
+            def counted(prompt, *args, **kwargs):
+                result = process_prompt(prompt, *args, **kwargs)
+                with images_lock:
+                    images.append(len(worker.last_output_files))
+                return result
+            worker.process_prompt = counted
+
+        for worker in workers:
+            count_images(worker)
+
+        started = time.perf_counter()
+        if tabs > 1:
+            # 측정이 흐트러지지 않도록 재시도와 서킷 브레이커는 끔
+            runner.run(RetryScheduler([(str(idx), prompt) for idx, prompt in enumerate(prompts)],
+                                      max_retries=0, breaker_threshold=0))
+        else:
+            for prompt in prompts:
+                runner.process_prompt(prompt)
+        for worker in workers:
+            worker.writer.flush()
+        elapsed = time.perf_counter() - started
+    finally:
+        try:
+            runner.close()
+        except Exception:
+            pass
+        stop_chrome(process, profile_dir)
+        shutil.rmtree(download_dir, ignore_errors=True)
+
+    return {
+        "scenario": name,
+        "tabs": tabs,
+        "prompts": len(prompts),
+        "images": sum(images),
+        "elapsed": elapsed,
+        "prompts_per_minute": len(prompts) / (elapsed / 60) if elapsed > 0 else 0,
+        "bytes_transferred": recorder.bytes_transferred,
+        "round_trips": recorder.round_trips,
+        "stages": {
+            stage: {
+                "count": len(values),
+                "p50": percentile(values, 50),
+                "p95": percentile(values, 95),
+            }
+            for stage, values in recorder.timings.items()
+        },
+    }
+
+
+def print_report(results):
+    """시나리오별 결과 표 출력"""
+    for result in results:
+        print(f"\n{'='*60}")
+        print(f"📊 {result['scenario']} (탭 {result['tabs']}개)")
+        print(f"{'='*60}")
+        print(f"   프롬프트 {result['prompts']}개, 이미지 {result['images']}개, {result['elapsed']:.1f}초 "
+              f"(분당 {result['prompts_per_minute']:.1f}개)")
+        print(f"   브라우저 → Python 전송: {result['bytes_transferred'] / 1024 / 1024:.1f}MB "
+              f"({result['round_trips']}회 왕복)")
+        print(f"   {'stage':<30} {'n':>4} {'p50(s)':>9} {'p95(s)':>9}")
+        for stage in STAGES + ("total",):
+            stats = result["stages"].get(stage)
+            if stats:
+                print(f"   {stage:<30} {stats['count']:>4} {stats['p50']:>9.2f} {stats['p95']:>9.2f}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="ImageFX 모의 서버 벤치마크")
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=["polling", "event"],
+                        help="실행할 시나리오 (기본값: polling event)")
+    parser.add_argument("--prompts", type=int, default=5, help="시나리오당 프롬프트 수 (기본값: 5)")
+    parser.add_argument("--tabs", type=int, default=1, help="탭(워커) 수, 2 이상이면 워커 풀 사용 (기본값: 1)")
+    parser.add_argument("--delay", type=float, default=3.0, help="모의 서버 생성 지연(초) (기본값: 3)")
+    parser.add_argument("--image-size", type=int, default=768, help="모의 이미지 한 변 픽셀 수 (기본값: 768)")
+    parser.add_argument("--stagger", type=float, default=0.0, help="모의 이미지 사이 표시 간격(초) (기본값: 0)")
+    parser.add_argument("--chrome", help="Chrome 실행 파일 경로 (기본값: PATH에서 검색)")
+    parser.add_argument("--debug-port", type=int, default=9333, help="벤치마크용 Chrome 디버그 포트 (기본값: 9333)")
+    parser.add_argument("--headful", action="store_true", help="헤드리스가 아닌 일반 창으로 실행")
+    parser.add_argument("--json-out", help="결과를 JSON 파일로 저장")
+    parser.add_argument("--log-level", choices=["DEBUG", "INFO", "WARNING", "ERROR"], default="WARNING",
+                        help="다운로더 로그 레벨 (기본값: WARNING)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    configure_logging(args.log_level)
+    chrome_path = find_chrome(args.chrome)
+    server = MockImageFXServer(delay=args.delay, image_size=args.image_size, stagger=args.stagger)
+    server_url = server.start()
+    print(f"🧪 모의 ImageFX 서버: {server_url}")
+
+    prompts = [f"benchmark prompt {index + 1}: a lighthouse on a cliff at dawn" for index in range(args.prompts)]
+    results = []
+    try:
+        for name in args.scenarios:
+            print(f"\n🚀 시나리오 실행: {name}")
+            results.append(run_scenario(name, prompts, chrome_path, server_url, debug_port=args.debug_port,
+                                        tabs=args.tabs, headless=not args.headful))
+    finally:
+        server.stop()
+
+    print_report(results)
+    if args.json_out:
+        with open(args.json_out, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 결과 저장: {args.json_out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,387 @@
+"""
+ImageFX 생성 결과 카탈로그
+생성한 프롬프트와 이미지(경로, SHA-256, 크기, 해상도)를 SQLite 데이터베이스에 기록하여, metadata.json을 모두
+열어 보지 않고도 "이미 이미지가 있는 프롬프트"나 "특정 단어가 들어간 프롬프트의 결과"를 바로 찾을 수 있습니다.
+프롬프트는 FTS5 전문 검색 색인으로 찾고, 정규화한 프롬프트 해시로 이미 생성한 프롬프트를 생성 전에 건너뜁니다.
+
+    python imagefx_catalog.py import downloads/
+    python imagefx_catalog.py search "sunset ocean"
+    python imagefx_catalog.py prompt "A beautiful sunset over the ocean"
+    python imagefx_catalog.py stats
+"""
+
+import os
+import re
+import sys
+import json
+import uuid
+import sqlite3
+import hashlib
+import argparse
+import threading
+from datetime import datetime
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS generations (
+    id INTEGER PRIMARY KEY,
+    batch TEXT NOT NULL UNIQUE,
+    prompt TEXT NOT NULL,
+    prompt_hash TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    image_count INTEGER NOT NULL,
+    job_id TEXT,
+    run_id TEXT,
+    metadata_path TEXT
+);
+CREATE INDEX IF NOT EXISTS generations_prompt_hash ON generations (prompt_hash);
+CREATE INDEX IF NOT EXISTS generations_timestamp ON generations (timestamp);
+CREATE INDEX IF NOT EXISTS generations_run_id ON generations (run_id);
+
+CREATE TABLE IF NOT EXISTS images (
+    id INTEGER PRIMARY KEY,
+    generation_id INTEGER NOT NULL REFERENCES generations (id) ON DELETE CASCADE,
+    idx INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    shard TEXT,
+    sha256 TEXT,
+    bytes INTEGER,
+    width INTEGER,
+    height INTEGER,
+    mime TEXT,
+    source TEXT,
+    phash TEXT,
+    UNIQUE (generation_id, idx)
+);
+CREATE INDEX IF NOT EXISTS images_sha256 ON images (sha256);
+"""
+
+# 프롬프트 전문 검색 색인 (generations 테이블을 내용으로 쓰는 외부 콘텐츠 FTS5 테이블, 트리거로 동기화)
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS generations_fts USING fts5 (prompt, content='generations', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS generations_fts_insert AFTER INSERT ON generations BEGIN
+    INSERT INTO generations_fts (rowid, prompt) VALUES (new.id, new.prompt);
+END;
+CREATE TRIGGER IF NOT EXISTS generations_fts_delete AFTER DELETE ON generations BEGIN
+    INSERT INTO generations_fts (generations_fts, rowid, prompt) VALUES ('delete', old.id, old.prompt);
+END;
+CREATE TRIGGER IF NOT EXISTS generations_fts_update AFTER UPDATE OF prompt ON generations BEGIN
+    INSERT INTO generations_fts (generations_fts, rowid, prompt) VALUES ('delete', old.id, old.prompt);
+    INSERT INTO generations_fts (rowid, prompt) VALUES (new.id, new.prompt);
+END;
+"""
+
+IMAGE_FIELDS = ("path", "shard", "sha256", "bytes", "width", "height", "mime", "source", "phash")
+
+# 초기 형식 폴더의 이미지 파일 (image_1.jpg 등)
+IMAGE_FILE_PATTERN = re.compile(r"^image_(\d+)\.(jpg|jpeg|png|webp|gif)$", re.IGNORECASE)
+MIME_TYPES = {"jpg": "image/jpeg", "jpeg": "image/jpeg", "png": "image/png", "webp": "image/webp", "gif": "image/gif"}
+
+
+def normalize_prompt(prompt):
+    """중복 판단용 프롬프트 정규화 (대소문자와 공백 차이 무시)"""
+    return " ".join(prompt.casefold().split())
+
+
+def prompt_hash(prompt):
+    """정규화한 프롬프트의 해시 (카탈로그 색인 키)"""
+    return hashlib.sha1(normalize_prompt(prompt).encode('utf-8')).hexdigest()[:16]
+
+
+def _iso_timestamp(timestamp):
+    """다운로더 타임스탬프("%Y%m%d_%H%M%S")를 정렬 가능한 ISO 형식으로 (이미 ISO면 그대로)"""
+    try:
+        return datetime.strptime(timestamp, "%Y%m%d_%H%M%S").isoformat()
+    except (TypeError, ValueError):
+        return timestamp or datetime.now().isoformat(timespec="seconds")
+
+
+class Catalog:
+    """생성 결과 SQLite 카탈로그 (여러 워커/쓰기 스레드가 공유 가능)"""
+
+    def __init__(self, path, run_id=None):
+        """
+        Args:
+            path: 데이터베이스 파일 경로 (예: downloads/catalog.sqlite3, 없으면 생성)
+            run_id: 이번 실행의 기록에 붙일 ID (기본값: 시작 시각 + 무작위 6자리)
+        """
+        self.path = path
+        self.root = os.path.dirname(os.path.abspath(path))
+        self.run_id = run_id or f"{datetime.now():%Y%m%d_%H%M%S}_{uuid.uuid4().hex[:6]}"
+        os.makedirs(self.root, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA foreign_keys=ON")
+        self._db.executescript(SCHEMA)
+        try:
+            self._db.executescript(FTS_SCHEMA)
+            self.full_text = True
+        except sqlite3.OperationalError:
+            self.full_text = False  # FTS5 없이 빌드된 SQLite는 LIKE 검색으로 대체
+
+    def relative(self, path):
+        """파일 경로를 카탈로그 위치 기준 상대 경로로 (카탈로그와 다운로드 폴더를 함께 옮겨도 유효)"""
+        return os.path.relpath(os.path.abspath(path), self.root).replace(os.sep, "/")
+
+    def record(self, batch, prompt, timestamp, images, job_id=None, metadata_path=None, run_id=None):
+        """
+        생성 한 번(프롬프트 하나의 이미지 묶음) 기록 (같은 batch가 이미 있으면 갱신)
+
+        Args:
+            batch: 묶음 키 (폴더 저장이면 카탈로그 기준 폴더 경로, 아카이브면 샘플 키 접두어)
+            timestamp: "%Y%m%d_%H%M%S" 또는 ISO 형식
+            images: [{"path", "sha256", "bytes", "width", "height", "mime", "source", "phash", "shard"}, ...]
+                (path는 relative()로 바꾼 파일 경로 또는 아카이브 멤버 이름)
+
+        Returns:
+            generations 행 ID
+        """
+        with self._lock, self._db:
+            self._db.execute(
+                """
+                INSERT INTO generations (batch, prompt, prompt_hash, timestamp, image_count, job_id, run_id,
+                                         metadata_path)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (batch) DO UPDATE SET
+                    prompt = excluded.prompt, prompt_hash = excluded.prompt_hash, timestamp = excluded.timestamp,
+                    image_count = excluded.image_count, job_id = coalesce(excluded.job_id, job_id),
+                    run_id = excluded.run_id, metadata_path = excluded.metadata_path
+                """,
+                (batch, prompt, prompt_hash(prompt), _iso_timestamp(timestamp), len(images), job_id,
+                 run_id or self.run_id, metadata_path),
+            )
+            generation_id = self._db.execute("SELECT id FROM generations WHERE batch = ?", (batch,)).fetchone()[0]
+            self._db.execute("DELETE FROM images WHERE generation_id = ? AND idx > ?", (generation_id, len(images)))
+            self._db.executemany(
+                f"""
+                INSERT INTO images (generation_id, idx, {", ".join(IMAGE_FIELDS)})
+                VALUES (?, ?, {", ".join("?" for _ in IMAGE_FIELDS)})
+                ON CONFLICT (generation_id, idx) DO UPDATE SET
+                    {", ".join(f"{field} = excluded.{field}" for field in IMAGE_FIELDS)}
+                """,
+                [(generation_id, idx, *(image.get(field) for field in IMAGE_FIELDS))
+                 for idx, image in enumerate(images, 1)],
+            )
+            return generation_id
+
+    def has_prompt(self, prompt):
+        """정규화한 프롬프트가 같은 생성 결과(이미지 1개 이상)가 이미 있는지 여부"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT 1 FROM generations WHERE prompt_hash = ? AND image_count > 0 LIMIT 1", (prompt_hash(prompt),)
+            ).fetchone()
+        return row is not None
+
+    def _generations(self, query, params):
+        with self._lock:
+            generations = [dict(row) for row in self._db.execute(query, params)]
+            for generation in generations:
+                generation["images"] = [
+                    dict(row) for row in self._db.execute(
+                        f"SELECT idx, {', '.join(IMAGE_FIELDS)} FROM images WHERE generation_id = ? ORDER BY idx",
+                        (generation["id"],),
+                    )
+                ]
+        return generations
+
+    def find_prompt(self, prompt, limit=20):
+        """정규화한 프롬프트가 같은 생성 결과 (최근 순, 이미지 목록 포함)"""
+        return self._generations(
+            "SELECT * FROM generations WHERE prompt_hash = ? ORDER BY timestamp DESC LIMIT ?",
+            (prompt_hash(prompt), limit),
+        )
+
+    def search(self, text, limit=20, raw=False):
+        """
+        프롬프트 전문 검색 (관련도 순, 이미지 목록 포함)
+
+        Args:
+            text: 검색어 (기본은 모든 단어를 포함하는 프롬프트)
+            raw: True면 FTS5 질의 문법을 그대로 사용 (예: "sunset NOT ocean", "cat*")
+        """
+        if not self.full_text:
+            words = text.split()
+            where = " AND ".join("prompt LIKE ?" for _ in words) or "1"
+            return self._generations(f"SELECT * FROM generations WHERE {where} ORDER BY timestamp DESC LIMIT ?",
+                                     (*(f"%{word}%" for word in words), limit))
+
+        query = text if raw else " ".join('"' + word.replace('"', '""') + '"' for word in text.split())
+        if not query:
+            return []
+        return self._generations(
+            """
+            SELECT generations.* FROM generations_fts
+            JOIN generations ON generations.id = generations_fts.rowid
+            WHERE generations_fts MATCH ? ORDER BY generations_fts.rank LIMIT ?
+            """,
+            (query, limit),
+        )
+
+    def stats(self):
+        """카탈로그 요약 (생성 수, 서로 다른 프롬프트 수, 이미지 수와 총 크기, 실행 수, 기간)"""
+        with self._lock:
+            generations = dict(self._db.execute(
+                """
+                SELECT count(*) AS generations, count(DISTINCT prompt_hash) AS prompts, count(DISTINCT run_id) AS runs,
+                       min(timestamp) AS first, max(timestamp) AS last
+                FROM generations
+                """
+            ).fetchone())
+            images = dict(self._db.execute(
+                "SELECT count(*) AS images, coalesce(sum(bytes), 0) AS bytes, count(DISTINCT sha256) AS unique_images "
+                "FROM images"
+            ).fetchone())
+        return {**generations, **images}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def _sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def import_download_dir(catalog, download_dir):
+    """
+    기존 다운로드 폴더의 metadata.json을 읽어 카탈로그를 채움 (다시 실행해도 같은 폴더는 갱신만 됨)
+
+    이미지 목록(images)이 있는 형식은 기록된 다이제스트를 쓰고, data URL만 있는 초기 형식은
+    폴더의 image_N 파일을 직접 읽어 SHA-256과 크기를 계산합니다.
+
+    Returns:
+        (가져온 폴더 수, 건너뛴 폴더 수)
+    """
+    imported = skipped = 0
+    for dirpath, dirnames, filenames in os.walk(download_dir):
+        dirnames[:] = sorted(name for name in dirnames if not name.startswith("."))  # .objects 등 제외
+        if "metadata.json" not in filenames:
+            continue
+        metadata_path = os.path.join(dirpath, "metadata.json")
+        try:
+            with open(metadata_path, 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+        except (OSError, ValueError):
+            skipped += 1
+            continue
+        if not isinstance(metadata, dict) or not isinstance(metadata.get("prompt"), str):
+            skipped += 1
+            continue
+
+        images = []
+        if isinstance(metadata.get("images"), list):
+            for image in metadata["images"]:
+                path = os.path.join(dirpath, image.get("file", ""))
+                images.append(dict({field: image.get(field) for field in IMAGE_FIELDS}, path=catalog.relative(path)))
+        else:
+            numbered = sorted((int(match.group(1)), name, match.group(2).lower())
+                              for name in filenames for match in [IMAGE_FILE_PATTERN.match(name)] if match)
+            for _, name, ext in numbered:
+                path = os.path.join(dirpath, name)
+                images.append({"path": catalog.relative(path), "sha256": _sha256_file(path),
+                               "bytes": os.path.getsize(path), "mime": MIME_TYPES[ext], "source": "dom"})
+
+        timestamp = metadata.get("timestamp") or os.path.basename(dirpath)[:15]
+        catalog.record(catalog.relative(dirpath), metadata["prompt"], timestamp, images,
+                       metadata_path=catalog.relative(metadata_path), run_id="import")
+        imported += 1
+    return imported, skipped
+
+
+def import_archive(catalog, archive_dir):
+    """
+    샤드 아카이브의 샘플 메타데이터({key}.json)를 읽어 카탈로그를 채움 (묶음별로 기록)
+
+    Returns:
+        가져온 묶음 수
+    """
+    from imagefx_archive import ArchiveReader
+
+    reader = ArchiveReader(archive_dir)
+    batches = {}
+    for name, (shard_path, _, size) in reader.entries.items():
+        key, _, ext = name.rpartition(".")
+        if ext == "json":
+            continue
+        try:
+            metadata = reader.metadata(key)
+        except (KeyError, ValueError):
+            continue
+        batch = metadata.get("batch") or key
+        image = {field: metadata.get(field) for field in IMAGE_FIELDS}
+        image.update(path=name, shard=os.path.basename(shard_path).replace(".part", ""), bytes=size,
+                     sha256=hashlib.sha256(reader.read(name)).hexdigest())
+        entry = batches.setdefault(batch, {"metadata": metadata, "images": {}})
+        entry["images"][metadata.get("index") or len(entry["images"]) + 1] = image
+
+    for batch, entry in batches.items():
+        metadata = entry["metadata"]
+        images = [entry["images"][index] for index in sorted(entry["images"])]
+        catalog.record(batch, metadata.get("prompt") or "", metadata.get("timestamp"), images,
+                       job_id=metadata.get("job_id"), run_id="import")
+    return len(batches)
+
+
+def _print_generations(generations):
+    for generation in generations:
+        print(f"{generation['timestamp']}  {generation['image_count']}장  {generation['prompt']}")
+        for image in generation["images"]:
+            location = f"{image['shard']}:{image['path']}" if image["shard"] else image["path"]
+            size = f"{image['width']}x{image['height']}" if image["width"] else "-"
+            print(f"    {location}  {size}  {(image['sha256'] or '')[:12]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ImageFX 생성 결과 카탈로그 조회")
+    parser.add_argument("--db", default=os.path.join("downloads", "catalog.sqlite3"),
+                        help="카탈로그 파일 (기본값: downloads/catalog.sqlite3)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    import_parser = subparsers.add_parser("import", help="기존 다운로드 폴더/샤드 아카이브를 카탈로그에 채움")
+    import_parser.add_argument("directory", help="다운로드 폴더 또는 아카이브 폴더")
+    search_parser = subparsers.add_parser("search", help="프롬프트 전문 검색")
+    search_parser.add_argument("text")
+    search_parser.add_argument("--raw", action="store_true", help="FTS5 질의 문법 그대로 사용")
+    search_parser.add_argument("--limit", type=int, default=20)
+    prompt_parser = subparsers.add_parser("prompt", help="같은 프롬프트(대소문자/공백 무시)의 생성 결과")
+    prompt_parser.add_argument("text")
+    subparsers.add_parser("stats", help="카탈로그 요약")
+    args = parser.parse_args()
+
+    catalog = Catalog(args.db)
+    try:
+        if args.command == "import":
+            if not os.path.isdir(args.directory):
+                print(f"❌ 폴더가 없습니다: {args.directory}", file=sys.stderr)
+                sys.exit(1)
+            imported, skipped = import_download_dir(catalog, args.directory)
+            print(f"✅ 폴더 {imported}개 가져옴" + (f" (읽을 수 없는 metadata.json {skipped}개 건너뜀)" if skipped else ""))
+            if any(name.endswith(".idx.jsonl") for name in os.listdir(args.directory)):
+                print(f"✅ 아카이브 묶음 {import_archive(catalog, args.directory)}개 가져옴")
+        elif args.command == "search":
+            try:
+                _print_generations(catalog.search(args.text, limit=args.limit, raw=args.raw))
+            except sqlite3.OperationalError as e:
+                print(f"❌ 검색어 오류: {e}", file=sys.stderr)
+                sys.exit(1)
+        elif args.command == "prompt":
+            generations = catalog.find_prompt(args.text)
+            if not generations:
+                print("생성 결과 없음")
+            _print_generations(generations)
+        else:
+            for key, value in catalog.stats().items():
+                print(f"{key}: {value}")
+    finally:
+        catalog.close()
+
+
+if __name__ == "__main__":
+    main()
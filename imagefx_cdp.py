@@ -0,0 +1,466 @@
+"""
+ImageFX Chrome DevTools Protocol 백엔드
+Selenium/chromedriver를 거치지 않고 --remote-debugging-port 웹소켓에 직접 연결하여,
+하나의 asyncio 이벤트 루프에서 여러 탭(target)을 동시에 구동합니다.
+"""
+
+import json
+import time
+import asyncio
+import logging
+import itertools
+import threading
+import urllib.request
+
+from imagefx_deadlines import WaitPlan, WaitTracker
+from imagefx_memory import parse_performance_metrics
+from imagefx_metrics import RunMetrics
+from imagefx_scripts import (
+    PROBE_SELECTORS_SCRIPT,
+    HARVEST_IMAGES_SCRIPT,
+    FETCH_IMAGE_SCRIPT,
+    CLEAR_INPUT_SCRIPT,
+    INSERT_TEXT_SCRIPT,
+    WAIT_FOR_IMAGES_SCRIPT,
+)
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+logger = logging.getLogger("imagefx.cdp")
+
+
+class CDPError(Exception):
+    """DevTools 명령 실패 또는 페이지 스크립트 예외"""
+
+
+def _fetch_json(url, timeout=5):
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return json.loads(response.read().decode("utf-8"))
+
+
+class CDPConnection:
+    """브라우저 웹소켓 하나로 여러 target 세션(flatten 모드)에 명령을 보내는 연결"""
+
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self._ids = itertools.count(1)
+        self._pending = {}  # 명령 id -> Future
+        self._reader = asyncio.get_running_loop().create_task(self._read_loop())
+
+    @classmethod
+    async def connect(cls, debug_port, host="127.0.0.1"):
+        """디버그 포트의 /json/version에서 브라우저 웹소켓 주소를 얻어 연결"""
+        if websockets is None:
+            raise RuntimeError("CDP 백엔드를 사용하려면 websockets 패키지가 필요합니다: pip install websockets")
+
+        info = await asyncio.to_thread(_fetch_json, f"http://{host}:{debug_port}/json/version")
+        # 생성 이미지 data URL은 수 MB이므로 메시지 크기 제한 해제
+        websocket = await websockets.connect(info["webSocketDebuggerUrl"], max_size=None, ping_interval=None)
+        return cls(websocket)
+
+    async def _read_loop(self):
+        """응답 메시지를 명령 id별 Future에 전달 (이벤트 메시지는 사용하지 않음)"""
+        error = CDPError("DevTools 연결이 종료되었습니다")
+        try:
+            async for raw in self.websocket:
+                message = json.loads(raw)
+                future = self._pending.pop(message.get("id"), None)
+                if future is None or future.done():
+                    continue
+                if "error" in message:
+                    future.set_exception(CDPError(message["error"].get("message", str(message["error"]))))
+                else:
+                    future.set_result(message.get("result", {}))
+        except Exception as e:
+            error = CDPError(f"DevTools 연결 오류: {e}")
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            self._pending.clear()
+
+    async def send(self, method, params=None, session_id=None, timeout=60):
+        """명령을 보내고 결과(result) 반환"""
+        command_id = next(self._ids)
+        message = {"id": command_id, "method": method, "params": params or {}}
+        if session_id:
+            message["sessionId"] = session_id
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[command_id] = future
+        try:
+            await self.websocket.send(json.dumps(message))
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._pending.pop(command_id, None)
+
+    async def close(self):
+        await self.websocket.close()
+        await asyncio.gather(self._reader, return_exceptions=True)
+
+
+class CDPTab:
+    """
+    탭(target) 하나를 구동하며 ImageFXDownloader.process_prompt와 같은 흐름을 비동기로 수행
+
+    선택자 레지스트리, 이미지 저장(save_images), 결과 기록(last_output_files 등)은
+    storage로 전달된 ImageFXDownloader를 그대로 사용합니다.
+    """
+
+    def __init__(self, connection, target_id, session_id, storage):
+        self.connection = connection
+        self.target_id = target_id
+        self.session_id = session_id
+        self.storage = storage
+        self._performance_enabled = False
+
+    @classmethod
+    async def open(cls, connection, storage, new_tab=False):
+        """기존 첫 번째 페이지 탭에 붙거나(new_tab=False) 새 탭을 만들어 세션 연결"""
+        target_id = None
+        if not new_tab:
+            targets = (await connection.send("Target.getTargets"))["targetInfos"]
+            pages = [target for target in targets if target["type"] == "page"]
+            if pages:
+                target_id = pages[0]["targetId"]
+        if target_id is None:
+            target_id = (await connection.send("Target.createTarget", {"url": "about:blank"}))["targetId"]
+
+        session_id = (await connection.send(
+            "Target.attachToTarget", {"targetId": target_id, "flatten": True}
+        ))["sessionId"]
+
+        tab = cls(connection, target_id, session_id, storage)
+        await tab.send("Page.enable")
+        # 백그라운드 탭에서도 포커스가 있는 것처럼 동작하도록 설정 (Input.insertText 대상)
+        await tab.send("Emulation.setFocusEmulationEnabled", {"enabled": True})
+        return tab
+
+    async def send(self, method, params=None, timeout=60):
+        RunMetrics.count_call()
+        return await self.connection.send(method, params, self.session_id, timeout)
+
+    async def evaluate(self, expression, await_promise=False, timeout=60):
+        """페이지에서 식을 평가하고 값(JSON 직렬화 가능한 값) 반환"""
+        result = await self.send("Runtime.evaluate", {
+            "expression": expression,
+            "returnByValue": True,
+            "awaitPromise": await_promise,
+            "userGesture": True,
+        }, timeout=timeout)
+        if "exceptionDetails" in result:
+            details = result["exceptionDetails"]
+            raise CDPError(details.get("exception", {}).get("description") or details.get("text"))
+        return result.get("result", {}).get("value")
+
+    async def call(self, script, *args, element=None, await_callback=False, timeout=60):
+        """
+        Selenium execute_script 형식의 스크립트 실행 (arguments 배열과 return 문 사용)
+
+        Args:
+            element: resolve()로 찾아 둔 요소 이름. 지정하면 arguments[0]으로 전달
+            await_callback: execute_async_script처럼 마지막 인자로 완료 콜백을 전달하고 결과를 기다림
+        """
+        arg_list = json.dumps(list(args), ensure_ascii=False)
+        if element:
+            arg_list = f"[window.__fxElements[{json.dumps(element)}]].concat({arg_list})"
+        function = f"(function() {{\n{script}\n}})"
+        if await_callback:
+            expression = f"new Promise(resolve => {function}.apply(null, {arg_list}.concat([resolve])))"
+        else:
+            expression = f"{function}.apply(null, {arg_list})"
+        return await self.evaluate(expression, await_promise=await_callback, timeout=timeout)
+
+    async def navigate(self, url, timeout=15):
+        """페이지 이동 후 문서 로딩과 입력창 등장 대기"""
+        await self.send("Page.navigate", {"url": url})
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            ready = await self.evaluate(
+                "document.readyState === 'complete' && !!document.querySelector(\"[contenteditable='true']\")"
+            )
+            if ready:
+                return True
+            await asyncio.sleep(0.1)
+        return False
+
+    async def resolve(self, name, timeout=10, poll_interval=0.2):
+        """
+        선택자 레지스트리의 모든 후보를 한 번에 확인하여 요소를 찾고 window.__fxElements[name]에 보관
+
+        Returns:
+            일치한 후보 정보, 찾지 못하면 None
+        """
+        registry = self.storage.selectors[name]
+        deadline = time.monotonic() + timeout
+        while True:
+            candidates = json.dumps(registry.ordered_candidates(), ensure_ascii=False)
+            index = await self.evaluate(
+                f"(function() {{"
+                f" const found = (function() {{\n{PROBE_SELECTORS_SCRIPT}\n}})"
+                f".apply(null, [{candidates}, {json.dumps(registry.require_enabled)}]);"
+                f" if (!found) return null;"
+                f" window.__fxElements = window.__fxElements || {{}};"
+                f" window.__fxElements[{json.dumps(name)}] = found[1];"
+                f" return found[0];"
+                f" }})()"
+            )
+            if index is not None:
+                return registry.record_success(index)
+            if time.monotonic() >= deadline:
+                registry.record_failure()
+                return None
+            await asyncio.sleep(poll_interval)
+
+    async def _input_text(self):
+        text = await self.call("return arguments[0].textContent;", element="prompt_input")
+        return " ".join((text or "").split())
+
+    async def _wait_for_text(self, expected, timeout=2):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if await self._input_text() == expected:
+                return True
+            await asyncio.sleep(0.05)
+        return False
+
+    async def enter_prompt(self, prompt):
+        """입력창을 비우고 Input.insertText로 프롬프트를 한 번에 삽입한 뒤 확인"""
+        logger.info(f"\n📝 프롬프트 입력: {prompt}")
+        candidate = await self.resolve("prompt_input", timeout=10)
+        if candidate is None:
+            logger.error("❌ 프롬프트 입력창을 찾을 수 없습니다.")
+            return False
+
+        expected = " ".join(prompt.split())
+        await self.call("arguments[0].scrollIntoView({block: 'center'}); arguments[0].focus();",
+                        element="prompt_input")
+        await self.call(CLEAR_INPUT_SCRIPT, element="prompt_input")
+        await self.send("Input.insertText", {"text": prompt})
+        if await self._wait_for_text(expected):
+            logger.info("✅ 프롬프트 입력 완료")
+            return True
+
+        # 다른 요소에 입력된 경우 등: 지우고 execCommand로 한 번 더 시도
+        await self.call(CLEAR_INPUT_SCRIPT, element="prompt_input")
+        await self.call(INSERT_TEXT_SCRIPT, prompt, element="prompt_input")
+        if await self._wait_for_text(expected):
+            logger.info("✅ 프롬프트 입력 완료 (재시도)")
+            return True
+
+        self.storage.selectors["prompt_input"].invalidate()
+        logger.error("❌ 프롬프트 입력 확인 실패")
+        return False
+
+    async def capture_current_image_hashes(self):
+        """현재 페이지의 이미지 지문 수집 (생성 버튼 클릭 전에 호출)"""
+        try:
+            return {image["fp"] for image in await self.call(HARVEST_IMAGES_SCRIPT, []) or []}
+        except CDPError as e:
+            logger.warning(f"   ⚠️ 이미지 해시 캡처 실패: {e}")
+            return set()
+
+    async def click_generate_button(self):
+        """생성 버튼 클릭 ('상식 여행' 버튼)"""
+        logger.debug("\n🔘 생성 버튼 찾는 중...")
+        candidate = await self.resolve("generate_button", timeout=12)
+        if candidate is None:
+            logger.error("❌ 생성 버튼을 찾을 수 없습니다.")
+            return False
+
+        try:
+            await self.call("arguments[0].scrollIntoView({block: 'center'}); arguments[0].click();",
+                            element="generate_button")
+        except CDPError as e:
+            self.storage.selectors["generate_button"].invalidate()
+            logger.error(f"❌ 생성 버튼 클릭 실패: {e}")
+            return False
+
+        logger.info(f"✅ 생성 버튼 클릭 완료 ({candidate['value']})")
+        return True
+
+    async def wait_for_images(self, timeout=None, initial_hashes=None, slice_seconds=10):
+        """
+        MutationObserver 스크립트로 새 이미지 등장/디코딩 완료 대기
+        (timeout을 지정하지 않으면 다운로더의 GenerationDeadlines 대기 계획 사용)
+        """
+        initial_hashes = list(initial_hashes or ())
+        target_images = 4  # ImageFX는 4개 생성
+        deadlines = self.storage.deadlines
+        plan = deadlines.plan() if timeout is None else WaitPlan(timeout, timeout, 3.0, "지정")
+        tracker = self.storage.last_wait = WaitTracker(plan)
+        logger.info(f"\n⏳ 이미지 생성 대기 중... (최대 {plan.timeout:g}초, 첫 이미지 {plan.first_image:g}초, "
+                    f"cdp 이벤트 방식, {plan.basis})")
+
+        known_count = -1
+        while tracker.remaining() > 0:
+            slice_ms = max(1, int(min(slice_seconds, tracker.remaining()) * 1000))
+            quiet_ms = int(plan.quiet * 1000) if tracker.count > 0 else 0
+            result = await self.call(
+                WAIT_FOR_IMAGES_SCRIPT, initial_hashes, known_count, quiet_ms, slice_ms,
+                await_callback=True, timeout=slice_ms / 1000 + 5,
+            )
+            known_count = len(result.get("images", []))
+            tracker.update(known_count)
+            if tracker.count >= target_images or (result.get("quiet") and tracker.count > 0):
+                break
+
+        self.storage.last_detection_time = tracker.elapsed()
+        deadlines.observe(tracker)
+        if tracker.count > 0:
+            logger.info(f"✅ {tracker.count}개 새 이미지 생성 완료! ({self.storage.last_detection_time:.1f}초)")
+            return True
+        logger.warning(f"⚠️ {tracker.failure_reason()} - 이미지 생성 실패. 다음 프롬프트로 진행합니다.")
+        return False
+
+    async def download_images(self, prompt, exclude_hashes=None):
+        """새 이미지의 data URL을 한 번씩 가져와 저장 작업으로 등록"""
+        logger.info("\n💾 이미지 다운로드 시작...")
+        images = await self.call(HARVEST_IMAGES_SCRIPT, list(exclude_hashes or ()),
+                                 self.storage.perceptual_hash) or []
+        logger.info(f"📸 발견된 이미지: {len(images)}개")
+
+        items = []
+        for idx, image in enumerate(images[:4], 1):
+            img_url = await self.call(FETCH_IMAGE_SCRIPT, image["fp"])
+            if not img_url:
+                logger.error(f"   ❌ 이미지 {idx} 다운로드 실패: 이미지 요소가 페이지에서 사라졌습니다")
+                continue
+            RunMetrics.add_bytes(len(img_url))
+            items.append(dict(image, url=img_url, source="dom"))
+
+        if not items:
+            logger.error("❌ 다운로드할 이미지를 찾을 수 없습니다.")
+            return []
+
+        # 저장 작업 등록은 대기(backpressure)가 있을 수 있으므로 이벤트 루프 밖에서 수행
+        return await asyncio.to_thread(self.storage.save_images, prompt, items)
+
+    async def performance_metrics(self):
+        """탭 메모리 지표 (Performance.getMetrics, 예: JSHeapUsedSize)"""
+        if not self._performance_enabled:
+            await self.send("Performance.enable")
+            self._performance_enabled = True
+        return parse_performance_metrics(await self.send("Performance.getMetrics"))
+
+    async def prompt_still_entered(self, prompt):
+        """미리 입력해 둔 프롬프트가 아직 (페이지에 붙어 있는) 입력창에 그대로 있는지 확인"""
+        try:
+            connected = await self.call("return !!arguments[0] && arguments[0].isConnected;", element="prompt_input")
+            return bool(connected) and await self._input_text() == " ".join(prompt.split())
+        except CDPError:
+            return False
+
+    async def process_prompt(self, prompt, prepared=False):
+        """
+        프롬프트 처리 전체 플로우 (ImageFXDownloader.process_prompt와 같은 의미와 지표 구간)
+
+        Args:
+            prepared: True면 미리 입력해 둔 프롬프트가 그대로 있을 때 입력 단계를 건너뜀
+        """
+        storage = self.storage
+        metrics = storage.metrics
+        storage.last_batch_future = None
+        storage.last_output_files = []
+
+        if not (prepared and await self.prompt_still_entered(prompt)):
+            with metrics.span("enter_prompt") as span:
+                entered = await self.enter_prompt(prompt)
+                span.outcome = "ok" if entered else "failed"
+            if not entered:
+                return False
+
+        with metrics.span("capture_hashes"):
+            initial_hashes = await self.capture_current_image_hashes()
+
+        with metrics.span("click") as span:
+            clicked = await self.click_generate_button()
+            span.outcome = "ok" if clicked else "failed"
+        if not clicked:
+            return False
+
+        with metrics.span("wait", mode="cdp") as span:
+            detected = await self.wait_for_images(initial_hashes=initial_hashes)
+            span.outcome = "ok" if detected else "timeout"
+
+        with metrics.span("download") as span:
+            downloaded_files = await self.download_images(prompt, exclude_hashes=initial_hashes)
+            if not downloaded_files:
+                span.outcome = "empty"
+        storage.last_output_files = downloaded_files
+
+        if downloaded_files:
+            logger.info(f"\n✅ 프롬프트 처리 완료: {len(downloaded_files)}개 이미지 다운로드")
+        else:
+            logger.warning("\n⚠️ 이미지가 생성되지 않았습니다.")
+        return bool(downloaded_files)
+
+    async def close(self, close_target=False):
+        """세션 분리 (close_target=True면 탭도 닫음)"""
+        try:
+            await self.connection.send("Target.detachFromTarget", {"sessionId": self.session_id})
+            if close_target:
+                await self.connection.send("Target.closeTarget", {"targetId": self.target_id})
+        except CDPError:
+            pass
+
+
+class CDPBackend:
+    """
+    별도 스레드의 이벤트 루프에서 CDP 연결을 유지하고, 동기 코드에서 코루틴을 실행하는 어댑터
+
+    같은 디버그 포트를 쓰는 워커들은 acquire()로 하나의 연결/이벤트 루프를 공유하므로,
+    워커 풀의 여러 스레드가 동시에 process_prompt를 호출해도 실제 I/O는 한 이벤트 루프에서 처리됩니다.
+    """
+
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, debug_port):
+        self.debug_port = debug_port
+        self.users = 0
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name=f"imagefx-cdp-{debug_port}", daemon=True)
+        self._thread.start()
+        try:
+            self.connection = self.run(CDPConnection.connect(debug_port))
+        except Exception:
+            self._stop()
+            raise
+
+    @classmethod
+    def acquire(cls, debug_port):
+        """디버그 포트별 공유 백엔드를 얻음 (없으면 연결)"""
+        with cls._shared_lock:
+            backend = cls._shared.get(debug_port)
+            if backend is None:
+                backend = cls(debug_port)
+                cls._shared[debug_port] = backend
+            backend.users += 1
+            return backend
+
+    def release(self):
+        """사용자 수를 줄이고 마지막 사용자면 연결과 이벤트 루프 종료"""
+        with self._shared_lock:
+            self.users -= 1
+            if self.users > 0:
+                return
+            self._shared.pop(self.debug_port, None)
+        try:
+            self.run(self.connection.close(), timeout=5)
+        finally:
+            self._stop()
+
+    def run(self, coro, timeout=None):
+        """이벤트 루프에서 코루틴을 실행하고 결과를 기다림"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def open_tab(self, storage, new_tab=False):
+        return self.run(CDPTab.open(self.connection, storage, new_tab))
+
+    def _stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
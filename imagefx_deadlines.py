@@ -0,0 +1,337 @@
+"""
+ImageFX 생성 대기 기한 학습
+생성 버튼을 누른 뒤 첫 이미지가 나타나기까지, 마지막 이미지까지, 이미지 사이 간격을 시간대별 히스토그램으로
+기록하고(실행 간 유지), 관측 분포의 분위수(기본 p99)에 여유를 더해 대기 기한과 조기 포기 기준을 정합니다.
+
+    python imagefx_deadlines.py downloads/latency_model.json
+"""
+
+import os
+import sys
+import json
+import tempfile
+import time
+import logging
+import argparse
+import threading
+from collections import namedtuple
+
+logger = logging.getLogger("imagefx.deadlines")
+
+# 히스토그램 구간 상한(초) (마지막 구간은 그 이상 전부)
+LATENCY_BUCKETS = (0.25, 0.5, 1, 2, 3, 5, 7.5, 10, 15, 20, 30, 45, 60, 90, 120, 180, 300)
+
+# 기록하는 지연 시간 종류
+SERIES = {
+    "first": "클릭 후 첫 이미지",
+    "complete": "클릭 후 마지막 이미지",
+    "gap": "이미지 사이 최대 간격",
+}
+
+# 대기 계획 (timeout: 전체 기한, first_image: 이 시간 안에 첫 이미지가 없으면 조기 포기,
+# quiet: 이미지가 나타난 뒤 이 시간 동안 추가 이미지가 없으면 완료로 판단, basis: 근거)
+WaitPlan = namedtuple("WaitPlan", ["timeout", "first_image", "quiet", "basis"])
+
+
+def _empty_counts():
+    return [0.0] * (len(LATENCY_BUCKETS) + 1)
+
+
+def _bucket_index(value):
+    for index, bound in enumerate(LATENCY_BUCKETS):
+        if value <= bound:
+            return index
+    return len(LATENCY_BUCKETS)
+
+
+def histogram_quantile(counts, quantile):
+    """
+    히스토그램 분위수 추정 (구간 안에서는 선형 보간, 마지막 구간이면 가장 큰 상한)
+
+    Returns:
+        초, 관측이 없으면 None
+    """
+    total = sum(counts)
+    if total <= 0:
+        return None
+    rank = quantile * total
+    cumulative = 0.0
+    for index, count in enumerate(counts):
+        if count and cumulative + count >= rank:
+            if index == len(LATENCY_BUCKETS):
+                return float(LATENCY_BUCKETS[-1])
+            lower = LATENCY_BUCKETS[index - 1] if index else 0.0
+            upper = LATENCY_BUCKETS[index]
+            return lower + (upper - lower) * (rank - cumulative) / count
+        cumulative += count
+    return float(LATENCY_BUCKETS[-1])
+
+
+class WaitTracker:
+    """대기 중 새 이미지 수 변화를 따라가며 첫 이미지/마지막 이미지 시각과 최대 간격을 기록"""
+
+    def __init__(self, plan):
+        self.plan = plan
+        self.started = time.monotonic()
+        self.count = 0
+        self.first = None  # 클릭(대기 시작) 후 첫 이미지까지(초)
+        self.last = None  # 클릭 후 마지막 이미지까지(초)
+        self.max_gap = None
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def update(self, count):
+        """새 이미지 수 갱신 (늘었으면 시각 기록)"""
+        if count <= self.count:
+            return
+        now = self.elapsed()
+        if self.first is None:
+            self.first = now
+        else:
+            gap = now - self.last
+            self.max_gap = gap if self.max_gap is None else max(self.max_gap, gap)
+        self.last = now
+        self.count = count
+
+    def remaining(self):
+        """
+        다음 확인까지 기다릴 수 있는 시간(초): 첫 이미지 전이면 조기 포기 시각까지, 이후에는 전체 기한까지
+        """
+        limit = self.plan.first_image if self.count == 0 else self.plan.timeout
+        return max(0.0, limit - self.elapsed())
+
+    def failure_reason(self):
+        """이미지 없이 끝난 대기의 사유 (조기 포기 또는 타임아웃)"""
+        if self.plan.first_image < self.plan.timeout:
+            return f"조기 포기 ({self.plan.first_image:g}초 안에 첫 이미지 없음)"
+        return f"타임아웃 ({self.plan.timeout:g}초)"
+
+
+class GenerationDeadlines:
+    """관측한 생성 지연 분포로 대기 기한을 정하는 모델 (워커 풀에서 공유 가능)"""
+
+    def __init__(self, path=None, default_timeout=120, adaptive=True, quantile=0.99, margin=0.25, pad=2.0,
+                 min_timeout=15, max_timeout=300, min_samples=20, max_samples=5000):
+        """
+        Args:
+            path: 히스토그램을 유지할 JSON 파일 (None이면 이번 실행에서만 사용)
+            default_timeout: 관측이 부족하거나 학습을 끈 경우의 대기 기한(초) (기본값: 120)
+            adaptive: False면 항상 default_timeout으로 대기 (관측은 계속 기록)
+            quantile: 기한을 정할 분위수 (기본값: 0.99)
+            margin: 분위수에 곱할 여유 비율 (기본값: 0.25 - 25%)
+            pad: 분위수에 더할 여유 시간(초) (기본값: 2)
+            min_timeout, max_timeout: 학습한 기한의 하한/상한(초)
+            min_samples: 시간대별(없으면 전체) 분포를 쓰기 위한 최소 관측 수 (기본값: 20)
+            max_samples: 관측 수가 이를 넘으면 모두 절반으로 줄여 최근 관측의 비중 유지 (기본값: 5000)
+        """
+        self.path = path
+        self.default_timeout = default_timeout
+        self.adaptive = adaptive
+        self.quantile = quantile
+        self.margin = margin
+        self.pad = pad
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.min_samples = min_samples
+        self.max_samples = max_samples
+
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # 파일 쓰기 직렬화 (히스토그램 잠금과 분리하여 관측 기록을 막지 않음)
+        # 종류 -> {"all": 구간별 개수, "hours": {"0".."23": 구간별 개수}}
+        self.histograms = {series: {"all": _empty_counts(), "hours": {}} for series in SERIES}
+        self.run_histograms = {series: _empty_counts() for series in SERIES}  # 이번 실행 관측만
+        self.abandon_streak = 0
+        self.abandoned = 0
+        self._unsaved = 0
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("buckets") != list(LATENCY_BUCKETS):
+            return  # 구간이 바뀐 이전 형식은 버리고 새로 학습
+        for series, stored in data.get("histograms", {}).items():
+            if series in self.histograms:
+                self.histograms[series] = {"all": stored["all"], "hours": stored.get("hours", {})}
+
+    def save(self):
+        """히스토그램을 파일에 저장 (고유한 임시 파일에 쓴 뒤 교체, 여러 워커가 동시에 호출해도 안전)"""
+        if not self.path:
+            return
+        with self._save_lock:
+            with self._lock:
+                data = {"buckets": list(LATENCY_BUCKETS), "histograms": self.histograms,
+                        "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+                text = json.dumps(data)
+                self._unsaved = 0
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".latency_model.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(text)
+                os.replace(temp_path, self.path)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.unlink(temp_path)
+                raise
+
+    def _counts(self, series, hour):
+        """시간대 관측이 충분하면 그 시간대, 아니면 전체 분포 (둘 다 부족하면 None)"""
+        histogram = self.histograms[series]
+        hourly = histogram["hours"].get(str(hour))
+        if hourly and sum(hourly) >= self.min_samples:
+            return hourly, f"{hour}시"
+        if sum(histogram["all"]) >= self.min_samples:
+            return histogram["all"], "전체"
+        return None, None
+
+    def _learned(self, series, hour, low, high):
+        counts, basis = self._counts(series, hour)
+        if counts is None:
+            return None, None
+        value = histogram_quantile(counts, self.quantile) * (1 + self.margin) + self.pad
+        return min(high, max(low, value)), basis
+
+    def plan(self, now=None):
+        """
+        이번 생성의 대기 계획
+
+        연속으로 조기 포기하면 기한을 2배씩(최대 max_timeout) 늘려, 서비스가 느려져도 관측이 다시 쌓이게 합니다.
+        """
+        if not self.adaptive:
+            return WaitPlan(self.default_timeout, self.default_timeout, 3.0, "고정")
+        hour = time.localtime(now).tm_hour
+        with self._lock:
+            timeout, basis = self._learned("complete", hour, self.min_timeout, self.max_timeout)
+            if timeout is None:
+                return WaitPlan(self.default_timeout, self.default_timeout, 3.0, "기본값")
+            first_image, _ = self._learned("first", hour, self.min_timeout, timeout)
+            quiet, _ = self._learned("gap", hour, 1.0, 15.0)
+            widen = 2 ** min(self.abandon_streak, 4)
+
+        timeout = min(self.max_timeout, timeout * widen)
+        first_image = min(timeout, (first_image or timeout) * widen)
+        return WaitPlan(round(timeout, 1), round(first_image, 1), round(quiet or 3.0, 1), f"{basis} p{self.quantile * 100:g}")
+
+    def _add(self, series, value, hour):
+        index = _bucket_index(value)
+        histogram = self.histograms[series]
+        hourly = histogram["hours"].setdefault(str(hour), _empty_counts())
+        for counts in (histogram["all"], hourly, self.run_histograms[series]):
+            counts[index] += 1
+        if sum(histogram["all"]) > self.max_samples:
+            for counts in [histogram["all"], *histogram["hours"].values()]:
+                counts[:] = [count / 2 for count in counts]
+
+    def observe(self, tracker, now=None):
+        """
+        대기 결과 기록 (이미지가 하나라도 나타난 경우만 분포에 반영, 없으면 조기 포기로 집계)
+        """
+        hour = time.localtime(now).tm_hour
+        with self._lock:
+            if tracker.first is None:
+                self.abandon_streak += 1
+                self.abandoned += 1
+                return
+            self.abandon_streak = 0
+            self._add("first", tracker.first, hour)
+            self._add("complete", tracker.last, hour)
+            if tracker.max_gap is not None:
+                self._add("gap", tracker.max_gap, hour)
+            self._unsaved += 1
+            save = self._unsaved >= 10
+        if save:
+            # 저장 실패가 이미지 대기 결과(분류)에 영향을 주지 않도록 경고만 남김 (종료 시 다시 저장)
+            try:
+                self.save()
+            except Exception as e:
+                logger.warning(f"⚠️ 생성 지연 모델 저장 실패: {e}")
+
+    def summary(self, series="complete", run_only=False):
+        """분포 요약 {"count", "p50", "p90", "p99"} (관측이 없으면 분위수는 None)"""
+        with self._lock:
+            counts = list(self.run_histograms[series] if run_only else self.histograms[series]["all"])
+        return {
+            "count": round(sum(counts)),
+            "p50": histogram_quantile(counts, 0.5),
+            "p90": histogram_quantile(counts, 0.9),
+            "p99": histogram_quantile(counts, 0.99),
+        }
+
+    def describe(self):
+        plan = self.plan()
+        return (f"최대 {plan.timeout:g}초, 첫 이미지 {plan.first_image:g}초 안에 없으면 포기, "
+                f"이미지 후 {plan.quiet:g}초 조용하면 완료 ({plan.basis})")
+
+    def print_summary(self):
+        """이번 실행의 생성 지연 분포와 조기 포기 수, 다음 실행에 쓸 대기 계획 출력"""
+        stats = self.summary("complete", run_only=True)
+        if stats["count"]:
+            first = self.summary("first", run_only=True)
+            logger.info(f"⏳ 생성 지연(이번 실행 {stats['count']}회): 첫 이미지 p50 {first['p50']:.1f}초, "
+                        f"마지막 이미지 p50 {stats['p50']:.1f}초 / p99 {stats['p99']:.1f}초, 이미지 없이 끝난 대기 {self.abandoned}회")
+        logger.info(f"   다음 대기 계획: {self.describe()}")
+
+    def render_prometheus(self):
+        """누적 히스토그램을 Prometheus 텍스트 노출 형식으로 반환 (용량 계획용, 시간대별 포함)"""
+        lines = [
+            "# HELP imagefx_generation_latency_seconds Observed image generation latency (persisted across runs).",
+            "# TYPE imagefx_generation_latency_seconds histogram",
+        ]
+        with self._lock:
+            histograms = json.loads(json.dumps(self.histograms))
+
+        for series, histogram in histograms.items():
+            rows = [("all", histogram["all"])] + sorted(histogram["hours"].items(), key=lambda item: int(item[0]))
+            for hour, counts in rows:
+                labels = f'series="{series}",hour="{hour}"'
+                cumulative = 0.0
+                for bound, count in zip(LATENCY_BUCKETS, counts):
+                    cumulative += count
+                    lines.append(f'imagefx_generation_latency_seconds_bucket{{{labels},le="{bound}"}} {cumulative:g}')
+                lines.append(f'imagefx_generation_latency_seconds_bucket{{{labels},le="+Inf"}} {sum(counts):g}')
+                lines.append(f'imagefx_generation_latency_seconds_count{{{labels}}} {sum(counts):g}')
+        return "\n".join(lines) + "\n"
+
+    def print_report(self, out=sys.stdout):
+        """종류별/시간대별 분포와 현재 대기 계획 출력"""
+        print(f"대기 계획: {self.describe()}", file=out)
+        for series, label in SERIES.items():
+            stats = self.summary(series)
+            if not stats["count"]:
+                continue
+            print(f"\n{label} ({series}): {stats['count']}회, p50 {stats['p50']:.1f}초, "
+                  f"p90 {stats['p90']:.1f}초, p99 {stats['p99']:.1f}초", file=out)
+            hours = self.histograms[series]["hours"]
+            for hour in sorted(hours, key=int):
+                counts = hours[hour]
+                if sum(counts):
+                    print(f"   {int(hour):2d}시: {sum(counts):6.0f}회, p50 {histogram_quantile(counts, 0.5):6.1f}초, "
+                          f"p99 {histogram_quantile(counts, 0.99):6.1f}초", file=out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ImageFX 생성 지연 히스토그램 조회")
+    parser.add_argument("model", help="지연 모델 파일 (예: downloads/latency_model.json)")
+    parser.add_argument("--prometheus", action="store_true", help="Prometheus 텍스트 형식으로 출력")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.model):
+        print(f"❌ 지연 모델 파일이 없습니다: {args.model}", file=sys.stderr)
+        sys.exit(1)
+    deadlines = GenerationDeadlines(args.model)
+    if args.prometheus:
+        sys.stdout.write(deadlines.render_prometheus())
+    else:
+        deadlines.print_report()
+
+
+if __name__ == "__main__":
+    main()
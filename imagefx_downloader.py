@@ -7,81 +7,513 @@ import os
 import time
 import json
 import base64
+import logging
+import shutil
 import hashlib
+import uuid
+import argparse
+import itertools
+import tempfile
+import threading
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor, wait as wait_futures
 from datetime import datetime
+from urllib.parse import urlparse, unquote_to_bytes
 from selenium import webdriver
-from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.action_chains import ActionChains
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import requests
 
+from imagefx_archive import ShardWriter
+from imagefx_catalog import Catalog
+from imagefx_deadlines import GenerationDeadlines, WaitPlan, WaitTracker
+from imagefx_fingerprint import NearDuplicateIndex
+from imagefx_journal import JobJournal
+from imagefx_memory import PageMemoryPolicy, parse_performance_metrics
+from imagefx_metrics import RunMetrics, configure_logging
+from imagefx_network import NetworkCapture
+from imagefx_pacing import create_pacing
+from imagefx_postprocess import PostProcessor
+from imagefx_prompts import open_prompt_source, count_prompts, parse_shard, shard_of
+from imagefx_scheduler import RetryScheduler, classify_outcome, EXPECTED_IMAGES, OUTCOME_LABELS, SUCCESS, PARTIAL, UI_STUCK
+from imagefx_selectors import SelectorRegistry
+from imagefx_service import ImageFXService, JobQueue
+from imagefx_scripts import (
+    PROMPT_INPUT_SELECTORS,
+    GENERATE_BUTTON_SELECTORS,
+    HARVEST_IMAGES_SCRIPT,
+    FETCH_IMAGE_SCRIPT,
+    CLEAR_INPUT_SCRIPT,
+    INSERT_TEXT_SCRIPT,
+    WAIT_FOR_IMAGES_SCRIPT,
+    PAGE_STATE_SCRIPT,
+    MARK_DOWNLOADED_SCRIPT,
+    PRUNE_IMAGES_SCRIPT,
+)
+
+
+logger = logging.getLogger("imagefx")
+
+# ImageFX 페이지 주소 (벤치마크에서는 로컬 모의 서버 주소로 대체)
+IMAGEFX_URL = "https://aitestkitchen.withgoogle.com/tools/image-fx"
+
+# MIME 타입별 확장자 (알 수 없는 경우 ImageFX 기본값인 jpg 사용)
+IMAGE_EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/jpg": ".jpg",
+    "image/png": ".png",
+    "image/webp": ".webp",
+    "image/gif": ".gif",
+}
+
+# base64 정규화: URL-safe 문자를 표준 문자로 바꾸고 줄바꿈/공백 제거
+BASE64_NORMALIZE = str.maketrans("-_", "+/", " \t\r\n")
+
+
+class ImageWriter:
+    """
+    data URL을 청크 단위로 디코딩하여 백그라운드 스레드에서 저장하는 I/O 실행기
+
+    이미지는 SHA-256 다이제스트 기준으로 store_dir에 한 번만 저장(content-addressed)되고,
+    요청한 경로에는 하드 링크(불가능하면 심볼릭 링크, 그것도 불가능하면 복사본)가 만들어집니다.
+    """
+
+    CHUNK_CHARS = 1 << 20  # 한 번에 디코딩할 base64 문자 수 (4의 배수)
+
+    def __init__(self, store_dir, max_workers=2, max_pending=8, metrics=None):
+        """
+        Args:
+            store_dir: 다이제스트 기반 이미지 저장소 디렉토리
+            max_workers: 쓰기 스레드 수 (기본값: 2)
+            max_pending: 동시에 대기할 수 있는 최대 쓰기 작업 수. 초과 시 submit이 대기 (기본값: 8)
+            metrics: 저장 구간("write")을 기록할 RunMetrics (기본값: 메모리 집계만)
+        """
+        self.store_dir = store_dir
+        self.metrics = metrics or RunMetrics()
+        os.makedirs(store_dir, exist_ok=True)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="imagefx-writer")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def _track(self, future):
+        with self._lock:
+            self._pending.add(future)
+
+        def _untrack(done):
+            with self._lock:
+                self._pending.discard(done)
+
+        future.add_done_callback(_untrack)
+        return future
+
+    def submit(self, image_url, filepath):
+        """
+        이미지 저장 작업 등록
+
+        Returns:
+            완료 시 {file, sha256, bytes, deduplicated}를 결과로 갖는 Future
+        """
+        return self._submit(self._write, image_url, filepath)
+
+    def submit_archive(self, image_url, archive, key, ext, metadata):
+        """
+        이미지를 샤드 아카이브에 {key}{ext} + {key}.json 샘플로 추가하는 작업 등록
+
+        Returns:
+            완료 시 {file, sha256, bytes, deduplicated, shard}를 결과로 갖는 Future
+        """
+        return self._submit(self._write_archive, image_url, archive, key, ext, metadata)
+
+    def _submit(self, function, *args):
+        self._slots.acquire()
+        try:
+            # 호출한 쪽의 지표 레이블(worker, job_id)을 쓰기 스레드에서도 이어받음
+            context = contextvars.copy_context()
+            future = self.executor.submit(context.run, function, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return self._track(future)
+
+    def when_all(self, futures, callback):
+        """모든 futures가 끝나면 callback(futures)를 실행하고 그 결과를 갖는 Future 반환"""
+        result = Future()
+        remaining = [len(futures)]
+        lock = threading.Lock()
+
+        context = contextvars.copy_context()
+
+        def _run():
+            try:
+                result.set_result(context.run(callback, futures))
+            except Exception as e:
+                result.set_exception(e)
+
+        def _done(_):
+            with lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            _run()
+
+        self._track(result)
+        if not futures:
+            _run()
+        for future in futures:
+            future.add_done_callback(_done)
+        return result
+
+    def object_path(self, digest, ext):
+        """다이제스트에 해당하는 저장소 내 경로 (앞 2글자로 하위 디렉토리 분산)"""
+        return os.path.join(self.store_dir, digest[:2], digest + ext)
+
+    def _write(self, image_url, filepath):
+        """이미지 하나를 저장하며 "write" 구간으로 기록 (bytes: 디코딩한 바이트 수)"""
+        with self.metrics.span("write") as span:
+            record = self._store(image_url, filepath)
+            span.bytes = record["bytes"]
+            if record["deduplicated"]:
+                span.outcome = "deduplicated"
+            return record
+
+    def _write_archive(self, image_url, archive, key, ext, metadata):
+        """이미지를 메모리에 디코딩하여 메타데이터와 함께 샤드에 추가하며 "write" 구간으로 기록"""
+        with self.metrics.span("write", sink="archive") as span:
+            data = bytearray()
+            sha256 = hashlib.sha256()
+            for chunk in self._chunks(image_url):
+                sha256.update(chunk)
+                data += chunk
+
+            metadata = dict(metadata, sha256=sha256.hexdigest(), bytes=len(data))
+            sample = archive.add(key, {
+                ext.lstrip("."): bytes(data),
+                "json": json.dumps(metadata, ensure_ascii=False).encode("utf-8"),
+            })
+            span.bytes = len(data)
+            return {
+                "file": key + ext,
+                "sha256": metadata["sha256"],
+                "bytes": len(data),
+                "deduplicated": False,
+                "shard": sample["shard"],
+            }
+
+    def _chunks(self, image_url):
+        """이미지 바이트를 청크 단위로 반환"""
+        if image_url.startswith("data:"):
+            # data:image/jpg;base64,... 형식에서 base64 부분을 청크 단위로 디코딩
+            start = image_url.index(',') + 1
+            if ";base64" not in image_url[:start]:
+                return iter([unquote_to_bytes(image_url[start:])])
+            return self._decode_base64(image_url, start)
+        # 일반 URL의 경우
+        response = requests.get(image_url, timeout=30, stream=True)
+        response.raise_for_status()
+        return response.iter_content(chunk_size=1 << 16)
+
+    def _decode_base64(self, payload, start):
+        """
+        base64 문자열을 청크 단위로 디코딩 (API 응답처럼 엄격한 형식이 아닌 경우도 허용)
+
+        줄바꿈/공백은 버리고, URL-safe 문자(-_)는 표준 문자(+/)로 바꾸며, 4글자 단위로 나눠 떨어지지 않는
+        나머지는 다음 청크로 넘기고 마지막에 빠진 패딩을 채웁니다.
+        """
+        carry = ""
+        for offset in range(start, len(payload), self.CHUNK_CHARS):
+            text = carry + payload[offset:offset + self.CHUNK_CHARS].translate(BASE64_NORMALIZE)
+            usable = len(text) - len(text) % 4
+            carry = text[usable:]
+            if usable:
+                yield base64.b64decode(text[:usable], validate=True)
+        if carry.rstrip("="):
+            yield base64.b64decode(carry + "=" * (-len(carry) % 4), validate=True)
+
+    def _store(self, image_url, filepath):
+        """저장소 임시 파일에 디코딩하며 해시를 계산한 뒤, 다이제스트 경로로 이름 변경 후 링크"""
+        ext = os.path.splitext(filepath)[1]
+        sha256 = hashlib.sha256()
+        size = 0
+        fd, temp_path = tempfile.mkstemp(dir=self.store_dir, prefix=".", suffix=".part")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in self._chunks(image_url):
+                    sha256.update(chunk)
+                    size += len(chunk)
+                    f.write(chunk)
+
+            digest = sha256.hexdigest()
+            object_path = self.object_path(digest, ext)
+            deduplicated = os.path.exists(object_path)
+            if deduplicated:
+                os.unlink(temp_path)
+            else:
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                os.replace(temp_path, object_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+        self._link(object_path, filepath)
+        return {
+            "file": os.path.basename(filepath),
+            "sha256": digest,
+            "bytes": size,
+            "deduplicated": deduplicated,
+        }
+
+    @staticmethod
+    def _link(object_path, filepath):
+        """저장소 객체를 filepath에 연결 (하드 링크 → 심볼릭 링크 → 복사 순으로 시도)"""
+        temp_link = f"{filepath}.{threading.get_ident()}.link"
+        try:
+            os.link(object_path, temp_link)
+        except OSError:
+            try:
+                os.symlink(os.path.relpath(object_path, os.path.dirname(filepath)), temp_link)
+            except OSError:
+                shutil.copyfile(object_path, temp_link)
+        os.replace(temp_link, filepath)
+
+    def flush(self):
+        """대기 중인 모든 쓰기 작업이 끝날 때까지 대기"""
+        while True:
+            with self._lock:
+                pending = list(self._pending)
+            if not pending:
+                return
+            wait_futures(pending)
+
+    def close(self):
+        """남은 작업을 모두 마치고 스레드 종료"""
+        self.flush()
+        self.executor.shutdown(wait=True)
+
 
 class ImageFXDownloader:
-    def __init__(self, debug_port=9222, download_dir="downloads"):
+    def __init__(self, debug_port=9222, download_dir="downloads", worker_name=None, new_tab=False,
+                 detection_mode="event", writer_threads=2, input_mode="insert", capture_mode="dom",
+                 backend="selenium", imagefx_url=IMAGEFX_URL, metrics=None, perceptual_hash=False,
+                 near_duplicates=None, postprocessor=None, archive=None, prune_images=True, heap_limit_mb=1024,
+                 recycle_every=500, login_poll=0, deadlines=None, catalog=None):
         """
         ImageFX 다운로더 초기화
 
         Args:
             debug_port: Chrome 디버그 포트 (기본값: 9222)
             download_dir: 이미지 저장 디렉토리 (기본값: downloads)
+            worker_name: 워커 풀에서 사용할 이름 (기본값: None)
+            new_tab: True면 연결 후 새 탭을 열어 작업 (같은 브라우저에 여러 워커를 붙일 때 사용)
+            detection_mode: 이미지 생성 완료 감지 방식 ("event": MutationObserver, "polling": 5초 주기 확인)
+            writer_threads: 이미지 저장용 백그라운드 스레드 수 (기본값: 2)
+            input_mode: 프롬프트 입력 방식 ("insert": 한 번에 삽입, "keys": send_keys 키 입력)
+            capture_mode: 이미지 수집 방식 ("dom": 렌더링된 이미지, "network": 생성 API 응답 우선, 실패 시 DOM)
+            backend: 브라우저 제어 방식 ("selenium": chromedriver, "cdp": DevTools 웹소켓 직접 연결)
+            imagefx_url: 이동할 ImageFX 페이지 주소 (기본값: IMAGEFX_URL)
+            metrics: 단계별 구간을 기록할 RunMetrics (워커 풀에서는 공유, 기본값: 메모리 집계만)
+            perceptual_hash: True면 다운로드할 이미지의 지각 해시를 계산하여 이전 프롬프트와 거의 같은 이미지 표시
+            near_duplicates: 지각 해시 비교에 사용할 NearDuplicateIndex (워커 풀에서는 공유)
+            postprocessor: 저장이 끝난 이미지를 변환할 PostProcessor (기본값: None - 후처리 안 함)
+            archive: 지정하면 프롬프트별 폴더 대신 이 ShardWriter의 tar 샤드에 저장 (워커 풀에서는 공유)
+            prune_images: True면 프롬프트마다 이미 받은 이미지를 페이지에서 비워 탭 메모리 해제 (기본값: True)
+            heap_limit_mb: 탭의 JS 힙 사용량이 이 값(MB)을 넘으면 페이지 재로드 (0이면 사용 안 함, 기본값: 1024)
+            recycle_every: 이 수만큼 프롬프트를 처리할 때마다 페이지 재로드 (0이면 사용 안 함, 기본값: 500)
+            login_poll: 0보다 크면 작업마다 로그인 상태를 확인하고, 로그아웃되어 있으면 이 간격(초)으로
+                다시 확인하며 로그인될 때까지 대기 (서비스 모드, 기본값: 0 - 확인 안 함)
+            deadlines: 이미지 생성 대기 기한을 정할 GenerationDeadlines (워커 풀에서는 공유,
+                기본값: 이번 실행에서만 학습하는 모델 - 관측이 쌓이기 전에는 120초)
+            catalog: 저장이 끝난 생성 결과를 기록할 Catalog (워커 풀에서는 공유, 기본값: None - 기록 안 함)
         """
         self.debug_port = debug_port
         self.download_dir = download_dir
+        self.worker_name = worker_name or f"port-{debug_port}"
+        self.new_tab = new_tab
+        self.detection_mode = detection_mode
+        self.input_mode = input_mode
+        self.capture_mode = capture_mode
+        self.backend = backend
+        self.imagefx_url = imagefx_url
+        self.metrics = metrics or RunMetrics()
+        self.perceptual_hash = perceptual_hash
+        self.near_duplicates = near_duplicates or (NearDuplicateIndex() if perceptual_hash else None)
+        self.postprocessor = postprocessor
+        self.archive = archive
+        self.deadlines = deadlines or GenerationDeadlines()
+        self.catalog = catalog
+        self.last_wait = None  # 마지막 이미지 대기의 WaitTracker (대기 계획과 첫 이미지/마지막 이미지 시각)
+        self.memory = PageMemoryPolicy(prune_images, heap_limit_mb, recycle_every)
+        self._performance_enabled = False
+        self.login_poll = login_poll
+        self.logged_in = None  # 마지막 로그인 상태 확인 결과 (확인 전이면 None)
+        self.network_capture = None
+        self.cdp_backend = None  # 같은 포트의 워커들이 공유하는 CDP 연결 (backend="cdp")
+        self.cdp_tab = None
+        self.last_detection_time = None  # 마지막 이미지 감지 소요 시간(초)
+        self.last_batch_future = None  # 마지막 프롬프트의 저장+메타데이터 완료 Future
+        self.last_output_files = []  # 마지막 프롬프트에서 다운로드한 파일 경로
+        self.last_outcome = None  # 마지막 프롬프트 결과 분류 (imagefx_scheduler 참고)
+        self.writer = ImageWriter(os.path.join(download_dir, ".objects"), max_workers=writer_threads,
+                                  metrics=self.metrics)
+        # 성공한 선택자를 기억하는 선택자 레지스트리 (워커마다 별도)
+        self.selectors = {
+            "prompt_input": SelectorRegistry("prompt_input", PROMPT_INPUT_SELECTORS, require_enabled=False),
+            "generate_button": SelectorRegistry("generate_button", GENERATE_BUTTON_SELECTORS),
+        }
         self.driver = None
 
         # 다운로드 디렉토리 생성
         if not os.path.exists(download_dir):
             os.makedirs(download_dir)
-            print(f"✅ 다운로드 디렉토리 생성: {download_dir}")
+            logger.info(f"✅ 다운로드 디렉토리 생성: {download_dir}")
 
     def connect_to_browser(self):
         """디버그 모드로 실행 중인 Chrome 브라우저에 연결"""
+        if self.backend == "cdp":
+            return self._connect_cdp()
+
         try:
             chrome_options = Options()
             chrome_options.add_experimental_option("debuggerAddress", f"127.0.0.1:{self.debug_port}")
+            if self.capture_mode == "network":
+                NetworkCapture.configure(chrome_options)
 
             self.driver = webdriver.Chrome(options=chrome_options)
-            print(f"✅ Chrome 브라우저 연결 성공 (포트: {self.debug_port})")
+            self.metrics.instrument_driver(self.driver)
+
+            # 같은 브라우저를 여러 워커가 공유하는 경우 각자 전용 탭 사용
+            if self.new_tab:
+                self.driver.switch_to.new_window('tab')
+
+            # 네트워크 캡처 모드: 생성 API 응답 본문을 읽을 수 있도록 Network 도메인 활성화
+            if self.capture_mode == "network":
+                self.network_capture = NetworkCapture(self.driver)
+                try:
+                    self.network_capture.enable()
+                except Exception as e:
+                    logger.warning(f"⚠️ 네트워크 캡처를 사용할 수 없어 DOM 방식으로 진행합니다: {e}")
+                    self.network_capture = None
+
+            logger.info(f"✅ Chrome 브라우저 연결 성공 (포트: {self.debug_port})")
             return True
         except Exception as e:
-            print(f"❌ Chrome 브라우저 연결 실패: {e}")
-            print(f"\n💡 Chrome을 다음 명령어로 실행했는지 확인하세요:")
-            print(f"   Windows: chrome.exe --remote-debugging-port={self.debug_port}")
-            print(f"   Mac: /Applications/Google\\ Chrome.app/Contents/MacOS/Google\\ Chrome --remote-debugging-port={self.debug_port}")
-            print(f"   Linux: google-chrome --remote-debugging-port={self.debug_port}")
+            logger.error(f"❌ Chrome 브라우저 연결 실패: {e}")
+            logger.error(f"\n💡 Chrome을 다음 명령어로 실행했는지 확인하세요:")
+            logger.error(f"   Windows: chrome.exe --remote-debugging-port={self.debug_port}")
+            logger.error(f"   Mac: /Applications/Google\\ Chrome.app/Contents/MacOS/Google\\ Chrome --remote-debugging-port={self.debug_port}")
+            logger.error(f"   Linux: google-chrome --remote-debugging-port={self.debug_port}")
+            return False
+
+    def _connect_cdp(self):
+        """Selenium 없이 DevTools 웹소켓으로 연결하고 작업용 탭 세션 준비"""
+        from imagefx_cdp import CDPBackend
+
+        if self.capture_mode == "network":
+            logger.warning("⚠️ 네트워크 캡처는 selenium 백엔드에서만 지원되어 DOM 방식으로 진행합니다.")
+        try:
+            self.cdp_backend = CDPBackend.acquire(self.debug_port)
+            self.cdp_tab = self.cdp_backend.open_tab(self, new_tab=self.new_tab)
+            logger.info(f"✅ Chrome DevTools 연결 성공 (포트: {self.debug_port}, cdp 백엔드)")
+            return True
+        except Exception as e:
+            if self.cdp_backend:
+                self.cdp_backend.release()
+                self.cdp_backend = None
+            logger.error(f"❌ Chrome DevTools 연결 실패: {e}")
+            logger.error(f"\n💡 Chrome을 --remote-debugging-port={self.debug_port} 옵션으로 실행했는지 확인하세요.")
             return False
 
     def navigate_to_imagefx(self):
         """ImageFX 페이지로 이동"""
         try:
-            imagefx_url = "https://aitestkitchen.withgoogle.com/tools/image-fx"
-            print(f"\n🌐 ImageFX 페이지로 이동: {imagefx_url}")
-            self.driver.get(imagefx_url)
-            time.sleep(3)  # 페이지 로딩 대기
-            print("✅ ImageFX 페이지 로드 완료")
+            imagefx_url = self.imagefx_url
+            logger.info(f"\n🌐 ImageFX 페이지로 이동: {imagefx_url}")
+            if self.cdp_tab:
+                self.cdp_backend.run(self.cdp_tab.navigate(imagefx_url))
+            else:
+                self.driver.get(imagefx_url)
+                self.wait_for_page_ready()
+            logger.info("✅ ImageFX 페이지 로드 완료")
             return True
         except Exception as e:
-            print(f"❌ ImageFX 페이지 로드 실패: {e}")
+            logger.error(f"❌ ImageFX 페이지 로드 실패: {e}")
             return False
 
+    def _wait_until(self, condition, timeout, poll_frequency=0.1):
+        """조건 함수가 참이 될 때까지 짧은 주기로 확인 (타임아웃 시 False)"""
+        try:
+            return WebDriverWait(self.driver, timeout, poll_frequency=poll_frequency).until(
+                lambda driver: condition()
+            )
+        except TimeoutException:
+            return False
+
+    def wait_for_page_ready(self, timeout=15):
+        """문서 로딩 완료 후 프롬프트 입력창이 나타날 때까지 대기 (로그인 화면이면 타임아웃)"""
+        return self._wait_until(
+            lambda: self.driver.execute_script(
+                "return document.readyState === 'complete' && "
+                "!!document.querySelector(\"[contenteditable='true']\");"
+            ),
+            timeout,
+        )
+
+    def _element_text(self, element):
+        return self.driver.execute_script("return arguments[0].textContent;", element) or ""
+
+    @staticmethod
+    def _normalize_text(text):
+        return " ".join((text or "").split())
+
+    def _clear_input(self, input_element):
+        """입력창 내용을 지우고 비워질 때까지 대기"""
+        self.driver.execute_script(CLEAR_INPUT_SCRIPT, input_element)
+        if self._wait_until(lambda: not self._element_text(input_element).strip(), timeout=1):
+            return True
+
+        # 스크립트로 지워지지 않으면 Ctrl+A / Delete로 재시도
+        from selenium.webdriver.common.keys import Keys
+        input_element.send_keys(Keys.CONTROL + "a")
+        input_element.send_keys(Keys.DELETE)
+        return self._wait_until(lambda: not self._element_text(input_element).strip(), timeout=2)
+
+    def _insert_prompt(self, input_element, prompt):
+        """
+        프롬프트를 한 번에 삽입 (DevTools Input.insertText, 실패 시 execCommand('insertText'))
+
+        Returns:
+            입력창 내용이 프롬프트와 일치하면 True
+        """
+        expected = self._normalize_text(prompt)
+        try:
+            self.driver.execute_cdp_cmd("Input.insertText", {"text": prompt})
+        except Exception:
+            self.driver.execute_script(INSERT_TEXT_SCRIPT, input_element, prompt)
+
+        if self._wait_until(lambda: self._normalize_text(self._element_text(input_element)) == expected, timeout=2):
+            return True
+
+        # Input.insertText가 다른 요소에 입력된 경우 등: 지우고 execCommand로 한 번 더 시도
+        self._clear_input(input_element)
+        self.driver.execute_script(INSERT_TEXT_SCRIPT, input_element, prompt)
+        return self._wait_until(
+            lambda: self._normalize_text(self._element_text(input_element)) == expected, timeout=2
+        )
+
     def enter_prompt(self, prompt):
         """프롬프트 입력"""
         try:
-            print(f"\n📝 프롬프트 입력: {prompt}")
+            logger.info(f"\n📝 프롬프트 입력: {prompt}")
 
-            # contenteditable div 찾기 (ImageFX는 div를 사용)
-            input_element = None
-            try:
-                # contenteditable div 찾기
-                input_element = WebDriverWait(self.driver, 10).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "[contenteditable='true']"))
-                )
-                print(f"✅ 입력창 찾음 (contenteditable div)")
-            except TimeoutException:
-                print("❌ 프롬프트 입력창을 찾을 수 없습니다.")
+            # 입력창 찾기 (기억된 선택자 우선, 모든 후보를 한 번에 확인)
+            input_element, candidate = self.selectors["prompt_input"].resolve(self.driver, timeout=10)
+            if input_element is not None:
+                logger.debug(f"✅ 입력창 찾음 ({candidate['value']})")
+            else:
+                logger.error("❌ 프롬프트 입력창을 찾을 수 없습니다.")
                 print("💡 수동으로 프롬프트를 입력하려면 아래 안내를 따르세요:")
                 print(f"   1. 브라우저에서 ImageFX 프롬프트 입력창을 찾으세요")
                 print(f"   2. 다음 프롬프트를 입력하세요: {prompt}")
@@ -89,114 +521,65 @@ class ImageFXDownloader:
                 input("   4. Enter를 눌러 계속하세요...")
                 return True
 
-            # 스크롤하여 요소를 화면에 표시
-            self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", input_element)
-            time.sleep(0.5)
-
-            # 포커스 주기
-            self.driver.execute_script("arguments[0].focus();", input_element)
-            time.sleep(0.3)
-
-            # 기존 내용 전체 선택 후 삭제
+            # 스크롤하여 요소를 화면에 표시하고 포커스가 잡힐 때까지 대기
+            self.driver.execute_script(
+                "arguments[0].scrollIntoView({block: 'center'}); arguments[0].focus();", input_element
+            )
             input_element.click()
-            time.sleep(0.3)
-
-            # Ctrl+A로 전체 선택
-            from selenium.webdriver.common.keys import Keys
-            input_element.send_keys(Keys.CONTROL + "a")
-            time.sleep(0.2)
-
-            # 삭제
-            input_element.send_keys(Keys.DELETE)
-            time.sleep(0.5)
-
-            # 프롬프트 입력 (send_keys 사용 - 가장 확실한 방법)
+            self._wait_until(
+                lambda: self.driver.execute_script(
+                    "return arguments[0].contains(document.activeElement);", input_element
+                ),
+                timeout=2,
+            )
+
+            # 기존 내용 전체 삭제
+            self._clear_input(input_element)
+
+            # 빠른 입력 모드: 프롬프트 길이와 무관하게 한 번에 삽입
+            if self.input_mode == "insert":
+                if self._insert_prompt(input_element, prompt):
+                    logger.info("✅ 프롬프트 입력 완료")
+                    return True
+                logger.warning("⚠️ 한 번에 삽입 실패, send_keys로 재시도...")
+                self.selectors["prompt_input"].invalidate()
+                self._clear_input(input_element)
+
+            # 프롬프트 입력 (send_keys 사용), 입력이 반영될 때까지 대기
             input_element.send_keys(prompt)
-            time.sleep(2)
-
-            # 입력 완료를 위한 클릭 (focus 유지)
-            input_element.click()
-            time.sleep(0.5)
-
-            # 입력 확인
-            current_text = self.driver.execute_script("return arguments[0].textContent;", input_element)
-            if prompt in current_text:
-                print("✅ 프롬프트 입력 완료")
+            typing_timeout = 5 + len(prompt) * 0.05
+            if self._wait_until(lambda: prompt in self._element_text(input_element), timeout=typing_timeout):
+                logger.info("✅ 프롬프트 입력 완료")
                 return True
             else:
-                print(f"⚠️ 입력 확인 실패. 예상: '{prompt[:50]}...', 실제: '{current_text[:50]}...'")
-                # 재시도 - send_keys 사용
-                print("⚠️ send_keys로 재시도...")
-                input_element.click()
-                time.sleep(0.5)
+                current_text = self._element_text(input_element)
+                logger.warning(f"⚠️ 입력 확인 실패. 예상: '{prompt[:50]}...', 실제: '{current_text[:50]}...'")
+                # 재시도 - 기존 내용을 지운 뒤 send_keys 사용 (프롬프트가 두 번 입력되지 않도록)
+                logger.warning("⚠️ send_keys로 재시도...")
+                self._clear_input(input_element)
                 input_element.send_keys(prompt)
-                time.sleep(1)
-                print("✅ 프롬프트 입력 완료 (재시도)")
-                return True
+                if self._wait_until(lambda: prompt in self._element_text(input_element), timeout=typing_timeout):
+                    logger.info("✅ 프롬프트 입력 완료 (재시도)")
+                    return True
+                logger.error("❌ 프롬프트 입력 확인 실패")
+                return False
 
         except Exception as e:
-            print(f"❌ 프롬프트 입력 실패: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception(f"❌ 프롬프트 입력 실패: {e}")
             return False
 
     def click_generate_button(self):
         """생성 버튼 클릭 ('상식 여행' 버튼)"""
         try:
-            print("\n🔘 생성 버튼 찾는 중...")
-
-            # XPath 선택자 (한국어 "상식 여행" 텍스트 기반)
-            xpath_selectors = [
-                # "상식 여행" 텍스트 포함
-                "//button[contains(., '상식 여행')]",
-                "//button[contains(., '상식')]",
-                # casino 아이콘이 있는 버튼
-                "//button[.//i[contains(text(), 'casino')]]",
-                # type=submit인 버튼 (마지막 옵션)
-                "//button[@type='submit' and contains(., '상식')]",
-            ]
-
-            # CSS 선택자
-            css_selectors = [
-                # 분석된 클래스명
-                "button.gdArnN",
-                "button.fzQimn",
-            ]
-
-            button = None
-
-            # XPath 선택자 시도 (한국어 텍스트가 더 정확하므로 먼저 시도)
-            for selector in xpath_selectors:
-                try:
-                    button = WebDriverWait(self.driver, 3).until(
-                        EC.element_to_be_clickable((By.XPATH, selector))
-                    )
-                    print(f"✅ 생성 버튼 찾음 ('상식 여행' 버튼)")
-                    break
-                except TimeoutException:
-                    continue
-                except Exception:
-                    continue
+            logger.debug("\n🔘 생성 버튼 찾는 중...")
 
-            # CSS 선택자 시도
-            if not button:
-                for selector in css_selectors:
-                    try:
-                        button = WebDriverWait(self.driver, 3).until(
-                            EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
-                        )
-                        # 텍스트 확인
-                        btn_text = button.text
-                        if '상식' in btn_text:
-                            print(f"✅ 생성 버튼 찾음 ('상식 여행' 버튼)")
-                            break
-                    except TimeoutException:
-                        continue
-                    except Exception:
-                        continue
-
-            if not button:
-                print("❌ 생성 버튼을 찾을 수 없습니다.")
+            # 기억된 선택자를 먼저, 나머지 후보는 한 번의 스크립트 호출로 함께 확인
+            registry = self.selectors["generate_button"]
+            button, candidate = registry.resolve(self.driver, timeout=12)
+            if button is not None:
+                logger.debug(f"✅ 생성 버튼 찾음 ('상식 여행' 버튼, {candidate['value']})")
+            else:
+                logger.error("❌ 생성 버튼을 찾을 수 없습니다.")
                 print("💡 수동으로 '상식 여행' 버튼을 클릭한 후 Enter를 누르세요...")
                 input()
                 return True
@@ -205,100 +588,151 @@ class ImageFXDownloader:
             try:
                 # 스크롤하여 버튼을 화면에 표시
                 self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", button)
-                time.sleep(0.5)
 
                 # JavaScript로 클릭 시도
                 try:
                     self.driver.execute_script("arguments[0].click();", button)
-                    print("✅ 생성 버튼 클릭 완료")
+                    logger.info("✅ 생성 버튼 클릭 완료")
                 except:
                     button.click()
-                    print("✅ 생성 버튼 클릭 완료")
+                    logger.info("✅ 생성 버튼 클릭 완료")
 
                 return True
             except Exception as e:
-                print(f"⚠️ 버튼 클릭 실패, 재시도: {e}")
+                logger.warning(f"⚠️ 버튼 클릭 실패, 재시도: {e}")
+                registry.invalidate()
                 button.click()
-                print("✅ 생성 버튼 클릭 완료")
+                logger.info("✅ 생성 버튼 클릭 완료")
                 return True
 
         except Exception as e:
-            print(f"❌ 생성 버튼 클릭 실패: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception(f"❌ 생성 버튼 클릭 실패: {e}")
             return False
 
+    def harvest_images(self, exclude_hashes=None, perceptual=False):
+        """
+        페이지의 생성 이미지 설명자 목록을 한 번의 스크립트 호출로 수집
+
+        Args:
+            exclude_hashes: 제외할 이미지 지문 집합
+            perceptual: True면 각 이미지의 지각 해시(phash)도 계산
+
+        Returns:
+            [{fp, length, mime, display_width, width, height, phash(선택)}, ...] (DOM 순서)
+        """
+        return self.driver.execute_script(HARVEST_IMAGES_SCRIPT, list(exclude_hashes or ()), perceptual) or []
+
     def capture_current_image_hashes(self):
         """현재 페이지의 이미지 해시 저장 (생성 버튼 클릭 전에 호출)"""
         hashes = set()
         try:
-            images = self.driver.find_elements(By.TAG_NAME, "img")
-            for img in images:
-                try:
-                    src = img.get_attribute("src")
-                    if src and src.startswith("data:") and len(src) > 50000:
-                        width = img.size.get('width', 0)
-                        if width > 100:
-                            img_hash = hashlib.md5(src[:1000].encode()).hexdigest()
-                            hashes.add(img_hash)
-                except:
-                    continue
+            hashes = {image["fp"] for image in self.harvest_images()}
 
             if hashes:
-                print(f"   📋 현재 이미지 {len(hashes)}개 감지됨 (중복 방지용)")
+                logger.debug(f"   📋 현재 이미지 {len(hashes)}개 감지됨 (중복 방지용)")
         except Exception as e:
-            print(f"   ⚠️ 이미지 해시 캡처 실패: {e}")
+            logger.warning(f"   ⚠️ 이미지 해시 캡처 실패: {e}")
 
         return hashes
 
-    def wait_for_images(self, timeout=30, initial_hashes=None):
-        """이미지 생성 완료 대기 (변화 감지 방식)"""
+    def wait_for_images(self, timeout=None, initial_hashes=None, tracker=None):
+        """
+        이미지 생성 완료 대기 (detection_mode에 따라 이벤트 또는 폴링 방식)
+
+        timeout을 지정하지 않으면 관측한 생성 지연으로 정한 대기 계획을 사용하여, 첫 이미지가 기한 안에
+        나타나지 않으면 조기 포기하고 이미지가 나타난 뒤 더 늘지 않으면 바로 완료로 판단합니다.
+
+        Args:
+            tracker: 이어서 쓸 WaitTracker (네트워크 대기에서 DOM 방식으로 전환한 경우, 클릭 시각과 대기 계획을
+                그대로 써서 남은 시간만 기다리고 지연도 클릭 기준으로 기록)
+        """
+        if initial_hashes is None:
+            initial_hashes = set()
+
+        if tracker is None:
+            plan = self.deadlines.plan() if timeout is None else WaitPlan(timeout, timeout, 3.0, "지정")
+            tracker = WaitTracker(plan)
+            logger.info(f"\n⏳ 이미지 생성 대기 중... (최대 {plan.timeout:g}초, 첫 이미지 {plan.first_image:g}초, "
+                        f"{self.detection_mode} 방식, {plan.basis})")
+        else:
+            logger.info(f"\n⏳ 이미지 생성 대기 중... (남은 시간 최대 {tracker.remaining():.0f}초, "
+                        f"{self.detection_mode} 방식, 네트워크 대기 {tracker.elapsed():.0f}초 포함)")
+        self.last_wait = tracker
+        if initial_hashes:
+            logger.debug(f"   📋 이전 이미지 {len(initial_hashes)}개 제외, 새 이미지만 대기 중...")
+
+        result = None
+        if self.detection_mode == "event":
+            result = self._wait_for_images_event(tracker, initial_hashes)
+            if result is None:
+                # 스크립트 주입 실패 시 남은 시간 동안 폴링 방식으로 대체
+                result = self._wait_for_images_polling(tracker, initial_hashes)
+        else:
+            result = self._wait_for_images_polling(tracker, initial_hashes)
+
+        self.last_detection_time = tracker.elapsed()
+        self.deadlines.observe(tracker)
+        logger.info(f"   ⏱️ 감지 소요 시간: {self.last_detection_time:.1f}초")
+        return result
+
+    def _wait_for_images_event(self, tracker, initial_hashes, slice_seconds=10):
+        """
+        MutationObserver로 새 이미지 등장/디코딩 완료를 감지
+
+        Returns:
+            True/False (완료 여부), 스크립트 실행이 불가능하면 None (폴링으로 대체)
+        """
+        target_images = 4  # ImageFX는 4개 생성
+        known_count = -1
+
+        try:
+            while tracker.remaining() > 0:
+                slice_ms = max(1, int(min(slice_seconds, tracker.remaining()) * 1000))
+                # 새 이미지가 하나라도 있으면 대기 계획의 quiet초 동안 추가 변화가 없을 때 완료로 판단
+                quiet_ms = int(tracker.plan.quiet * 1000) if tracker.count > 0 else 0
+
+                self.driver.set_script_timeout(slice_ms / 1000 + 5)
+                result = self.driver.execute_async_script(
+                    WAIT_FOR_IMAGES_SCRIPT, list(initial_hashes), known_count, quiet_ms, slice_ms
+                )
+
+                known_count = len(result.get("images", []))
+                tracker.update(known_count)
+
+                if tracker.count >= target_images or (result.get("quiet") and tracker.count > 0):
+                    logger.info(f"✅ {tracker.count}개 새 이미지 생성 완료!")
+                    return True
+
+                elapsed = int(tracker.elapsed())
+                if elapsed > 0:
+                    logger.debug(f"   {elapsed}초 경과... (새 이미지: {tracker.count}개)")
+
+        except Exception as e:
+            logger.warning(f"   ⚠️ 이벤트 감지 실패, 폴링 방식으로 전환: {e}")
+            return None
+
+        if tracker.count > 0:
+            logger.warning(f"⚠️ 타임아웃 ({tracker.plan.timeout:g}초) - {tracker.count}개 이미지로 계속 진행합니다.")
+            return True
+        logger.warning(f"⚠️ {tracker.failure_reason()} - 이미지 생성 실패. 다음 프롬프트로 진행합니다.")
+        return False
+
+    def _wait_for_images_polling(self, tracker, initial_hashes):
+        """이미지 생성 완료 대기 (5초 주기 변화 감지 방식)"""
         try:
-            print(f"\n⏳ 이미지 생성 대기 중... (최대 {timeout}초)")
-            start_time = time.time()
             previous_count = 0
             stable_count = 0
             target_images = 4  # ImageFX는 4개 생성
             last_print_time = 0
             check_interval = 5  # 5초마다 확인
+            valid_images = []
 
-            # initial_hashes가 제공되면 중복 체크
-            if initial_hashes is None:
-                initial_hashes = set()
-
-            if initial_hashes:
-                print(f"   📋 이전 이미지 {len(initial_hashes)}개 제외, 새 이미지만 대기 중...")
-
-            while time.time() - start_time < timeout:
-                # 이미지 요소 찾기 시도
-                images = self.driver.find_elements(By.TAG_NAME, "img")
-
-                # 생성된 이미지 필터링 (data: URL만 사용 - 프로필 이미지 제외)
-                valid_images = []
-                current_hashes = set()
-
-                for img in images:
-                    try:
-                        src = img.get_attribute("src")
-                        if not src:
-                            continue
-
-                        # ImageFX 생성 이미지는 data: URL만 사용
-                        if src.startswith("data:"):
-                            if len(src) > 50000:  # 50KB 이상 (실제 이미지)
-                                # 썸네일 제외 (너비 100 이상만)
-                                width = img.size.get('width', 0)
-                                if width > 100:
-                                    img_hash = hashlib.md5(src[:1000].encode()).hexdigest()
-                                    current_hashes.add(img_hash)
-
-                                    # 새 이미지인지 확인
-                                    if not initial_hashes or img_hash not in initial_hashes:
-                                        valid_images.append(img)
-                    except:
-                        continue
+            while tracker.remaining() > 0:
+                # 생성된 새 이미지 설명자 수집 (data: URL만 사용 - 프로필 이미지 제외)
+                valid_images = self.harvest_images(exclude_hashes=initial_hashes)
 
                 current_count = len(valid_images)
+                tracker.update(current_count)
 
                 # 이미지 개수가 3회 연속 동일하면 생성 완료로 판단
                 if current_count == previous_count:
@@ -311,175 +745,1158 @@ class ImageFXDownloader:
                 # 3회 연속 동일 (15초) 또는 4개 도달 시 완료
                 if (stable_count >= 3 and current_count > 0) or current_count >= target_images:
                     if current_count > 0:
-                        print(f"✅ {current_count}개 새 이미지 생성 완료!")
+                        logger.info(f"✅ {current_count}개 새 이미지 생성 완료!")
                         return True
 
                 # 진행 상황 표시 (5초마다)
-                elapsed = int(time.time() - start_time)
+                elapsed = int(tracker.elapsed())
                 if elapsed - last_print_time >= check_interval and elapsed > 0:
-                    print(f"   {elapsed}초 경과... (새 이미지: {current_count}개, 안정: {stable_count}/3)")
+                    logger.debug(f"   {elapsed}초 경과... (새 이미지: {current_count}개, 안정: {stable_count}/3)")
                     last_print_time = elapsed
 
-                time.sleep(check_interval)
+                time.sleep(min(check_interval, tracker.remaining()))
 
             # 타임아웃: 이미지 개수에 따라 처리
             if len(valid_images) > 0:
-                print(f"⚠️ 타임아웃 ({timeout}초) - {len(valid_images)}개 이미지로 계속 진행합니다.")
+                logger.warning(f"⚠️ 타임아웃 ({tracker.plan.timeout:g}초) - {len(valid_images)}개 이미지로 계속 진행합니다.")
                 return True
             else:
-                print(f"⚠️ 타임아웃 ({timeout}초) - 이미지 생성 실패. 다음 프롬프트로 진행합니다.")
+                logger.warning(f"⚠️ {tracker.failure_reason()} - 이미지 생성 실패. 다음 프롬프트로 진행합니다.")
                 return False
 
         except Exception as e:
-            print(f"❌ 이미지 대기 중 오류: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception(f"❌ 이미지 대기 중 오류: {e}")
             return False
 
-    def download_images(self, prompt):
-        """생성된 이미지 4개 다운로드 (hover로 다운로드 버튼 활성화)"""
-        try:
-            print("\n💾 이미지 다운로드 시작...")
+    def download_images(self, prompt, exclude_hashes=None):
+        """
+        생성된 이미지 4개 다운로드 (DOM에 렌더링된 data URL 사용)
 
-            # 모든 이미지 요소 찾기
-            images = self.driver.find_elements(By.TAG_NAME, "img")
+        Args:
+            prompt: 프롬프트 (폴더명/메타데이터용)
+            exclude_hashes: 생성 전에 이미 있던 이미지 지문 집합 (다운로드 대상에서 제외)
+        """
+        try:
+            logger.info("\n💾 이미지 다운로드 시작...")
 
-            # 유효한 이미지 필터링 (data: URL만 - 프로필 이미지 제외)
-            valid_images = []
-            for img in images:
-                try:
-                    src = img.get_attribute("src")
-                    if not src:
-                        continue
-
-                    # ImageFX 생성 이미지는 data: URL만 사용
-                    if src.startswith("data:"):
-                        if len(src) > 50000:  # 50KB 이상 (실제 이미지)
-                            width = img.size.get('width', 0)
-                            if width > 100:  # 썸네일 제외
-                                valid_images.append((img, src))
-                except:
-                    continue
+            # 유효한 이미지 설명자 수집 (data: URL만 - 프로필 이미지 제외, 이전 이미지 제외)
+            valid_images = self.harvest_images(exclude_hashes=exclude_hashes, perceptual=self.perceptual_hash)
 
-            print(f"📸 발견된 이미지: {len(valid_images)}개")
+            logger.info(f"📸 발견된 이미지: {len(valid_images)}개")
 
             if not valid_images:
-                print("❌ 다운로드할 이미지를 찾을 수 없습니다.")
+                logger.error("❌ 다운로드할 이미지를 찾을 수 없습니다.")
                 return []
 
-            # 타임스탬프 기반 폴더명 생성
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            safe_prompt = "".join(c for c in prompt[:50] if c.isalnum() or c in (' ', '-', '_')).strip()
-            session_dir = os.path.join(self.download_dir, f"{timestamp}_{safe_prompt}")
-            os.makedirs(session_dir, exist_ok=True)
-
-            downloaded_files = []
-            actions = ActionChains(self.driver)
-
-            # 최대 4개 이미지 다운로드
-            for idx, (img_element, img_url) in enumerate(valid_images[:4], 1):
+            # 최대 4개 이미지의 전체 data URL을 한 번씩만 가져옴
+            items = []
+            for idx, image in enumerate(valid_images[:4], 1):
                 try:
-                    print(f"\n   [{idx}/4] 이미지 다운로드 중...")
+                    logger.debug(f"\n   [{idx}/4] 이미지 다운로드 중...")
 
-                    # 이미지 요소로 스크롤
-                    self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", img_element)
-                    time.sleep(0.5)
+                    # 이미지 요소로 스크롤 후 전체 data URL을 한 번만 가져옴
+                    img_url = self.driver.execute_script(FETCH_IMAGE_SCRIPT, image["fp"])
+                    if not img_url:
+                        raise RuntimeError("이미지 요소가 페이지에서 사라졌습니다")
+                    self.metrics.add_bytes(len(img_url))
+                    items.append(dict(image, url=img_url, source="dom"))
 
-                    # 이미지 데이터 직접 저장 (버튼 클릭 불필요 - data: URL 사용)
-                    print(f"   ⏳ 이미지 데이터 저장 중...")
-
-                    # 파일명 생성
-                    filename = f"image_{idx}.jpg"  # ImageFX는 jpg 사용
-                    filepath = os.path.join(session_dir, filename)
+                except Exception as e:
+                    logger.exception(f"   ❌ 이미지 {idx} 다운로드 실패: {e}")
 
-                    # data: URL인 경우 base64 디코딩
-                    if img_url.startswith("data:"):
-                        # data:image/jpg;base64,... 형식에서 base64 부분 추출
-                        base64_data = img_url.split(',', 1)[1]
-                        image_data = base64.b64decode(base64_data)
+            return self.save_images(prompt, items)
 
-                        with open(filepath, 'wb') as f:
-                            f.write(image_data)
-                    else:
-                        # 일반 URL의 경우
-                        response = requests.get(img_url, timeout=30)
-                        response.raise_for_status()
+        except Exception as e:
+            logger.exception(f"❌ 이미지 다운로드 실패: {e}")
+            return []
 
-                        with open(filepath, 'wb') as f:
-                            f.write(response.content)
+    def save_images(self, prompt, items):
+        """
+        이미지를 백그라운드 저장 작업으로 등록하고, 모두 저장되면 metadata.json 기록
 
-                    downloaded_files.append(filepath)
-                    print(f"   ✅ 저장 완료: {filepath}")
+        Args:
+            prompt: 프롬프트 (폴더명/메타데이터용)
+            items: [{url, mime, width, height, source, server_metadata(선택)}, ...]
 
-                except Exception as e:
-                    print(f"   ❌ 이미지 {idx} 다운로드 실패: {e}")
-                    import traceback
-                    traceback.print_exc()
+        Returns:
+            저장될 파일 경로 목록
+        """
+        if not items:
+            return []
+        if self.archive is not None:
+            return self.archive_images(prompt, items)
+
+        # 타임스탬프 기반 폴더명 생성 (무작위 값을 붙여 같은 초에 저장한 비슷한 프롬프트끼리도 겹치지 않음)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        safe_prompt = "".join(c for c in prompt[:50] if c.isalnum() or c in (' ', '-', '_')).strip()
+        session_dir = os.path.join(self.download_dir, f"{timestamp}_{safe_prompt}_{uuid.uuid4().hex[:8]}")
+        os.makedirs(session_dir, exist_ok=True)
+
+        downloaded_files = []
+        futures = []
+
+        for idx, item in enumerate(items[:4], 1):
+            # 파일명 생성 (ImageFX는 jpg 사용)
+            filename = f"image_{idx}{IMAGE_EXTENSIONS.get(item.get('mime'), '.jpg')}"
+            filepath = os.path.join(session_dir, filename)
+
+            # 이전 프롬프트에서 받은 이미지와 지각 해시가 거의 같으면 메타데이터에 표시
+            if item.get("phash") and self.near_duplicates is not None:
+                duplicate_of, distance = self.near_duplicates.check_and_add(item["phash"], filepath)
+                if duplicate_of:
+                    item["near_duplicate_of"] = os.path.relpath(duplicate_of, self.download_dir)
+                    logger.warning(f"   ⚠️ 유사 이미지: {filename} ≈ {item['near_duplicate_of']} (차이 {distance}비트)")
+
+            # 디코딩/저장은 백그라운드에서 진행 (브라우저는 다음 작업 가능)
+            future = self.writer.submit(item.pop("url"), filepath)
+            future.add_done_callback(self._report_write)
+            # 저장이 끝나면 프로세스 풀에서 사본/썸네일 생성 (다음 프롬프트 처리와 병렬)
+            post_future = self.postprocessor.after(future, filepath, prompt) if self.postprocessor else None
+            futures.append((future, post_future, item))
+            downloaded_files.append(filepath)
+            logger.debug(f"   ⏳ 저장 예약: {filepath}")
+
+        # 모든 이미지 저장(과 후처리)이 끝나면 메타데이터 저장 (data URL 대신 다이제스트/크기/해상도 기록)
+        # 묶음 Future의 결과는 실제로 저장된 파일 경로 (디코딩/쓰기에 실패한 이미지는 제외)
+        def write_metadata(_):
+            with self.metrics.span("metadata") as span:
+                metadata_path = _write_metadata()
+                span.bytes = os.path.getsize(metadata_path)
+            return [path for (future, _, _), path in zip(futures, downloaded_files) if future.exception() is None]
+
+        def _write_metadata():
+            images = []
+            for future, post_future, item in futures:
+                if future.exception() is not None:
+                    continue
+                record = future.result()
+                image = {
+                    "file": record["file"],
+                    "sha256": record["sha256"],
+                    "bytes": record["bytes"],
+                    "width": item.get("width"),
+                    "height": item.get("height"),
+                    "mime": item.get("mime"),
+                    "source": item.get("source"),
+                }
+                if item.get("phash"):
+                    image["phash"] = item["phash"]
+                if item.get("near_duplicate_of"):
+                    image["near_duplicate_of"] = item["near_duplicate_of"]
+                if item.get("server_metadata"):
+                    image["server_metadata"] = item["server_metadata"]
+                if post_future is not None:
+                    image["postprocess"] = post_future.result()
+                images.append(image)
 
-            # 메타데이터 저장
             metadata = {
                 "prompt": prompt,
                 "timestamp": timestamp,
-                "downloaded_count": len(downloaded_files),
-                "image_urls": [url for _, url in valid_images[:4]]
+                "downloaded_count": len(images),
+                "images": images,
             }
 
             metadata_path = os.path.join(session_dir, "metadata.json")
             with open(metadata_path, 'w', encoding='utf-8') as f:
                 json.dump(metadata, f, ensure_ascii=False, indent=2)
 
-            print(f"\n✨ 다운로드 완료: {len(downloaded_files)}개 이미지")
-            print(f"📁 저장 위치: {session_dir}")
+            if self.catalog is not None:
+                self.record_catalog(
+                    self.catalog.relative(session_dir), prompt, timestamp,
+                    [dict(image, path=self.catalog.relative(os.path.join(session_dir, image["file"])))
+                     for image in images],
+                    metadata_path=self.catalog.relative(metadata_path),
+                )
+            return metadata_path
 
-            return downloaded_files
+        pending = [future for future, _, _ in futures]
+        pending += [post_future for _, post_future, _ in futures if post_future is not None]
+        self.last_batch_future = self.writer.when_all(pending, write_metadata)
+
+        logger.info(f"\n✨ 다운로드 완료: {len(downloaded_files)}개 이미지 (백그라운드 저장 중)")
+        logger.info(f"📁 저장 위치: {session_dir}")
+
+        return downloaded_files
+
+    def archive_images(self, prompt, items):
+        """
+        이미지를 샤드 아카이브에 샘플({key}.jpg + {key}.json)로 추가 (폴더와 metadata.json 대신 이미지별 메타데이터)
 
+        샘플 키는 타임스탬프와 무작위 값으로 만들어 같은 초에 처리한 프롬프트끼리도 겹치지 않습니다.
+
+        Returns:
+            아카이브 멤버 이름 목록
+        """
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        batch = f"{timestamp}_{uuid.uuid4().hex[:8]}"
+        job_id = RunMetrics.current_labels().get("job_id")
+
+        names = []
+        futures = []
+        for idx, item in enumerate(items[:4], 1):
+            ext = IMAGE_EXTENSIONS.get(item.get('mime'), '.jpg')
+            key = f"{batch}_{idx}"
+
+            if item.get("phash") and self.near_duplicates is not None:
+                duplicate_of, distance = self.near_duplicates.check_and_add(item["phash"], key + ext)
+                if duplicate_of:
+                    item["near_duplicate_of"] = duplicate_of
+                    logger.warning(f"   ⚠️ 유사 이미지: {key + ext} ≈ {duplicate_of} (차이 {distance}비트)")
+
+            metadata = {
+                "prompt": prompt,
+                "job_id": job_id,
+                "batch": batch,
+                "index": idx,
+                "timestamp": timestamp,
+                "width": item.get("width"),
+                "height": item.get("height"),
+                "mime": item.get("mime"),
+                "source": item.get("source"),
+            }
+            for field in ("phash", "near_duplicate_of", "server_metadata"):
+                if item.get(field):
+                    metadata[field] = item[field]
+
+            future = self.writer.submit_archive(item.pop("url"), self.archive, key, ext, metadata)
+            future.add_done_callback(self._report_write)
+            futures.append(future)
+            names.append(key + ext)
+
+        def record_batch(done):
+            records = [(future.result(), item) for future, item in zip(done, items) if future.exception() is None]
+            if self.catalog is not None:
+                self.record_catalog(batch, prompt, timestamp, [
+                    {"path": record["file"], "shard": record["shard"], "sha256": record["sha256"],
+                     "bytes": record["bytes"], "width": item.get("width"), "height": item.get("height"),
+                     "mime": item.get("mime"), "source": item.get("source"), "phash": item.get("phash")}
+                    for record, item in records
+                ])
+            return [record["file"] for record, _ in records]
+
+        self.last_batch_future = self.writer.when_all(futures, record_batch)
+        logger.info(f"\n✨ 다운로드 완료: {len(names)}개 이미지 (샤드 아카이브에 저장 중, 샘플 {batch}_*)")
+        return names
+
+    def record_catalog(self, batch, prompt, timestamp, images, metadata_path=None):
+        """저장이 끝난 생성 결과를 카탈로그에 기록 (실패해도 이미지 저장 결과에는 영향 없음)"""
+        try:
+            self.catalog.record(batch, prompt, timestamp, images,
+                                job_id=RunMetrics.current_labels().get("job_id"), metadata_path=metadata_path)
         except Exception as e:
-            print(f"❌ 이미지 다운로드 실패: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.warning(f"   ⚠️ 카탈로그 기록 실패 ({batch}): {e}")
+
+    def wait_for_network_images(self, timeout=None, initial_hashes=None):
+        """
+        네트워크 캡처 모드: 이미지 생성 API 응답에서 이미지를 직접 가져옴
+
+        DOM에 새 이미지 4개가 먼저 나타나거나 (응답을 잡지 못한 경우), 대기 계획의 조기 포기 시각까지 응답도
+        DOM 이미지도 없으면 바로 중단하고 빈 목록을 반환합니다. 이때 self.last_wait를 wait_for_images()에
+        넘기면 DOM 방식은 남은 시간만 기다립니다.
+
+        Returns:
+            save_images()에 전달할 항목 목록 (찾지 못하면 빈 목록)
+        """
+        plan = self.deadlines.plan() if timeout is None else WaitPlan(timeout, timeout, 3.0, "지정")
+        tracker = self.last_wait = WaitTracker(plan)
+        logger.info(f"\n📡 생성 API 응답 대기 중... (최대 {plan.timeout:g}초, 첫 이미지 {plan.first_image:g}초, "
+                    f"{plan.basis})")
+
+        def stop_condition():
+            if self.network_capture.last_error_status is not None:
+                return True
+            tracker.update(len(self.harvest_images(exclude_hashes=initial_hashes)))
+            return tracker.count >= EXPECTED_IMAGES or tracker.remaining() <= 0
+
+        try:
+            images = self.network_capture.wait(plan.timeout, stop_condition=stop_condition)
+        except Exception as e:
+            logger.warning(f"   ⚠️ 네트워크 캡처 실패: {e}")
             return []
 
-    def process_prompt(self, prompt):
-        """프롬프트 처리 전체 플로우"""
-        print(f"\n{'='*60}")
-        print(f"🎨 프롬프트 처리 시작")
-        print(f"{'='*60}")
+        if not images:
+            if self.network_capture.last_error_status is not None:
+                logger.warning(f"   ⚠️ 생성 API 오류 응답: HTTP {self.network_capture.last_error_status}")
+            else:
+                logger.warning("   ⚠️ 생성 API 응답을 찾지 못했습니다. DOM 방식으로 전환합니다.")
+            return []
 
-        # 1. 프롬프트 입력
-        if not self.enter_prompt(prompt):
+        # 응답 하나에 모든 이미지가 들어 있으므로 첫 이미지와 마지막 이미지 시각이 같음
+        tracker.update(len(images))
+        self.deadlines.observe(tracker)
+        self.last_detection_time = tracker.elapsed()
+        logger.info(f"✅ 생성 API 응답에서 이미지 {len(images)}개 캡처 ({self.last_detection_time:.1f}초)")
+        return [
+            {
+                "url": f"data:{image['mime']};base64,{image['payload']}",
+                "mime": image["mime"],
+                "source": "network",
+                "server_metadata": image["server_metadata"],
+            }
+            for image in images
+        ]
+
+    @staticmethod
+    def _report_write(future):
+        """백그라운드 저장 결과 출력"""
+        if future.exception() is not None:
+            logger.error(f"   ❌ 이미지 저장 실패: {future.exception()}")
+        else:
+            record = future.result()
+            note = " (중복 - 기존 객체 재사용)" if record["deduplicated"] else ""
+            logger.debug(f"   ✅ 저장 완료: {record['file']} ({record['sha256'][:12]}){note}")
+
+    def prepare_prompt(self, prompt):
+        """
+        다음 프롬프트를 미리 입력 (파이프라인 모드: 이전 프롬프트의 저장이 진행되는 동안 실행)
+
+        Returns:
+            입력 성공 여부
+        """
+        with self.metrics.span("enter_prompt", worker=self.worker_name, prepared=True) as span:
+            if self.cdp_tab:
+                entered = self.cdp_backend.run(self.cdp_tab.enter_prompt(prompt))
+            else:
+                entered = self.enter_prompt(prompt)
+            span.outcome = "ok" if entered else "failed"
+        return entered
+
+    def _prompt_still_entered(self, prompt):
+        """미리 입력해 둔 프롬프트가 아직 입력창에 그대로 있는지 확인"""
+        try:
+            input_element, _ = self.selectors["prompt_input"].resolve(self.driver, timeout=1)
+            if input_element is None:
+                return False
+            return self._normalize_text(self._element_text(input_element)) == self._normalize_text(prompt)
+        except Exception:
             return False
 
+    def process_prompt(self, prompt, prepared=False):
+        """
+        프롬프트 처리 전체 플로우 (전체와 단계별 소요 시간을 지표 구간으로 기록)
+
+        Args:
+            prepared: True면 prepare_prompt()로 미리 입력해 둔 프롬프트가 그대로 있을 때 입력 단계를 건너뜀
+        """
+        logger.info(f"\n{'='*60}")
+        logger.info(f"🎨 프롬프트 처리 시작")
+        logger.info(f"{'='*60}")
+
+        self.last_outcome = UI_STUCK  # 처리 중 예외가 나면 이 값으로 남음
+        with self.metrics.span("prompt", worker=self.worker_name) as span:
+            # cdp 백엔드: 같은 흐름을 공유 이벤트 루프에서 비동기로 수행
+            if self.cdp_tab:
+                result = self.cdp_backend.run(self.cdp_tab.process_prompt(prompt, prepared))
+            else:
+                result = self._process_prompt(prompt, prepared)
+
+            # 이미지 수와 페이지 알림 문구로 결과 분류 (재시도 스케줄러가 사용)
+            self.last_outcome = self.classify_result()
+            span.outcome = self.last_outcome
+        if self.last_outcome not in (SUCCESS, PARTIAL):
+            logger.warning(f"   결과 분류: {OUTCOME_LABELS[self.last_outcome]}")
+
+        if self.memory.enabled:
+            try:
+                self.maintain_page()
+            except Exception as e:
+                logger.warning(f"⚠️ 페이지 메모리 관리 실패: {e}")
+        return result
+
+    def tab_memory(self):
+        """탭 메모리 지표 (DevTools Performance.getMetrics, 예: JSHeapUsedSize, Nodes)"""
+        if self.cdp_tab:
+            return self.cdp_backend.run(self.cdp_tab.performance_metrics())
+        if not self._performance_enabled:
+            self.driver.execute_cdp_cmd("Performance.enable", {})
+            self._performance_enabled = True
+        return parse_performance_metrics(self.driver.execute_cdp_cmd("Performance.getMetrics", {}))
+
+    def mark_downloaded(self, exclude_hashes, count):
+        """
+        네트워크 응답으로 받은 생성 결과의 DOM 이미지를 정리 대상으로 표시
+
+        DOM 방식은 FETCH_IMAGE_SCRIPT가 가져온 이미지를 직접 표시하므로, 응답에서 받아 DOM에서는 가져오지 않은
+        같은 이미지만 여기서 표시합니다. 아직 렌더링되지 않은 이미지는 표시되지 않아 재로드 한도로만 정리됩니다.
+        """
+        try:
+            fingerprints = [image["fp"] for image in self.harvest_images(exclude_hashes=exclude_hashes)][:count]
+            if fingerprints:
+                self.driver.execute_script(MARK_DOWNLOADED_SCRIPT, fingerprints)
+        except Exception as e:
+            logger.debug(f"받은 이미지 표시 실패: {e}")
+
+    def prune_images(self):
+        """
+        이미 받은 생성 이미지를 페이지에서 비움 (다음 이미지 수집/감지가 오래된 이미지를 훑지 않도록)
+
+        Returns:
+            (비운 이미지 수, 해제한 data URL 문자 수)
+        """
+        if self.cdp_tab:
+            result = self.cdp_backend.run(self.cdp_tab.call(PRUNE_IMAGES_SCRIPT))
+        else:
+            result = self.driver.execute_script(PRUNE_IMAGES_SCRIPT)
+        pruned, freed = result or (0, 0)
+        return pruned, freed
+
+    def maintain_page(self):
+        """
+        프롬프트 처리 후 받은 이미지를 비우고 탭 메모리를 확인하여, 한도나 프롬프트 수에 이르면 페이지 재로드
+
+        ("maintenance" 구간으로 기록하며 js_heap_bytes 레이블에 확인한 JS 힙 사용량을 남김)
+        """
+        with self.metrics.span("maintenance", worker=self.worker_name) as span:
+            if self.memory.prune:
+                pruned, freed = self.prune_images()
+                span.bytes = freed
+                if pruned:
+                    logger.debug(f"   🧹 페이지에서 이미지 {pruned}개 비움 ({freed / 1024 / 1024:.1f}MB)")
+
+            heap = None
+            if self.memory.heap_limit_mb:
+                try:
+                    heap = self.tab_memory().get("JSHeapUsedSize")
+                except Exception as e:
+                    logger.debug(f"탭 메모리 확인 실패: {e}")
+            if heap:
+                span.labels["js_heap_bytes"] = int(heap)
+
+            reason = self.memory.check(heap)
+            if reason:
+                logger.info(f"\n♻️ [{self.worker_name}] 페이지 다시 불러오기 ({reason})")
+                span.outcome = "recycled" if self.recycle_page() else "recycle_failed"
+
+    def recycle_page(self):
+        """페이지를 다시 불러와 쌓인 DOM과 JS 힙을 비움 (입력창이 다시 나타날 때까지 대기)"""
+        recycled = self.navigate_to_imagefx()
+        if recycled:
+            self.memory.reloaded()
+        return recycled
+
+    def page_state(self):
+        """생성 결과 분류용 페이지 상태 (알림 문구, 진행 표시, 생성 API 오류 상태)"""
+        try:
+            if self.cdp_tab:
+                state = self.cdp_backend.run(self.cdp_tab.call(PAGE_STATE_SCRIPT)) or {}
+            else:
+                state = self.driver.execute_script(PAGE_STATE_SCRIPT) or {}
+        except Exception as e:
+            logger.debug(f"페이지 상태 확인 실패: {e}")
+            state = {}
+        if self.network_capture and self.network_capture.last_error_status is not None:
+            state["http_status"] = self.network_capture.last_error_status
+        return state
+
+    def check_login(self):
+        """로그인 상태 확인 (Google 로그인 페이지가 아니고 프롬프트 입력창이 있으면 로그인된 것으로 판단)"""
+        state = self.page_state()
+        url = state.get("url") or ""
+        self.logged_in = bool(state.get("has_input")) and urlparse(url).netloc != "accounts.google.com"
+        return self.logged_in
+
+    def wait_for_login(self, poll=10):
+        """
+        로그인될 때까지 주기적으로 확인하며 대기 (input()으로 막지 않고, 브라우저에서 로그인하면 자동으로 이어서 진행)
+
+        Returns:
+            기다린 시간(초)
+        """
+        if self.check_login():
+            return 0.0
+
+        logger.warning(f"\n🔐 [{self.worker_name}] 로그인이 필요합니다. "
+                       f"브라우저에서 로그인하면 자동으로 이어서 처리합니다.")
+        started = time.monotonic()
+        with self.metrics.span("login_wait", worker=self.worker_name):
+            while True:
+                time.sleep(poll)
+                if self.check_login():
+                    break
+                # 로그인 후 ImageFX로 돌아오지 않은 경우(빈 탭, 오류 페이지 등)에만 다시 이동
+                netloc = urlparse(self.page_state().get("url") or "").netloc
+                if netloc not in ("accounts.google.com", urlparse(self.imagefx_url).netloc):
+                    self.navigate_to_imagefx()
+        waited = time.monotonic() - started
+        logger.info(f"✅ [{self.worker_name}] 로그인 확인 ({waited:.0f}초 대기)")
+        return waited
+
+    def classify_result(self):
+        """
+        마지막 프롬프트 결과 분류 (저장 작업에 넘긴 이미지 수 기준, 모자랄 때만 페이지 상태 확인)
+
+        저장 완료를 기다리지 않으므로 브라우저 스레드는 바로 다음 프롬프트로 넘어가며, 실제로 저장된 파일 기준의
+        최종 상태는 process_job()이 묶음 Future가 끝날 때 작업 저널에 기록합니다.
+        """
+        count = len(self.last_output_files)
+        if count >= EXPECTED_IMAGES:
+            return SUCCESS
+        return classify_outcome(count, self.page_state())
+
+    def _process_prompt(self, prompt, prepared=False):
+        """selenium 백엔드 프롬프트 처리 단계"""
+        metrics = self.metrics
+        self.last_batch_future = None
+        self.last_output_files = []
+
+        # 1. 프롬프트 입력 (미리 입력해 둔 내용이 그대로면 생략)
+        if not (prepared and self._prompt_still_entered(prompt)):
+            with metrics.span("enter_prompt") as span:
+                entered = self.enter_prompt(prompt)
+                span.outcome = "ok" if entered else "failed"
+            if not entered:
+                return False
+
         # 2. 생성 버튼 클릭 전에 현재 이미지 해시 캡처 (중복 방지)
-        initial_hashes = self.capture_current_image_hashes()
+        with metrics.span("capture_hashes"):
+            initial_hashes = self.capture_current_image_hashes()
+
+        # 네트워크 캡처 모드: 이전 응답 로그를 비워 이번 생성 응답만 잡도록 함
+        if self.network_capture:
+            try:
+                self.network_capture.reset()
+            except Exception as e:
+                logger.warning(f"⚠️ 성능 로그를 읽을 수 없어 DOM 방식으로 전환합니다: {e}")
+                self.network_capture = None
 
         # 3. 생성 버튼 클릭
-        if not self.click_generate_button():
+        with metrics.span("click") as span:
+            clicked = self.click_generate_button()
+            span.outcome = "ok" if clicked else "failed"
+        if not clicked:
             return False
 
-        # 4. 이미지 생성 대기 (이전 이미지 해시 전달)
-        self.wait_for_images(initial_hashes=initial_hashes)
-        # 이미지 생성 실패해도 계속 진행 (0개일 수도 있음)
+        # 4~5. 네트워크 캡처 모드면 생성 API 응답에서 바로 저장
+        network_items = []
+        if self.network_capture:
+            with metrics.span("wait", mode="network") as span:
+                network_items = self.wait_for_network_images(initial_hashes=initial_hashes)
+                span.outcome = "ok" if network_items else "fallback"
 
-        # 5. 이미지 다운로드
-        downloaded_files = self.download_images(prompt)
+        if not network_items and self.network_capture and self.network_capture.last_error_status is not None:
+            # 생성 API가 오류로 응답했으면 이미지가 나타나지 않으므로 DOM 대기 생략
+            downloaded_files = []
+        elif network_items:
+            with metrics.span("download", mode="network") as span:
+                span.bytes = sum(len(item["url"]) for item in network_items)
+                downloaded_files = self.save_images(prompt, network_items)
+            self.mark_downloaded(initial_hashes, len(network_items))
+        else:
+            # 4. 이미지 생성 대기 (이전 이미지 해시 전달, 네트워크 대기에서 전환했으면 같은 기한의 남은 시간만)
+            with metrics.span("wait", mode=self.detection_mode) as span:
+                detected = self.wait_for_images(initial_hashes=initial_hashes,
+                                                tracker=self.last_wait if self.network_capture else None)
+                span.labels["deadline"] = self.last_wait.plan.timeout
+                span.outcome = "ok" if detected else "timeout"
+            # 이미지 생성 실패해도 계속 진행 (0개일 수도 있음)
+
+            # 5. 이미지 다운로드
+            with metrics.span("download") as span:
+                downloaded_files = self.download_images(prompt, exclude_hashes=initial_hashes)
+                if not downloaded_files:
+                    span.outcome = "empty"
+        self.last_output_files = downloaded_files
 
         if downloaded_files:
-            print(f"\n✅ 프롬프트 처리 완료: {len(downloaded_files)}개 이미지 다운로드")
+            logger.info(f"\n✅ 프롬프트 처리 완료: {len(downloaded_files)}개 이미지 다운로드")
         else:
-            print("\n⚠️ 이미지가 생성되지 않았습니다. 다음 프롬프트로 진행합니다.")
+            logger.warning("\n⚠️ 이미지가 생성되지 않았습니다.")
+        return bool(downloaded_files)
+
+    def process_job(self, job_id, prompt, journal=None, prepared=False):
+        """
+        작업 저널에 상태를 기록하며 프롬프트 처리
+
+        generating으로 기록한 뒤 처리하고, 이미지 저장과 메타데이터 기록이 모두 끝난 시점에
+        downloaded로 기록합니다. 그 전에 종료되면 generating 상태로 남아 재실행 시 다시 처리됩니다.
+        """
+        if journal is None:
+            with self.metrics.context(job_id=job_id):
+                return self.process_prompt(prompt, prepared)
+
+        journal.record(job_id, prompt, JobJournal.GENERATING)
+        try:
+            with self.metrics.context(job_id=job_id):
+                result = self.process_prompt(prompt, prepared)
+        except Exception as e:
+            journal.record(job_id, prompt, JobJournal.FAILED, error=str(e), outcome=UI_STUCK)
+            raise
+
+        outcome = self.last_outcome
+        if not self.last_output_files or self.last_batch_future is None:
+            journal.record(job_id, prompt, JobJournal.FAILED,
+                           error=f"다운로드된 이미지 없음 ({OUTCOME_LABELS.get(outcome, outcome)})", outcome=outcome)
+            return result
+
+        def record_outcome(future):
+            if future.exception() is not None:
+                journal.record(job_id, prompt, JobJournal.FAILED, error=str(future.exception()), outcome=outcome)
+                return
+            # 실제로 저장된 파일만 기록 (하나도 없으면 실패, 저장에 실패한 이미지가 있어 모자라면 partial)
+            written = future.result()
+            if not written:
+                journal.record(job_id, prompt, JobJournal.FAILED, error="이미지 저장 실패", outcome=outcome)
+            else:
+                journal.record(job_id, prompt, JobJournal.DOWNLOADED, outputs=written,
+                               outcome=PARTIAL if len(written) < EXPECTED_IMAGES else outcome)
+
+        self.last_batch_future.add_done_callback(record_outcome)
+        return result
+
+    def run_job(self, job, scheduler, journal=None, prepared=False):
+        """
+        스케줄러가 내준 작업 하나를 처리하고 결과 분류를 보고 (다시 시도할 결과면 스케줄러가 재시도 예약)
+
+        Returns:
+            이미지를 하나 이상 받았는지 여부
+        """
+        success = False
+        if self.login_poll:
+            self.wait_for_login(self.login_poll)
+        try:
+            success = self.process_job(job.job_id, job.prompt, journal, prepared=prepared)
+        except Exception as e:
+            self.last_outcome = UI_STUCK
+            logger.error(f"❌ [{self.worker_name}] 프롬프트 처리 중 오류: {e}")
+
+        delay = scheduler.report(job, self.last_outcome, images=len(self.last_output_files))
+        if delay is not None:
+            logger.info(f"🔁 {delay:.0f}초 뒤 다시 시도 ({job.attempt + 1}/{scheduler.max_retries + 1}번째 시도)")
+            if journal is not None:
+                # 재시도 대기 중에 종료되어도 다음 실행에서 이어서 처리하도록 pending으로 기록
+                journal.record(job.job_id, job.prompt, JobJournal.PENDING, outcome=self.last_outcome,
+                               retry_in=round(delay))
+        return success
+
+    def run_pipeline(self, scheduler, journal=None, pacer=None, depth=2, total=None):
+        """
+        한 탭에서 단계를 겹쳐 작업 처리 (파이프라인 모드)
+
+        이미지를 받은 직후 다음 프롬프트를 미리 입력하고, 이전 프롬프트들의 디스크 저장/메타데이터/후처리는
+        백그라운드에서 계속됩니다. 클릭 직전에 현재 이미지 해시를 다시 수집하므로 미리 입력해도
+        이전 결과가 섞이지 않습니다.
 
-        # 성공/실패 상관없이 항상 True 반환 (계속 진행)
-        return True
+        Args:
+            scheduler: 작업을 내주는 RetryScheduler
+            journal: 상태를 기록할 JobJournal (기본값: None)
+            pacer: 프롬프트 간격 정책 (기본값: None, 대기 없음)
+            depth: 저장이 끝나지 않은 채로 진행할 수 있는 이전 프롬프트 수 (기본값: 2)
+            total: 진행 표시에 쓸 전체 작업 수 (모르면 None)
+
+        Returns:
+            성공한 프롬프트 수
+        """
+        in_flight = []
+        success_count = 0
+        prepared = False
+        job = scheduler.next_job()
+
+        while job is not None:
+            # 저장 대기 중인 프롬프트가 depth개면 가장 오래된 것이 끝날 때까지 대기
+            while len(in_flight) >= max(depth, 1):
+                wait_futures([in_flight.pop(0)])
+
+            if pacer is not None:
+                waited = pacer.wait()
+                if waited >= 1:
+                    logger.info(f"\n⏸️ 다음 프롬프트 처리 전 {waited:.1f}초 대기함")
+
+            logger.info(f"\n[{describe_job(job, total)}] 프롬프트: {job.prompt}" + (" (미리 입력됨)" if prepared else ""))
+
+            self.last_batch_future = None
+            if self.run_job(job, scheduler, journal, prepared=prepared):
+                success_count += 1
+            if self.last_batch_future is not None:
+                in_flight.append(self.last_batch_future)
+            if pacer is not None:
+                pacer.record(self.last_outcome in (SUCCESS, PARTIAL))
+
+            # 현재 이미지를 받았으므로 저장이 끝나기 전에 다음 프롬프트 입력
+            # (다음 작업이 재시도 대기나 서킷 브레이커로 늦어지면 여기서 기다림)
+            prepared = False
+            job = scheduler.next_job()
+            if job is not None:
+                try:
+                    with self.metrics.context(job_id=job.job_id):
+                        prepared = self.prepare_prompt(job.prompt)
+                except Exception as e:
+                    logger.debug(f"다음 프롬프트 미리 입력 실패: {e}")
+
+        wait_futures(in_flight)
+        return success_count
+
+    def run_serial(self, scheduler, journal=None, pacer=None, total=None):
+        """
+        스케줄러가 내주는 작업을 이 탭에서 차례로 처리
+
+        Returns:
+            성공한 프롬프트 수
+        """
+        success_count = 0
+        for job in scheduler:
+            # 간격 정책에 따라 시작 시점 조절
+            if pacer:
+                waited = pacer.wait()
+                if waited >= 1:
+                    logger.info(f"\n⏸️ 다음 프롬프트 처리 전 {waited:.1f}초 대기함")
+
+            logger.info(f"\n[{describe_job(job, total)}] 프롬프트: {job.prompt}")
+
+            if self.run_job(job, scheduler, journal):
+                success_count += 1
+            if pacer:
+                pacer.record(self.last_outcome in (SUCCESS, PARTIAL))
+        return success_count
+
+    def print_selector_stats(self):
+        """선택자 레지스트리 적중/미적중 통계 출력"""
+        logger.info(f"\n🔎 선택자 통계 ({self.worker_name})")
+        for registry in self.selectors.values():
+            logger.info(f"   {registry.describe()}")
 
     def close(self):
-        """브라우저 연결 종료 (브라우저는 닫지 않음)"""
+        """남은 이미지 저장을 마치고 브라우저 연결 종료 (브라우저는 닫지 않음)"""
+        logger.info("\n⏳ 남은 이미지 저장 대기 중...")
+        self.writer.close()
+
+        if self.cdp_backend:
+            logger.info("\n👋 DevTools 연결 종료 (브라우저는 계속 실행됩니다)")
+            try:
+                self.cdp_backend.run(self.cdp_tab.close(), timeout=5)
+            finally:
+                self.cdp_backend.release()
+            self.cdp_backend = self.cdp_tab = None
+
         if self.driver:
-            print("\n👋 Selenium 연결 종료 (브라우저는 계속 실행됩니다)")
+            logger.info("\n👋 Selenium 연결 종료 (브라우저는 계속 실행됩니다)")
             self.driver.quit()
 
 
+class ImageFXWorkerPool:
+    """여러 Chrome 디버그 포트/탭에 워커를 하나씩 배치하고 작업 스케줄러를 공유하여 병렬 처리"""
+
+    def __init__(self, debug_ports=(9222,), tabs_per_browser=1, download_dir="downloads", pacing="fixed:10",
+                 detection_mode="event", input_mode="insert", capture_mode="dom", backend="selenium",
+                 imagefx_url=IMAGEFX_URL, metrics=None, perceptual_hash=False, postprocessor=None, archive=None,
+                 prune_images=True, heap_limit_mb=1024, recycle_every=500, login_poll=0, deadlines=None,
+                 catalog=None):
+        """
+        워커 풀 초기화
+
+        Args:
+            debug_ports: 연결할 Chrome 디버그 포트 목록 (포트마다 별도 브라우저)
+            tabs_per_browser: 브라우저당 열 탭(워커) 수 (기본값: 1)
+            download_dir: 이미지 저장 디렉토리 (기본값: downloads)
+            pacing: 워커별 프롬프트 간격 정책 (imagefx_pacing.create_pacing 형식, 기본값: fixed:10)
+            detection_mode: 이미지 생성 완료 감지 방식 ("event" 또는 "polling")
+            input_mode: 프롬프트 입력 방식 ("insert" 또는 "keys")
+            capture_mode: 이미지 수집 방식 ("dom" 또는 "network")
+            backend: 브라우저 제어 방식 ("selenium" 또는 "cdp", cdp는 포트별로 이벤트 루프 하나를 공유)
+            imagefx_url: 이동할 ImageFX 페이지 주소 (기본값: IMAGEFX_URL)
+            metrics: 모든 워커가 공유할 RunMetrics (기본값: 메모리 집계만)
+            perceptual_hash: True면 모든 워커가 공유하는 색인으로 유사 이미지 표시
+            postprocessor: 모든 워커가 공유할 PostProcessor (기본값: None - 후처리 안 함)
+            archive: 모든 워커가 공유할 ShardWriter (기본값: None - 프롬프트별 폴더에 저장)
+            prune_images, heap_limit_mb, recycle_every: 워커(탭)별 메모리 관리 설정 (ImageFXDownloader 참고)
+            login_poll: 워커별 로그인 확인 간격(초) (ImageFXDownloader 참고, 기본값: 0 - 확인 안 함)
+            deadlines: 모든 워커가 공유할 GenerationDeadlines (기본값: 이번 실행에서만 학습)
+            catalog: 모든 워커가 공유할 Catalog (기본값: None - 기록 안 함)
+        """
+        self.debug_ports = list(debug_ports)
+        self.tabs_per_browser = max(1, tabs_per_browser)
+        self.download_dir = download_dir
+        self.pacing = pacing
+        self.detection_mode = detection_mode
+        self.input_mode = input_mode
+        self.capture_mode = capture_mode
+        self.backend = backend
+        self.imagefx_url = imagefx_url
+        self.metrics = metrics or RunMetrics()
+        self.perceptual_hash = perceptual_hash
+        self.near_duplicates = NearDuplicateIndex() if perceptual_hash else None
+        self.postprocessor = postprocessor
+        self.archive = archive
+        self.prune_images = prune_images
+        self.heap_limit_mb = heap_limit_mb
+        self.recycle_every = recycle_every
+        self.login_poll = login_poll
+        self.deadlines = deadlines or GenerationDeadlines()
+        self.catalog = catalog
+        self.workers = []
+        self.stats = {}
+
+    def start(self):
+        """워커별로 브라우저에 연결하고 ImageFX 페이지로 이동. 준비된 워커 수 반환"""
+        for port in self.debug_ports:
+            for tab in range(self.tabs_per_browser):
+                name = f"port-{port}" if self.tabs_per_browser == 1 else f"port-{port}/tab-{tab + 1}"
+                worker = ImageFXDownloader(
+                    debug_port=port,
+                    download_dir=self.download_dir,
+                    worker_name=name,
+                    new_tab=tab > 0,
+                    detection_mode=self.detection_mode,
+                    input_mode=self.input_mode,
+                    capture_mode=self.capture_mode,
+                    backend=self.backend,
+                    imagefx_url=self.imagefx_url,
+                    metrics=self.metrics,
+                    perceptual_hash=self.perceptual_hash,
+                    near_duplicates=self.near_duplicates,
+                    postprocessor=self.postprocessor,
+                    archive=self.archive,
+                    prune_images=self.prune_images,
+                    heap_limit_mb=self.heap_limit_mb,
+                    recycle_every=self.recycle_every,
+                    login_poll=self.login_poll,
+                    deadlines=self.deadlines,
+                    catalog=self.catalog,
+                )
+                if not worker.connect_to_browser():
+                    logger.warning(f"⚠️ [{name}] 연결 실패 - 이 워커는 제외됩니다.")
+                    continue
+                if not worker.navigate_to_imagefx():
+                    logger.warning(f"⚠️ [{name}] ImageFX 이동 실패 - 이 워커는 제외됩니다.")
+                    worker.close()
+                    continue
+                self.workers.append(worker)
+                self.stats[name] = {"processed": 0, "success": 0}
+
+        logger.info(f"\n✅ 준비된 워커: {len(self.workers)}개")
+        return len(self.workers)
+
+    def _worker_loop(self, worker, scheduler, total, journal):
+        """스케줄러에 작업이 남아 있는 동안 꺼내 처리"""
+        stats = self.stats[worker.worker_name]
+        pacer = create_pacing(self.pacing)
+        while True:
+            job = scheduler.next_job()
+            if job is None:
+                return
+
+            # 간격 정책에 따라 시작 시점 조절
+            pacer.wait()
+
+            logger.info(f"\n[{worker.worker_name}] [{describe_job(job, total)}] 프롬프트: {job.prompt}")
+            if worker.run_job(job, scheduler, journal):
+                stats["success"] += 1
+            stats["processed"] += 1
+            pacer.record(worker.last_outcome in (SUCCESS, PARTIAL))
+
+    def run(self, scheduler, journal=None, total=None):
+        """
+        모든 작업을 워커들이 나누어 처리하고 전체 성공 개수 반환
+
+        Args:
+            scheduler: 작업을 내주는 RetryScheduler (워커가 꺼내는 만큼만 소스를 읽음)
+            journal: 상태를 기록할 JobJournal (기본값: None)
+            total: 진행 표시에 쓸 전체 작업 수 (모르면 None)
+        """
+        start_time = time.time()
+        threads = []
+        for worker in self.workers:
+            threads.append(threading.Thread(
+                target=self._worker_loop,
+                args=(worker, scheduler, total, journal),
+                name=worker.worker_name,
+                daemon=True,
+            ))
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.print_summary(time.time() - start_time)
+        return sum(stats["success"] for stats in self.stats.values())
+
+    def print_summary(self, elapsed):
+        """워커별/전체 처리 결과 출력"""
+        logger.info(f"\n{'='*60}")
+        logger.info("📊 워커별 처리 결과")
+        logger.info(f"{'='*60}")
+        for name, stats in self.stats.items():
+            logger.info(f"   {name}: 성공 {stats['success']}/{stats['processed']}")
+
+        total_processed = sum(stats["processed"] for stats in self.stats.values())
+        total_success = sum(stats["success"] for stats in self.stats.values())
+        per_minute = total_processed / (elapsed / 60) if elapsed > 0 else 0
+        logger.info(f"   전체: 성공 {total_success}/{total_processed} "
+                    f"({elapsed:.0f}초, 분당 {per_minute:.1f}개)")
+
+        for worker in self.workers:
+            worker.print_selector_stats()
+
+    def close(self):
+        """모든 워커 연결 종료"""
+        for worker in self.workers:
+            worker.close()
+
+
+def parse_args():
+    """명령행 인자 파싱"""
+    parser = argparse.ArgumentParser(description="ImageFX Selenium Automation Tool")
+    parser.add_argument("--ports", type=int, nargs="+", default=[9222],
+                        help="Chrome 디버그 포트 목록 (여러 개 지정 시 워커 풀 모드, 기본값: 9222)")
+    parser.add_argument("--tabs", type=int, default=1,
+                        help="브라우저당 워커 탭 수 (기본값: 1)")
+    parser.add_argument("--download-dir", default="downloads",
+                        help="다운로드 폴더 경로 (기본값: downloads)")
+    parser.add_argument("--prompts-file", default="prompts.txt",
+                        help="프롬프트 소스: 텍스트(한 줄에 하나), .jsonl, 템플릿 .json (.gz 가능, -는 표준 입력) "
+                             "(기본값: prompts.txt)")
+    parser.add_argument("--shard",
+                        help="i/N: 프롬프트 소스를 N개로 나눈 것 중 i번째(0부터)만 처리 (여러 컴퓨터에서 나누어 실행)")
+    parser.add_argument("--detection", choices=["event", "polling"], default="event",
+                        help="이미지 생성 완료 감지 방식 (기본값: event)")
+    parser.add_argument("--input-mode", choices=["insert", "keys"], default="insert",
+                        help="프롬프트 입력 방식: insert (한 번에 삽입) 또는 keys (키 입력) (기본값: insert)")
+    parser.add_argument("--capture", choices=["dom", "network"], default="dom",
+                        help="이미지 수집 방식: dom (렌더링된 이미지) 또는 network (생성 API 응답, 실패 시 dom) "
+                             "(기본값: dom)")
+    parser.add_argument("--backend", choices=["selenium", "cdp"], default="selenium",
+                        help="브라우저 제어 방식: selenium (chromedriver) 또는 cdp (DevTools 웹소켓 직접 연결, "
+                             "websockets 패키지 필요) (기본값: selenium)")
+    parser.add_argument("--url", default=IMAGEFX_URL,
+                        help="ImageFX 페이지 주소 (로컬 모의 서버로 시험할 때 사용, 기본값: ImageFX)")
+    parser.add_argument("--perceptual-hash", action="store_true",
+                        help="이미지별 지각 해시를 계산하여 이전 프롬프트와 거의 같은 이미지를 메타데이터에 표시")
+    parser.add_argument("--postprocess",
+                        help="저장 후 프로세스 풀에서 수행할 후처리 (쉼표로 구분: webp, avif, thumbnail), Pillow 필요")
+    parser.add_argument("--thumbnail-size", type=int, default=256,
+                        help="썸네일 긴 변 픽셀 수 (기본값: 256)")
+    parser.add_argument("--postprocess-workers", type=int, default=2,
+                        help="후처리 프로세스 수 (기본값: 2)")
+    parser.add_argument("--archive-dir",
+                        help="프롬프트별 폴더 대신 이 폴더의 tar 샤드(WebDataset 형식)와 오프셋 색인에 저장")
+    parser.add_argument("--archive-shard-mb", type=int, default=1024,
+                        help="아카이브 샤드 크기 상한(MB) (기본값: 1024)")
+    parser.add_argument("--pacing", default="fixed:10",
+                        help="프롬프트 간격 정책: fixed:<초>, token:<분당 개수>,<버스트>, adaptive:<최소초>,<최대초> "
+                             "(기본값: fixed:10)")
+    parser.add_argument("--pipeline-depth", type=int, default=0,
+                        help="단일 탭 파이프라인 모드: 이미지를 받은 직후 다음 프롬프트를 미리 입력하고, "
+                             "저장이 끝나지 않은 이전 프롬프트를 최대 N개까지 두고 진행 (기본값: 0, 사용 안 함)")
+    parser.add_argument("--no-prune", action="store_true",
+                        help="받은 이미지를 페이지에서 비우지 않음 (기본값: 프롬프트마다 비워 탭 메모리 해제)")
+    parser.add_argument("--heap-limit-mb", type=int, default=1024,
+                        help="탭의 JS 힙 사용량이 이 값(MB)을 넘으면 페이지 재로드 (기본값: 1024, 0이면 사용 안 함)")
+    parser.add_argument("--recycle-every", type=int, default=500,
+                        help="이 수만큼 프롬프트를 처리할 때마다 페이지 재로드 (기본값: 500, 0이면 사용 안 함)")
+    parser.add_argument("--generation-timeout", type=float, default=120,
+                        help="이미지 생성 대기 기한(초): 관측한 지연이 쌓이기 전이나 --fixed-timeout일 때 사용 (기본값: 120)")
+    parser.add_argument("--fixed-timeout", action="store_true",
+                        help="관측한 생성 지연으로 대기 기한을 조정하지 않고 항상 --generation-timeout만큼 대기")
+    parser.add_argument("--latency-model",
+                        help="생성 지연 히스토그램을 실행 간 유지할 파일 (기본값: 다운로드 폴더/latency_model.json)")
+    parser.add_argument("--catalog",
+                        help="생성 결과를 기록할 SQLite 카탈로그 (기본값: 다운로드 폴더/catalog.sqlite3)")
+    parser.add_argument("--no-catalog", action="store_true",
+                        help="생성 결과를 카탈로그에 기록하지 않음")
+    parser.add_argument("--skip-cataloged", action="store_true",
+                        help="카탈로그에 생성 결과가 이미 있는 프롬프트(대소문자/공백 무시)는 생성하지 않고 건너뜀")
+    parser.add_argument("--max-retries", type=int, default=2,
+                        help="사용량 제한/UI 멈춤으로 실패한 프롬프트의 최대 재시도 횟수 (기본값: 2)")
+    parser.add_argument("--retry-backoff", type=float, default=30,
+                        help="첫 재시도 대기(초), 재시도마다 2배에 지터 적용 (기본값: 30)")
+    parser.add_argument("--breaker-threshold", type=int, default=3,
+                        help="모든 작업을 멈추는 연속 실패 수 (기본값: 3, 0이면 사용 안 함)")
+    parser.add_argument("--breaker-cooldown", type=float, default=300,
+                        help="서킷 브레이커가 열렸을 때 멈추는 시간(초) (기본값: 300)")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="작업 저널에서 실패한 프롬프트만 다시 처리")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="작업 저널을 무시하고 모든 프롬프트를 처음부터 처리")
+    parser.add_argument("--serve", type=int, metavar="PORT",
+                        help="서비스 모드: 브라우저 연결을 유지한 채 이 포트의 로컬 HTTP 엔드포인트로 작업을 받아 처리")
+    parser.add_argument("--serve-host", default="127.0.0.1",
+                        help="서비스 엔드포인트 주소 (기본값: 127.0.0.1)")
+    parser.add_argument("--spool-dir",
+                        help="서비스 모드: 이 디렉토리에 넣은 프롬프트 파일을 접수하여 처리 (--serve 없이도 사용 가능)")
+    parser.add_argument("--login-poll", type=float, default=10,
+                        help="서비스 모드나 표준 입력(--prompts-file -) 사용 시 로그아웃 상태일 때 로그인을 다시 확인하는 간격(초) "
+                             "(기본값: 10)")
+    parser.add_argument("--log-level", choices=["DEBUG", "INFO", "WARNING", "ERROR"], default="INFO",
+                        help="콘솔 로그 레벨 (기본값: INFO)")
+    parser.add_argument("--quiet", action="store_true",
+                        help="경고와 오류만 출력 (--log-level WARNING과 같음)")
+    parser.add_argument("--log-file",
+                        help="DEBUG 레벨까지 모든 로그를 시간과 함께 기록할 파일")
+    parser.add_argument("--metrics-dir",
+                        help="단계별 지표(run_events.jsonl, run_metrics.prom) 저장 폴더 (기본값: 다운로드 폴더)")
+    parser.add_argument("--no-metrics", action="store_true",
+                        help="단계별 지표 파일을 기록하지 않음")
+    return parser.parse_args()
+
+
+def load_prompts(prompts_file):
+    """
+    프롬프트 소스를 열거나, 파일이 없으면 대화형으로 입력받음
+
+    Returns:
+        ((프롬프트, 변수) 이터레이터, 미리 알 수 있는 프롬프트 수 또는 None)
+    """
+    if prompts_file == "-" or os.path.exists(prompts_file):
+        logger.info(f"\n📄 프롬프트 소스 읽기: {prompts_file}")
+        total = count_prompts(prompts_file)
+        if total is not None:
+            logger.info(f"✅ 템플릿 조합 {total}개")
+        return open_prompt_source(prompts_file), total
+
+    logger.warning(f"\n⚠️ 프롬프트 파일이 없습니다: {prompts_file}")
+    print("💡 대화형 모드로 프롬프트를 입력하세요 (종료하려면 빈 줄 입력)")
+    prompts = []
+    while True:
+        prompt = input("\n프롬프트 입력: ").strip()
+        if not prompt:
+            break
+        prompts.append((prompt, {}))
+    return iter(prompts), len(prompts)
+
+
+def select_jobs(source, journal, shard=None, retry_failed=False, resume=True, counts=None, catalog=None):
+    """
+    프롬프트 소스에서 이번 실행에 처리할 작업을 하나씩 선택
+
+    작업 ID는 소스 전체 기준으로 부여한 뒤 분할과 저널 상태로 거르므로, 모든 컴퓨터가 같은 소스를 읽어도
+    서로 겹치지 않는 작업을 처리합니다. 템플릿/JSONL 변수는 pending 기록에 함께 남깁니다.
+
+    Args:
+        shard: (i, N) 분할 지정 (기본값: None, 전체)
+        counts: 선택/건너뜀 수를 누적할 dict ("selected", "shard", "journal", "catalog")
+        catalog: 지정하면 이 Catalog에 생성 결과가 이미 있는 프롬프트(대소문자/공백 무시)는 생성 전에 건너뜀
+
+    Returns:
+        (job_id, prompt) 제너레이터
+    """
+    counts = counts if counts is not None else {}
+    for key in ("selected", "shard", "journal", "catalog"):
+        counts.setdefault(key, 0)
+
+    prompts, variables = itertools.tee(source)
+    # 분할 실행이면 이 분할의 프롬프트만 등장 순번을 세어 메모리를 분할 크기에 비례하게 유지
+    track = (lambda digest: shard_of(digest, shard[1]) == shard[0]) if shard else None
+    job_ids = JobJournal.assign_job_ids((prompt for prompt, _ in prompts), track=track)
+    try:
+        for (job_id, prompt), (_, prompt_variables) in zip(job_ids, variables):
+            if shard and shard_of(job_id, shard[1]) != shard[0]:
+                counts["shard"] += 1
+                continue
+            if resume and not journal.should_run(job_id, retry_failed=retry_failed):
+                counts["journal"] += 1
+                continue
+            if catalog is not None and catalog.has_prompt(prompt):
+                counts["catalog"] += 1
+                continue
+            if journal.state(job_id) is None:
+                fields = {"variables": prompt_variables} if prompt_variables else {}
+                journal.record(job_id, prompt, JobJournal.PENDING, **fields)
+            counts["selected"] += 1
+            yield job_id, prompt
+    except (OSError, ValueError) as e:
+        logger.error(f"❌ 프롬프트 소스 오류 - 이후 프롬프트는 처리하지 않습니다: {e}")
+
+
+def format_progress(idx, total):
+    """진행 표시 ("3/10", 전체 수를 모르면 "3")"""
+    return f"{idx}/{total}" if total is not None else str(idx)
+
+
+def describe_job(job, total):
+    """스케줄러 작업의 진행 표시 (재시도면 시도 횟수 포함)"""
+    progress = format_progress(job.idx, total)
+    return progress if job.attempt == 1 else f"{progress}, {job.attempt}번째 시도"
+
+
+def print_connection_help(debug_port):
+    """디버그 모드 Chrome 실행 안내 출력"""
+    logger.error("\n❌ Chrome 브라우저에 연결할 수 없습니다.")
+    logger.error("💡 다음 단계를 따르세요:")
+    logger.error("   1. 모든 Chrome 창을 닫으세요")
+    logger.error(f"   2. 디버그 모드로 Chrome을 실행하세요:")
+    logger.error(f"      - Windows: chrome.exe --remote-debugging-port={debug_port} --user-data-dir=remote-profile")
+    logger.error(f"      - Mac: /Applications/Google\\ Chrome.app/Contents/MacOS/Google\\ Chrome --remote-debugging-port={debug_port} --user-data-dir=remote-profile")
+    logger.error(f"      - Linux: google-chrome --remote-debugging-port={debug_port} --user-data-dir=remote-profile")
+    logger.error("   3. 스크립트를 다시 실행하세요")
+
+
+def run_service(args, runner, metrics, metrics_dir, postprocessor=None, archive=None, deadlines=None,
+                catalog=None):
+    """
+    서비스 모드 실행: 브라우저 연결을 유지한 채 HTTP 엔드포인트/스풀 디렉토리로 들어오는 작업을 종료(Ctrl+C)까지 처리
+
+    로그인 확인에 input()을 쓰지 않고, 작업마다 로그인 상태를 확인하여 로그아웃되어 있으면 로그인될 때까지 대기합니다.
+
+    Args:
+        runner: 준비된 ImageFXWorkerPool 또는 ImageFXDownloader
+    """
+    pool_mode = isinstance(runner, ImageFXWorkerPool)
+    workers = runner.workers if pool_mode else [runner]
+    for worker in workers:
+        if not worker.check_login():
+            logger.warning(f"🔐 [{worker.worker_name}] 로그인되어 있지 않습니다. 로그인할 때까지 작업은 대기열에 쌓입니다.")
+
+    # 서비스 작업은 배치 실행의 저널과 섞이지 않도록 별도 저널에 기록
+    journal = JobJournal(os.path.join(args.download_dir, "service_journal.jsonl"))
+    queue = JobQueue()
+    scheduler = RetryScheduler(queue, max_retries=args.max_retries, base_delay=args.retry_backoff,
+                               breaker_threshold=args.breaker_threshold, breaker_cooldown=args.breaker_cooldown,
+                               metrics=metrics)
+    service = ImageFXService(journal, scheduler, queue, workers, host=args.serve_host, port=args.serve,
+                             spool_dir=args.spool_dir)
+    service.resume()
+
+    try:
+        service.start()
+    except OSError as e:
+        logger.error(f"\n❌ 서비스 엔드포인트를 열 수 없습니다: {e}")
+        service.stop()
+    else:
+        logger.info(f"\n{'='*60}")
+        logger.info("🛰️ 서비스 모드로 작업 대기 중 (종료: Ctrl+C)")
+        logger.info(f"{'='*60}")
+        try:
+            if pool_mode:
+                runner.run(scheduler, journal=journal)
+            else:
+                pacer = create_pacing(args.pacing)
+                logger.info(f"⏱️ 프롬프트 간격 정책: {pacer.describe()}")
+                runner.run_serial(scheduler, journal=journal, pacer=pacer)
+        except KeyboardInterrupt:
+            logger.info("\n🛑 서비스 종료 중...")
+        finally:
+            service.stop()
+
+    # 연결 종료 (남은 저장/후처리 작업이 끝나야 저널에 downloaded가 기록됨)
+    runner.close()
+    if postprocessor:
+        postprocessor.close()
+    if archive:
+        archive.close()
+    if catalog:
+        catalog.close()
+
+    counts = journal.summary()
+    journal.close()
+    metrics.close()
+    if deadlines:
+        deadlines.save()
+    if not args.no_metrics:
+        metrics.write_prometheus(os.path.join(metrics_dir, "run_metrics.prom"),
+                                 extra=deadlines.render_prometheus() if deadlines else None)
+    scheduler.print_summary()
+    if deadlines:
+        deadlines.print_summary()
+    logger.info(f"서비스 저널: 완료 {counts[JobJournal.DOWNLOADED]}, 실패 {counts[JobJournal.FAILED]}, "
+                f"대기 {counts[JobJournal.PENDING] + counts[JobJournal.GENERATING]}")
+
+
 def main():
     """메인 실행 함수"""
+    # 설정
+    args = parse_args()
+    configure_logging("WARNING" if args.quiet else args.log_level, args.log_file)
+
     print("""
 ╔══════════════════════════════════════════════════════════════╗
 ║          ImageFX Selenium Automation Tool                    ║
@@ -487,91 +1904,211 @@ def main():
 ╚══════════════════════════════════════════════════════════════╝
     """)
 
-    # 설정
-    DEBUG_PORT = 9222
-    DOWNLOAD_DIR = "downloads"
-    PROMPTS_FILE = "prompts.txt"
-
-    # ImageFX 다운로더 초기화
-    downloader = ImageFXDownloader(debug_port=DEBUG_PORT, download_dir=DOWNLOAD_DIR)
-
-    # Chrome 브라우저 연결
-    if not downloader.connect_to_browser():
-        print("\n❌ Chrome 브라우저에 연결할 수 없습니다.")
-        print("💡 다음 단계를 따르세요:")
-        print("   1. 모든 Chrome 창을 닫으세요")
-        print(f"   2. 디버그 모드로 Chrome을 실행하세요:")
-        print(f"      - Windows: chrome.exe --remote-debugging-port={DEBUG_PORT} --user-data-dir=remote-profile")
-        print(f"      - Mac: /Applications/Google\\ Chrome.app/Contents/MacOS/Google\\ Chrome --remote-debugging-port={DEBUG_PORT} --user-data-dir=remote-profile")
-        print(f"      - Linux: google-chrome --remote-debugging-port={DEBUG_PORT} --user-data-dir=remote-profile")
-        print("   3. 스크립트를 다시 실행하세요")
+    DEBUG_PORTS = args.ports
+    DOWNLOAD_DIR = args.download_dir
+    PROMPTS_FILE = args.prompts_file
+    pool_mode = len(DEBUG_PORTS) > 1 or args.tabs > 1
+    service_mode = args.serve is not None or bool(args.spool_dir)
+    # 표준 입력으로 프롬프트를 받으면 input()으로 로그인을 확인할 수 없으므로 서비스 모드처럼 페이지 상태로 확인
+    stdin_source = PROMPTS_FILE == "-"
+    login_poll = args.login_poll if service_mode or stdin_source else 0
+
+    # 단계별 지표: 구간마다 JSONL 이벤트, 종료 시 Prometheus 텍스트 요약
+    metrics_dir = args.metrics_dir or DOWNLOAD_DIR
+    if args.no_metrics:
+        metrics = RunMetrics()
+    else:
+        os.makedirs(metrics_dir, exist_ok=True)
+        metrics = RunMetrics(os.path.join(metrics_dir, "run_events.jsonl"))
+
+    # 후처리: 저장된 이미지를 프로세스 풀에서 WebP/AVIF 사본, 썸네일로 변환
+    postprocessor = None
+    if args.postprocess:
+        steps = [step.strip() for step in args.postprocess.split(",") if step.strip()]
+        postprocessor = PostProcessor(
+            formats=[step for step in steps if step != "thumbnail"],
+            thumbnail_size=args.thumbnail_size if "thumbnail" in steps else 0,
+            max_workers=args.postprocess_workers,
+            metrics=metrics,
+        )
+
+    # 샤드 아카이브: 이미지와 이미지별 메타데이터를 크기 상한이 있는 tar 샤드에 이어 붙임
+    archive = None
+    if args.archive_dir:
+        if postprocessor:
+            logger.warning("⚠️ 아카이브 저장 시에는 후처리를 사용할 수 없어 --postprocess를 무시합니다.")
+            postprocessor.close()
+            postprocessor = None
+        archive = ShardWriter(args.archive_dir, max_shard_bytes=args.archive_shard_mb * 1024 * 1024)
+
+    # 생성 대기 기한: 관측한 지연 분포(p99 + 여유)로 기한과 조기 포기 기준을 정하고 실행 간 유지
+    deadlines = GenerationDeadlines(args.latency_model or os.path.join(DOWNLOAD_DIR, "latency_model.json"),
+                                    default_timeout=args.generation_timeout, adaptive=not args.fixed_timeout)
+    logger.info(f"⏳ 생성 대기 기한: {deadlines.describe()}")
+
+    # 생성 결과 카탈로그: 저장이 끝난 프롬프트/이미지를 SQLite에 기록 (검색: python imagefx_catalog.py search ...)
+    catalog = None
+    if not args.no_catalog:
+        catalog = Catalog(args.catalog or os.path.join(DOWNLOAD_DIR, "catalog.sqlite3"))
+        logger.info(f"🗂️ 카탈로그: {os.path.abspath(catalog.path)}")
+    elif args.skip_cataloged:
+        logger.warning("⚠️ --no-catalog와 함께 쓰면 --skip-cataloged는 무시됩니다.")
+
+    memory_policy = PageMemoryPolicy(not args.no_prune, args.heap_limit_mb, args.recycle_every)
+    if memory_policy.enabled:
+        logger.info(f"🧠 탭 메모리 관리: {memory_policy.describe()}")
+
+    if pool_mode:
+        # 워커 풀 초기화 (포트/탭마다 워커 1개)
+        pool = ImageFXWorkerPool(debug_ports=DEBUG_PORTS, tabs_per_browser=args.tabs, download_dir=DOWNLOAD_DIR,
+                                 pacing=args.pacing, detection_mode=args.detection, input_mode=args.input_mode,
+                                 capture_mode=args.capture, backend=args.backend, imagefx_url=args.url,
+                                 metrics=metrics, perceptual_hash=args.perceptual_hash,
+                                 postprocessor=postprocessor, archive=archive, prune_images=not args.no_prune,
+                                 heap_limit_mb=args.heap_limit_mb, recycle_every=args.recycle_every,
+                                 login_poll=login_poll, deadlines=deadlines, catalog=catalog)
+        if not pool.start():
+            print_connection_help(DEBUG_PORTS[0])
+            return
+    else:
+        # ImageFX 다운로더 초기화
+        downloader = ImageFXDownloader(debug_port=DEBUG_PORTS[0], download_dir=DOWNLOAD_DIR,
+                                       detection_mode=args.detection, input_mode=args.input_mode,
+                                       capture_mode=args.capture, backend=args.backend,
+                                       imagefx_url=args.url, metrics=metrics,
+                                       perceptual_hash=args.perceptual_hash, postprocessor=postprocessor,
+                                       archive=archive, prune_images=not args.no_prune,
+                                       heap_limit_mb=args.heap_limit_mb, recycle_every=args.recycle_every,
+                                       login_poll=login_poll, deadlines=deadlines, catalog=catalog)
+
+        # Chrome 브라우저 연결
+        if not downloader.connect_to_browser():
+            print_connection_help(DEBUG_PORTS[0])
+            return
+
+        # ImageFX 페이지로 이동
+        if not downloader.navigate_to_imagefx():
+            logger.error("\n❌ ImageFX 페이지로 이동할 수 없습니다.")
+            downloader.close()
+            return
+
+    if service_mode:
+        run_service(args, pool if pool_mode else downloader, metrics, metrics_dir, postprocessor, archive, deadlines,
+                    catalog)
         return
 
-    # ImageFX 페이지로 이동
-    if not downloader.navigate_to_imagefx():
-        print("\n❌ ImageFX 페이지로 이동할 수 없습니다.")
-        downloader.close()
+    if stdin_source:
+        logger.info("\n💡 표준 입력에서 프롬프트를 읽습니다. 로그아웃 상태면 브라우저에서 로그인할 때까지 대기합니다.")
+    else:
+        print("\n💡 Google 계정 로그인이 필요한 경우 브라우저에서 로그인하세요.")
+        print("   로그인 후 Enter를 눌러 계속하세요...")
+        input()
+
+    # 프롬프트 소스 열기 (큰 파일과 템플릿도 처리하는 만큼만 읽음)
+    try:
+        shard = parse_shard(args.shard) if args.shard else None
+        source, total = load_prompts(PROMPTS_FILE)
+    except (OSError, ValueError) as e:
+        logger.error(f"\n❌ 프롬프트 소스를 열 수 없습니다: {e}")
+        (pool if pool_mode else downloader).close()
+        if postprocessor:
+            postprocessor.close()
+        if archive:
+            archive.close()
+        if catalog:
+            catalog.close()
+        return
+    if shard:
+        logger.info(f"🧩 분할 {shard[0]}/{shard[1]}만 처리")
+
+    # 작업 저널로 이미 처리한 프롬프트 건너뛰기
+    journal = JobJournal(os.path.join(DOWNLOAD_DIR, "journal.jsonl"))
+    job_counts = {}
+    jobs = select_jobs(source, journal, shard=shard, retry_failed=args.retry_failed,
+                       resume=not args.no_resume, counts=job_counts,
+                       catalog=catalog if args.skip_cataloged else None)
+    if shard or (journal.jobs and not args.no_resume) or (catalog and args.skip_cataloged):
+        total = None  # 분할이나 저널로 건너뛸 작업 수는 소스를 끝까지 읽어야 알 수 있음
+
+    first_job = next(jobs, None)
+    if first_job is None:
+        logger.warning("\n⚠️ 처리할 프롬프트가 없습니다.")
+        (pool if pool_mode else downloader).close()
+        if postprocessor:
+            postprocessor.close()
+        if archive:
+            archive.close()
+        if catalog:
+            catalog.close()
+        journal.close()
         return
 
-    print("\n💡 Google 계정 로그인이 필요한 경우 브라우저에서 로그인하세요.")
-    print("   로그인 후 Enter를 눌러 계속하세요...")
-    input()
+    jobs = itertools.chain([first_job], jobs)
 
-    # 프롬프트 읽기
-    prompts = []
-    if os.path.exists(PROMPTS_FILE):
-        print(f"\n📄 프롬프트 파일 읽기: {PROMPTS_FILE}")
-        with open(PROMPTS_FILE, 'r', encoding='utf-8') as f:
-            prompts = [line.strip() for line in f if line.strip() and not line.startswith('#')]
-        print(f"✅ {len(prompts)}개 프롬프트 로드됨")
-    else:
-        print(f"\n⚠️ 프롬프트 파일이 없습니다: {PROMPTS_FILE}")
-        print("💡 대화형 모드로 프롬프트를 입력하세요 (종료하려면 빈 줄 입력)")
-        while True:
-            prompt = input("\n프롬프트 입력: ").strip()
-            if not prompt:
-                break
-            prompts.append(prompt)
-
-    if not prompts:
-        print("\n⚠️ 처리할 프롬프트가 없습니다.")
-        downloader.close()
-        return
+    # 재시도 스케줄러: 결과 분류에 따라 백오프 후 재시도, 연속 실패 시 서킷 브레이커로 전체 중지
+    scheduler = RetryScheduler(jobs, max_retries=args.max_retries, base_delay=args.retry_backoff,
+                               breaker_threshold=args.breaker_threshold, breaker_cooldown=args.breaker_cooldown,
+                               metrics=metrics)
 
     # 각 프롬프트 처리
-    print(f"\n{'='*60}")
-    print(f"🚀 총 {len(prompts)}개 프롬프트 처리 시작")
-    print(f"{'='*60}")
+    logger.info(f"\n{'='*60}")
+    logger.info(f"🚀 {'총 ' + str(total) + '개 ' if total is not None else ''}프롬프트 처리 시작")
+    logger.info(f"{'='*60}")
 
-    success_count = 0
-    for idx, prompt in enumerate(prompts, 1):
-        print(f"\n[{idx}/{len(prompts)}] 프롬프트: {prompt}")
+    if pool_mode:
+        success_count = pool.run(scheduler, journal=journal, total=total)
+    else:
+        pacer = create_pacing(args.pacing)
+        logger.info(f"⏱️ 프롬프트 간격 정책: {pacer.describe()}")
+        if args.pipeline_depth > 0:
+            logger.info(f"🔀 파이프라인 모드: 깊이 {args.pipeline_depth}")
+            success_count = downloader.run_pipeline(scheduler, journal=journal, pacer=pacer,
+                                                    depth=args.pipeline_depth, total=total)
+        else:
+            success_count = downloader.run_serial(scheduler, journal=journal, pacer=pacer, total=total)
 
-        if downloader.process_prompt(prompt):
-            success_count += 1
+        downloader.print_selector_stats()
 
-        # 마지막 프롬프트가 아니면 대기
-        if idx < len(prompts):
-            print("\n⏸️ 다음 프롬프트를 처리하기 전에 10초 대기...")
-            time.sleep(10)
+    # 연결 종료 (남은 저장/후처리 작업이 끝나야 저널에 downloaded가 기록됨)
+    (pool if pool_mode else downloader).close()
+    if postprocessor:
+        postprocessor.close()
+    if archive:
+        archive.close()
+    if catalog:
+        catalog.close()
 
     # 완료 메시지
-    print(f"\n{'='*60}")
-    print(f"✨ 모든 작업 완료!")
-    print(f"{'='*60}")
-    print(f"성공: {success_count}/{len(prompts)}")
-    print(f"다운로드 위치: {os.path.abspath(DOWNLOAD_DIR)}")
-
-    # 연결 종료
-    downloader.close()
+    counts = journal.summary()
+    journal.close()
+    metrics.close()
+    deadlines.save()
+    if not args.no_metrics:
+        metrics.write_prometheus(os.path.join(metrics_dir, "run_metrics.prom"), extra=deadlines.render_prometheus())
+    logger.info(f"\n{'='*60}")
+    logger.info(f"✨ 모든 작업 완료!")
+    logger.info(f"{'='*60}")
+    logger.info(f"성공: {success_count}/{job_counts['selected']}")
+    scheduler.print_summary()
+    deadlines.print_summary()
+    if job_counts["journal"]:
+        reason = "실패 작업만 재시도" if args.retry_failed else "이전 실행에서 처리됨"
+        logger.info(f"작업 저널: {job_counts['journal']}개 프롬프트 건너뜀 ({reason})")
+    if job_counts["catalog"]:
+        logger.info(f"카탈로그: 이미 생성한 {job_counts['catalog']}개 프롬프트 건너뜀")
+    if shard:
+        logger.info(f"분할 {shard[0]}/{shard[1]}: 다른 분할의 {job_counts['shard']}개 프롬프트 제외")
+    logger.info(f"저널: 완료 {counts[JobJournal.DOWNLOADED]}, 실패 {counts[JobJournal.FAILED]}, "
+                f"대기 {counts[JobJournal.PENDING] + counts[JobJournal.GENERATING]}")
+    logger.info(f"다운로드 위치: {os.path.abspath(DOWNLOAD_DIR)}")
+    if not args.no_metrics:
+        logger.info(f"지표: {os.path.abspath(metrics_dir)} (run_events.jsonl, run_metrics.prom)")
 
 
 if __name__ == "__main__":
     try:
         main()
     except KeyboardInterrupt:
-        print("\n\n❌ 사용자가 프로그램을 중단했습니다.")
+        logger.error("\n\n❌ 사용자가 프로그램을 중단했습니다.")
     except Exception as e:
-        print(f"\n\n❌ 오류 발생: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"\n\n❌ 오류 발생: {e}")
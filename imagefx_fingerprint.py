@@ -0,0 +1,40 @@
+"""
+ImageFX 지각 해시(phash) 기반 유사 이미지 색인
+브라우저에서 계산한 64비트 dHash를 비교하여, 다른 프롬프트에서 이미 받은 것과 거의 같은 이미지를 찾아냅니다.
+"""
+
+import threading
+
+
+def hamming_distance(a, b):
+    """16진수 해시 두 개의 서로 다른 비트 수"""
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+
+class NearDuplicateIndex:
+    """저장한 이미지의 지각 해시 목록 (워커 풀에서 공유 가능)"""
+
+    def __init__(self, threshold=6):
+        """
+        Args:
+            threshold: 이 비트 수 이하로 다르면 유사 이미지로 판단 (64비트 중, 기본값: 6)
+        """
+        self.threshold = threshold
+        self._entries = []  # (phash, 파일 경로)
+        self._lock = threading.Lock()
+
+    def check_and_add(self, phash, filepath):
+        """
+        가장 가까운 기존 이미지를 찾고 새 이미지를 색인에 추가
+
+        Returns:
+            (유사한 기존 파일 경로, 거리), 없으면 (None, None)
+        """
+        with self._lock:
+            best_path, best_distance = None, None
+            for existing, path in self._entries:
+                distance = hamming_distance(phash, existing)
+                if distance <= self.threshold and (best_distance is None or distance < best_distance):
+                    best_path, best_distance = path, distance
+            self._entries.append((phash, filepath))
+        return best_path, best_distance
@@ -0,0 +1,139 @@
+"""
+ImageFX 작업 저널
+프롬프트별 처리 상태를 download_dir 옆의 JSONL 파일에 추가 기록하여, 중단 후 재실행 시 이어서 처리합니다.
+"""
+
+import os
+import json
+import hashlib
+import threading
+from datetime import datetime
+
+
+class JobJournal:
+    """프롬프트별 처리 상태(pending/generating/downloaded/failed)를 추가 기록 방식으로 저장하는 작업 저널"""
+
+    PENDING = "pending"
+    GENERATING = "generating"
+    DOWNLOADED = "downloaded"
+    FAILED = "failed"
+
+    def __init__(self, path):
+        """
+        저널 파일을 읽어 마지막 상태를 복원하고 추가 기록용으로 엽니다.
+
+        Args:
+            path: 저널 파일 경로 (예: downloads/journal.jsonl)
+        """
+        self.path = path
+        self.jobs = {}  # job_id -> 마지막 기록
+        self._lock = threading.Lock()
+        self._load()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+        if self._file.tell() > 0 and not self._ends_with_newline():
+            # 마지막 기록이 중간에 잘린 경우 다음 기록이 같은 줄에 붙지 않도록 줄바꿈 추가
+            self._file.write("\n")
+
+    def _load(self):
+        """기존 저널을 읽어 작업별 마지막 상태 복원 (비정상 종료로 잘린 줄은 무시)"""
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                self.jobs[record["job_id"]] = record
+
+    def _ends_with_newline(self):
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    @staticmethod
+    def assign_job_ids(prompts, track=None):
+        """
+        프롬프트마다 안정적인 작업 ID 부여 (프롬프트 해시 + 같은 프롬프트의 등장 순번)
+
+        등장 순번을 세기 위해 서로 다른 프롬프트마다 8바이트 키 하나를 기억하므로, 메모리는 소스 전체 줄 수가 아니라
+        순번을 세는 서로 다른 프롬프트 수에 비례합니다. 분할 실행에서는 track으로 이 분할의 프롬프트만 세면
+        다른 분할의 프롬프트는 기억하지 않습니다.
+
+        Args:
+            track: 프롬프트 해시(16자리)를 받아 등장 순번을 셀지 정하는 함수 (기본값: None - 모두 셈).
+                세지 않는 프롬프트는 반복이어도 순번 없는 해시를 ID로 받으므로 처리하지 말고 걸러야 합니다.
+
+        Returns:
+            (job_id, prompt) 제너레이터
+        """
+        occurrences = {}
+        for prompt in prompts:
+            digest = hashlib.sha1(prompt.encode('utf-8')).hexdigest()[:16]
+            if track is not None and not track(digest):
+                yield digest, prompt
+                continue
+            key = bytes.fromhex(digest)
+            count = occurrences[key] = occurrences.get(key, 0) + 1
+            yield (digest if count == 1 else f"{digest}-{count}"), prompt
+
+    def state(self, job_id):
+        """작업의 마지막 상태 (기록이 없으면 None)"""
+        record = self.jobs.get(job_id)
+        return record["state"] if record else None
+
+    def should_run(self, job_id, retry_failed=False):
+        """
+        이번 실행에서 처리할 작업인지 판단
+
+        - 기본: 새 작업, pending, 중단된 generating 작업만 처리 (downloaded/failed는 건너뜀)
+        - retry_failed: failed 작업만 다시 처리
+        """
+        state = self.state(job_id)
+        if retry_failed:
+            return state == self.FAILED
+        return state in (None, self.PENDING, self.GENERATING)
+
+    def record(self, job_id, prompt, state, **fields):
+        """작업 상태 기록 (generating 기록 시 시도 횟수 증가)"""
+        with self._lock:
+            previous = self.jobs.get(job_id, {})
+            attempts = previous.get("attempts", 0)
+            if state == self.GENERATING:
+                attempts += 1
+
+            record = {
+                "job_id": job_id,
+                "prompt": prompt,
+                "state": state,
+                "attempts": attempts,
+                "outputs": previous.get("outputs", []),
+                "updated_at": datetime.now().isoformat(timespec="seconds"),
+            }
+            if "variables" in previous:
+                record["variables"] = previous["variables"]  # 템플릿/JSONL 변수는 이후 기록에도 유지
+            record.update(fields)
+            self.jobs[job_id] = record
+
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            return record
+
+    def summary(self):
+        """상태별 작업 수"""
+        counts = {self.PENDING: 0, self.GENERATING: 0, self.DOWNLOADED: 0, self.FAILED: 0}
+        with self._lock:
+            for record in self.jobs.values():
+                counts[record["state"]] = counts.get(record["state"], 0) + 1
+        return counts
+
+    def close(self):
+        """저널 파일 닫기"""
+        with self._lock:
+            self._file.close()
@@ -0,0 +1,66 @@
+"""
+ImageFX 탭 메모리 관리
+생성할 때마다 수 MB짜리 data URL 이미지가 페이지에 쌓이므로, 프롬프트마다 이미 받은 이미지를 페이지에서 비우고
+DevTools Performance.getMetrics로 탭 메모리를 확인하여, 한도나 프롬프트 수에 이르면 페이지를 다시 불러옵니다.
+"""
+
+
+def parse_performance_metrics(result):
+    """
+    Performance.getMetrics 결과를 {이름: 값} dict로 변환
+
+    Returns:
+        예: {"JSHeapUsedSize": 52428800, "Nodes": 1200, ...}
+    """
+    return {metric["name"]: metric["value"] for metric in (result or {}).get("metrics", [])}
+
+
+class PageMemoryPolicy:
+    """탭 하나의 이미지 정리와 페이지 재로드 시점을 정하는 정책"""
+
+    def __init__(self, prune=True, heap_limit_mb=1024, recycle_every=500):
+        """
+        Args:
+            prune: True면 프롬프트마다 이미 받은 이미지를 페이지에서 비움 (기본값: True)
+            heap_limit_mb: JS 힙 사용량이 이 값(MB)을 넘으면 페이지 재로드 (0이면 사용 안 함, 기본값: 1024)
+            recycle_every: 이 수만큼 프롬프트를 처리할 때마다 페이지 재로드 (0이면 사용 안 함, 기본값: 500)
+        """
+        self.prune = prune
+        self.heap_limit_mb = heap_limit_mb
+        self.recycle_every = recycle_every
+        self.prompts_since_reload = 0
+        self.reloads = 0
+
+    @property
+    def enabled(self):
+        return self.prune or bool(self.heap_limit_mb) or bool(self.recycle_every)
+
+    def check(self, heap_bytes=None):
+        """
+        프롬프트 하나를 처리한 뒤 호출하여 페이지를 다시 불러와야 하는지 판단
+
+        Args:
+            heap_bytes: 현재 JS 힙 사용량 (알 수 없으면 None)
+
+        Returns:
+            재로드 사유 문자열, 필요 없으면 None
+        """
+        self.prompts_since_reload += 1
+        if self.heap_limit_mb and heap_bytes and heap_bytes > self.heap_limit_mb * 1024 * 1024:
+            return f"JS 힙 {heap_bytes / 1024 / 1024:.0f}MB > {self.heap_limit_mb}MB"
+        if self.recycle_every and self.prompts_since_reload >= self.recycle_every:
+            return f"프롬프트 {self.prompts_since_reload}개 처리"
+        return None
+
+    def reloaded(self):
+        """페이지를 다시 불러온 뒤 호출"""
+        self.prompts_since_reload = 0
+        self.reloads += 1
+
+    def describe(self):
+        parts = ["받은 이미지 정리" if self.prune else "이미지 정리 안 함"]
+        if self.heap_limit_mb:
+            parts.append(f"JS 힙 {self.heap_limit_mb}MB 초과 시 재로드")
+        if self.recycle_every:
+            parts.append(f"프롬프트 {self.recycle_every}개마다 재로드")
+        return ", ".join(parts)
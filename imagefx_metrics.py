@@ -0,0 +1,248 @@
+"""
+ImageFX 실행 지표와 로깅 설정
+프롬프트 처리 단계별 구간(span)의 소요 시간, 처리 바이트, WebDriver 호출 수, 결과를 기록하여
+JSONL 이벤트로 내보내고, 실행이 끝나면 Prometheus 텍스트 형식 요약 파일을 작성합니다.
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime
+
+
+# 단계별 소요 시간 히스토그램 구간(초)
+DURATION_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+# WebDriver 호출 수를 셀 드라이버 메서드
+DRIVER_METHODS = ("execute_script", "execute_async_script", "execute_cdp_cmd",
+                  "find_element", "find_elements", "get", "get_log")
+
+_current_span = contextvars.ContextVar("imagefx_current_span", default=None)
+_labels = contextvars.ContextVar("imagefx_labels", default={})
+
+
+def configure_logging(level="INFO", log_file=None):
+    """
+    콘솔(기존 출력과 같은 메시지 형식)과 선택적 로그 파일(시간/레벨 포함) 설정
+
+    Args:
+        level: 콘솔 로그 레벨 ("DEBUG", "INFO", "WARNING", "ERROR")
+        log_file: 지정하면 DEBUG 레벨까지 모두 파일에 기록
+    """
+    logger = logging.getLogger("imagefx")
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+
+    console = logging.StreamHandler(sys.stdout)
+    console.setLevel(level)
+    console.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(console)
+
+    if log_file:
+        file_handler = logging.FileHandler(log_file, encoding="utf-8")
+        file_handler.setLevel(logging.DEBUG)
+        file_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+        logger.addHandler(file_handler)
+    return logger
+
+
+class Span:
+    """단계 하나의 측정값 (with 블록 안에서 bytes, calls, outcome을 갱신)"""
+
+    __slots__ = ("stage", "labels", "started", "duration", "bytes", "calls", "outcome")
+
+    def __init__(self, stage, labels):
+        self.stage = stage
+        self.labels = labels
+        self.started = time.perf_counter()
+        self.duration = None
+        self.bytes = 0
+        self.calls = 0
+        self.outcome = "ok"
+
+
+class RunMetrics:
+    """단계별 구간을 집계하고 JSONL 이벤트/Prometheus 요약으로 내보내는 실행 지표"""
+
+    def __init__(self, events_path=None):
+        """
+        Args:
+            events_path: 구간 이벤트를 추가 기록할 JSONL 파일 (None이면 메모리 집계만)
+        """
+        self.events_path = events_path
+        self.stages = {}  # stage -> 집계
+        self._file = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, stage, **labels):
+        """
+        단계 구간 측정. 바깥 구간과 context()의 레이블(worker, job_id 등)을 이어받음
+
+            with metrics.span("wait", worker="port-9222") as span:
+                span.outcome = "timeout"
+        """
+        parent = _current_span.get()
+        merged = dict(_labels.get())
+        if parent is not None:
+            merged.update(parent.labels)
+        merged.update(labels)
+
+        span = Span(stage, merged)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException:
+            span.outcome = "error"
+            raise
+        finally:
+            _current_span.reset(token)
+            span.duration = time.perf_counter() - span.started
+            self._finish(span)
+
+    @contextmanager
+    def context(self, **labels):
+        """이 블록 안에서 만들어지는 모든 구간에 레이블 추가 (예: job_id)"""
+        token = _labels.set({**_labels.get(), **labels})
+        try:
+            yield
+        finally:
+            _labels.reset(token)
+
+    @staticmethod
+    def current_labels():
+        """현재 구간과 context()의 레이블 (다른 스레드/프로세스의 결과를 나중에 record()할 때 사용)"""
+        labels = dict(_labels.get())
+        span = _current_span.get()
+        if span is not None:
+            labels.update(span.labels)
+        return labels
+
+    def record(self, stage, duration, bytes=0, outcome="ok", **labels):
+        """with 블록 밖(예: 프로세스 풀)에서 측정한 구간 기록"""
+        span = Span(stage, labels)
+        span.duration = duration
+        span.bytes = bytes
+        span.outcome = outcome
+        self._finish(span)
+
+    @staticmethod
+    def add_bytes(count):
+        """현재 구간에 처리 바이트 추가 (구간 밖이면 무시)"""
+        span = _current_span.get()
+        if span is not None:
+            span.bytes += count
+
+    @staticmethod
+    def count_call(count=1):
+        """현재 구간에 브라우저 호출 수 추가 (구간 밖이면 무시)"""
+        span = _current_span.get()
+        if span is not None:
+            span.calls += count
+
+    def instrument_driver(self, driver):
+        """드라이버 메서드를 감싸 호출마다 현재 구간의 WebDriver 호출 수 증가"""
+        for name in DRIVER_METHODS:
+            method = getattr(driver, name, None)
+            if method is None:
+                continue
+
+            def counted(*args, _method=method, **kwargs):
+                self.count_call()
+                return _method(*args, **kwargs)
+            setattr(driver, name, counted)
+
+    def _finish(self, span):
+        event = {
+            "ts": datetime.now().isoformat(timespec="milliseconds"),
+            "event": "span",
+            "stage": span.stage,
+            **span.labels,
+            "duration": round(span.duration, 4),
+            "bytes": span.bytes,
+            "webdriver_calls": span.calls,
+            "outcome": span.outcome,
+        }
+        with self._lock:
+            stats = self.stages.get(span.stage)
+            if stats is None:
+                stats = self.stages[span.stage] = {
+                    "count": 0, "duration_sum": 0.0, "bytes": 0, "calls": 0,
+                    "buckets": [0] * len(DURATION_BUCKETS), "outcomes": {},
+                }
+            stats["count"] += 1
+            stats["duration_sum"] += span.duration
+            stats["bytes"] += span.bytes
+            stats["calls"] += span.calls
+            stats["outcomes"][span.outcome] = stats["outcomes"].get(span.outcome, 0) + 1
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if span.duration <= bound:
+                    stats["buckets"][index] += 1
+
+            if self.events_path:
+                if self._file is None:
+                    self._file = open(self.events_path, 'a', encoding='utf-8')
+                self._file.write(json.dumps(event, ensure_ascii=False) + "\n")
+                self._file.flush()
+
+    def render_prometheus(self):
+        """집계를 Prometheus 텍스트 노출 형식으로 반환"""
+        lines = [
+            "# HELP imagefx_stage_duration_seconds Time spent in each prompt processing stage.",
+            "# TYPE imagefx_stage_duration_seconds histogram",
+        ]
+        with self._lock:
+            stages = {stage: dict(stats, buckets=list(stats["buckets"]), outcomes=dict(stats["outcomes"]))
+                      for stage, stats in self.stages.items()}
+
+        for stage, stats in sorted(stages.items()):
+            for bound, count in zip(DURATION_BUCKETS, stats["buckets"]):
+                lines.append(f'imagefx_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+            lines.append(f'imagefx_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {stats["count"]}')
+            lines.append(f'imagefx_stage_duration_seconds_sum{{stage="{stage}"}} {stats["duration_sum"]:.6f}')
+            lines.append(f'imagefx_stage_duration_seconds_count{{stage="{stage}"}} {stats["count"]}')
+
+        lines += ["# HELP imagefx_stage_bytes_total Bytes transferred or decoded in each stage.",
+                  "# TYPE imagefx_stage_bytes_total counter"]
+        lines += [f'imagefx_stage_bytes_total{{stage="{stage}"}} {stats["bytes"]}'
+                  for stage, stats in sorted(stages.items())]
+
+        lines += ["# HELP imagefx_stage_webdriver_calls_total Browser round trips made in each stage.",
+                  "# TYPE imagefx_stage_webdriver_calls_total counter"]
+        lines += [f'imagefx_stage_webdriver_calls_total{{stage="{stage}"}} {stats["calls"]}'
+                  for stage, stats in sorted(stages.items())]
+
+        lines += ["# HELP imagefx_stage_outcomes_total Stage completions by outcome.",
+                  "# TYPE imagefx_stage_outcomes_total counter"]
+        for stage, stats in sorted(stages.items()):
+            for outcome, count in sorted(stats["outcomes"].items()):
+                lines.append(f'imagefx_stage_outcomes_total{{stage="{stage}",outcome="{outcome}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path, extra=None):
+        """
+        Prometheus 텍스트 형식 요약 파일 작성 (임시 파일에 쓴 뒤 교체)
+
+        Args:
+            extra: 함께 기록할 다른 지표 텍스트 (예: GenerationDeadlines.render_prometheus())
+        """
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render_prometheus())
+            if extra:
+                f.write(extra)
+        os.replace(temp_path, path)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,236 @@
+"""
+ImageFX 로컬 모의 서버
+실제 사이트와 로그인 없이 다운로더를 시험하고 측정할 수 있도록, 다운로더가 기대하는 페이지 구조
+(contenteditable 입력창, '상식 여행' 버튼, 지연 후 나타나는 큰 data URL 이미지 4개)를 흉내 냅니다.
+
+    python imagefx_mock_server.py --port 8765 --delay 5
+    python imagefx_downloader.py --url http://127.0.0.1:8765/
+"""
+
+import os
+import json
+import time
+import zlib
+import base64
+import struct
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# 생성 API 경로 (imagefx_network.GENERATION_API_PATTERNS의 "runImageFx"와 일치)
+GENERATE_PATH = "/v1/images:runImageFx"
+
+MOCK_PAGE = r"""<!DOCTYPE html>
+<html lang="ko">
+<head>
+<meta charset="utf-8">
+<title>ImageFX (mock)</title>
+<style>
+  body { font-family: sans-serif; margin: 24px; }
+  #prompt { border: 1px solid #888; min-height: 48px; padding: 8px; width: 640px; }
+  #gallery img { width: 256px; margin: 4px; }
+</style>
+</head>
+<body>
+<div id="prompt" contenteditable="true" role="textbox"></div>
+<button id="generate" type="submit"><i>casino</i> 상식 여행</button>
+<div id="status"></div>
+<div id="alert" role="alert"></div>
+<div id="gallery"></div>
+<script>
+const STAGGER_MS = __STAGGER_MS__;
+const button = document.getElementById('generate');
+const gallery = document.getElementById('gallery');
+const status = document.getElementById('status');
+const alertBox = document.getElementById('alert');
+
+button.addEventListener('click', async () => {
+    const prompt = document.getElementById('prompt').textContent;
+    button.disabled = true;
+    status.textContent = 'generating';
+    alertBox.textContent = '';
+    try {
+        const response = await fetch('__GENERATE_PATH__', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({userInput: {prompts: [prompt]}}),
+        });
+        if (!response.ok) {
+            alertBox.textContent = response.status === 429
+                ? 'Too many requests. Please try again later.' : 'Something went wrong.';
+            status.textContent = 'error: ' + response.status;
+            return;
+        }
+        const text = await response.text();
+        const data = JSON.parse(text.substring(text.indexOf('\n') + 1));
+        const images = data.imagePanels[0].generatedImages;
+        for (let i = 0; i < images.length; i++) {
+            if (i > 0 && STAGGER_MS > 0) await new Promise(r => setTimeout(r, STAGGER_MS));
+            const img = document.createElement('img');
+            img.src = 'data:image/png;base64,' + images[i].encodedImage;
+            gallery.prepend(img);
+        }
+        status.textContent = 'done';
+    } catch (e) {
+        status.textContent = 'error: ' + e;
+    } finally {
+        button.disabled = false;
+    }
+});
+</script>
+</body>
+</html>
+"""
+
+
+def make_png(width, height):
+    """무작위 픽셀 PNG 생성 (압축되지 않으므로 width*height*3 바이트 정도의 큰 이미지)"""
+    def chunk(kind, data):
+        return (struct.pack(">I", len(data)) + kind + data
+                + struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff))
+
+    row_bytes = width * 3
+    noise = os.urandom(row_bytes * height)
+    raw = b"".join(b"\x00" + noise[y * row_bytes:(y + 1) * row_bytes] for y in range(height))
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)  # 8bit RGB
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(raw, 1)) + chunk(b"IEND", b""))
+
+
+class MockImageFXServer:
+    """백그라운드 스레드에서 실행되는 모의 ImageFX HTTP 서버"""
+
+    def __init__(self, host="127.0.0.1", port=0, delay=5.0, image_size=768, image_count=4, stagger=0.0,
+                 rate_limit_every=0):
+        """
+        Args:
+            port: 포트 (0이면 빈 포트 자동 선택)
+            delay: 생성 버튼 클릭 후 이미지 응답까지의 지연(초)
+            image_size: 생성 이미지 한 변의 픽셀 수 (기본값: 768, 약 1.7MB PNG)
+            image_count: 생성 이미지 수 (기본값: 4)
+            stagger: 이미지를 하나씩 표시할 때 사이 간격(초) (점진적 렌더링 흉내)
+            rate_limit_every: N이면 N번째 생성 요청마다 429 응답과 사용량 제한 알림 (재시도 시험용, 0이면 사용 안 함)
+        """
+        self.delay = delay
+        self.image_size = image_size
+        self.image_count = image_count
+        self.stagger = stagger
+        self.rate_limit_every = rate_limit_every
+        self.requests = 0
+        self.generations = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass  # 요청 로그 생략
+
+            def _send(self, status, content_type, body):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path.split("?")[0] != "/":
+                    self._send(404, "text/plain; charset=utf-8", b"not found")
+                    return
+                self._send(200, "text/html; charset=utf-8", server.render_page().encode("utf-8"))
+
+            def do_POST(self):
+                if self.path != GENERATE_PATH:
+                    self._send(404, "text/plain; charset=utf-8", b"not found")
+                    return
+                length = int(self.headers.get("Content-Length") or 0)
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if server.rate_limited():
+                    body = json.dumps({"error": {"code": 429, "status": "RESOURCE_EXHAUSTED"}})
+                    self._send(429, "application/json; charset=utf-8", body.encode("utf-8"))
+                    return
+                prompt = (request.get("userInput", {}).get("prompts") or [""])[0]
+                body = ")]}'\n" + json.dumps(server.generate(prompt))
+                self._send(200, "application/json; charset=utf-8", body.encode("utf-8"))
+
+        return Handler
+
+    def render_page(self):
+        return (MOCK_PAGE.replace("__STAGGER_MS__", str(int(self.stagger * 1000)))
+                .replace("__GENERATE_PATH__", GENERATE_PATH))
+
+    def rate_limited(self):
+        """이번 생성 요청을 사용량 제한으로 거절할지 여부"""
+        with self._lock:
+            self.requests += 1
+            return bool(self.rate_limit_every) and self.requests % self.rate_limit_every == 0
+
+    def generate(self, prompt):
+        """지연 후 실제 생성 API와 비슷한 형식의 응답 반환"""
+        started = time.monotonic()
+        images = []
+        with self._lock:
+            self.generations += 1
+            generation = self.generations
+        for index in range(self.image_count):
+            images.append({
+                "encodedImage": base64.b64encode(make_png(self.image_size, self.image_size)).decode("ascii"),
+                "seed": generation * 1000 + index,
+                "modelNameType": "MOCK_IMAGEN",
+                "prompt": prompt,
+            })
+        # 이미지 생성 시간도 지연에 포함
+        remaining = self.delay - (time.monotonic() - started)
+        if remaining > 0:
+            time.sleep(remaining)
+        return {"imagePanels": [{"prompt": prompt, "generatedImages": images}]}
+
+    def start(self):
+        """서버 스레드 시작 후 주소 반환"""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="imagefx-mock", daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ImageFX 로컬 모의 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=5.0, help="이미지 응답 지연(초) (기본값: 5)")
+    parser.add_argument("--image-size", type=int, default=768, help="이미지 한 변 픽셀 수 (기본값: 768)")
+    parser.add_argument("--stagger", type=float, default=0.0, help="이미지 사이 표시 간격(초) (기본값: 0)")
+    parser.add_argument("--rate-limit-every", type=int, default=0,
+                        help="N번째 생성 요청마다 429 사용량 제한 응답 (기본값: 0, 사용 안 함)")
+    args = parser.parse_args()
+
+    server = MockImageFXServer(args.host, args.port, delay=args.delay, image_size=args.image_size,
+                               stagger=args.stagger, rate_limit_every=args.rate_limit_every)
+    print(f"🧪 모의 ImageFX 서버 실행 중: {server.start()} (종료: Ctrl+C)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+ImageFX 네트워크 캡처
+Chrome 성능(네트워크) 로그에서 이미지 생성 API 응답을 찾아, 렌더링을 기다리지 않고 응답 본문에서 이미지와 서버 메타데이터를 추출합니다.
+"""
+
+import json
+import time
+import base64
+
+
+# 이미지 생성 API 응답으로 간주할 URL 패턴
+GENERATION_API_PATTERNS = (
+    "runImageFx",
+    "generateImage",
+    "images:generate",
+)
+
+# 이미지 본문을 담는 응답 필드명
+IMAGE_PAYLOAD_KEYS = ("encodedImage", "bytesBase64Encoded")
+
+# base64 시작 문자열로 MIME 타입 추정
+BASE64_SIGNATURES = {
+    "/9j/": "image/jpeg",
+    "iVBORw0KGgo": "image/png",
+    "UklGR": "image/webp",
+    "R0lGOD": "image/gif",
+}
+
+
+def guess_mime(payload):
+    """base64 본문 앞부분으로 MIME 타입 추정 (알 수 없으면 image/jpeg)"""
+    for signature, mime in BASE64_SIGNATURES.items():
+        if payload.startswith(signature):
+            return mime
+    return "image/jpeg"
+
+
+def extract_generated_images(data):
+    """
+    응답 JSON에서 생성 이미지 항목을 재귀적으로 찾아 반환
+
+    Returns:
+        [{"payload": base64 문자열, "mime": MIME 타입, "server_metadata": {seed, model 등}}, ...]
+    """
+    images = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            for key in IMAGE_PAYLOAD_KEYS:
+                payload = node.get(key)
+                if isinstance(payload, str) and len(payload) > 1000:
+                    server_metadata = {
+                        k: v for k, v in node.items()
+                        if k not in IMAGE_PAYLOAD_KEYS and not isinstance(v, (dict, list))
+                    }
+                    images.append({
+                        "payload": payload,
+                        "mime": node.get("mimeType") or guess_mime(payload),
+                        "server_metadata": server_metadata,
+                    })
+                    return
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                walk(value)
+
+    walk(data)
+    return images
+
+
+def parse_response_body(body, base64_encoded=False):
+    """Network.getResponseBody 결과를 JSON으로 해석 (XSSI 방지 접두어 제거)"""
+    if base64_encoded:
+        body = base64.b64decode(body).decode("utf-8", errors="replace")
+    body = body.lstrip()
+    if body.startswith(")]}'"):
+        body = body.split("\n", 1)[1] if "\n" in body else ""
+    return json.loads(body)
+
+
+class NetworkCapture:
+    """Selenium 성능 로그로 이미지 생성 API 응답을 감시하는 캡처기"""
+
+    def __init__(self, driver, url_patterns=GENERATION_API_PATTERNS):
+        self.driver = driver
+        self.url_patterns = url_patterns
+        self._responses = {}  # requestId -> 응답 정보
+        self._finished = set()
+        self.last_error_status = None  # 생성 API가 오류 상태(예: 429)로 응답한 경우의 HTTP 상태 코드
+
+    @staticmethod
+    def configure(chrome_options):
+        """연결 전에 Chrome 옵션에 성능 로그 수집 설정 추가"""
+        chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+    def enable(self):
+        """DevTools Network 도메인 활성화 (큰 응답 본문도 버퍼에 유지)"""
+        self.driver.execute_cdp_cmd("Network.enable", {
+            "maxTotalBufferSize": 256 * 1024 * 1024,
+            "maxResourceBufferSize": 64 * 1024 * 1024,
+        })
+
+    def reset(self):
+        """지금까지 쌓인 로그를 버림 (생성 버튼 클릭 직전에 호출)"""
+        self.driver.get_log("performance")
+        self._responses.clear()
+        self._finished.clear()
+        self.last_error_status = None
+
+    def _matches(self, url):
+        return any(pattern in url for pattern in self.url_patterns)
+
+    def _drain(self):
+        """성능 로그를 읽어 생성 API 응답과 로딩 완료 이벤트 기록"""
+        for entry in self.driver.get_log("performance"):
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, ValueError):
+                continue
+
+            method = message.get("method")
+            params = message.get("params", {})
+            if method == "Network.responseReceived":
+                response = params.get("response", {})
+                if self._matches(response.get("url", "")):
+                    if response.get("status", 200) >= 400:
+                        self.last_error_status = response["status"]
+                        continue
+                    self._responses[params["requestId"]] = response
+            elif method == "Network.loadingFinished":
+                self._finished.add(params.get("requestId"))
+
+    def poll(self):
+        """
+        완료된 생성 API 응답이 있으면 이미지 목록 반환, 없으면 빈 목록
+
+        Returns:
+            extract_generated_images() 형식의 목록
+        """
+        self._drain()
+        for request_id in [r for r in self._responses if r in self._finished]:
+            response = self._responses.pop(request_id)
+            try:
+                result = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+                data = parse_response_body(result.get("body", ""), result.get("base64Encoded", False))
+            except Exception:
+                continue
+
+            images = extract_generated_images(data)
+            if images:
+                for image in images:
+                    image["server_metadata"].setdefault("api_url", response.get("url"))
+                return images
+        return []
+
+    def wait(self, timeout, poll_interval=0.25, stop_condition=None, stop_check_interval=2.0):
+        """
+        생성 API 응답이 올 때까지 대기
+
+        Args:
+            timeout: 최대 대기 시간(초)
+            stop_condition: 주기적으로 호출하여 True면 대기 중단 (예: DOM에 이미 이미지가 나타난 경우)
+
+        Returns:
+            이미지 목록 (찾지 못하면 빈 목록)
+        """
+        start_time = time.time()
+        last_stop_check = start_time
+        while time.time() - start_time < timeout:
+            images = self.poll()
+            if images:
+                return images
+
+            if stop_condition and time.time() - last_stop_check >= stop_check_interval:
+                last_stop_check = time.time()
+                if stop_condition():
+                    return []
+            time.sleep(poll_interval)
+        return []
@@ -0,0 +1,116 @@
+"""
+ImageFX 프롬프트 간격 정책
+고정 대기 대신 설정 가능한 정책(고정 간격, 토큰 버킷, 적응형)으로 다음 프롬프트 시작 시점을 결정합니다.
+"""
+
+import time
+import threading
+
+
+class FixedPacing:
+    """이전 프롬프트가 끝난 뒤 최소 interval초가 지나야 다음 프롬프트 시작"""
+
+    def __init__(self, interval=10):
+        self.interval = interval
+        self._last_done = None
+        self._lock = threading.Lock()
+
+    def _delay(self):
+        if self._last_done is None:
+            return 0
+        return max(0, self.interval - (time.monotonic() - self._last_done))
+
+    def wait(self):
+        """다음 프롬프트를 시작해도 될 때까지 대기하고 대기한 시간(초) 반환"""
+        with self._lock:
+            delay = self._delay()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def record(self, success):
+        """프롬프트 처리 결과 기록"""
+        with self._lock:
+            self._last_done = time.monotonic()
+
+    def describe(self):
+        return f"고정 간격 {self.interval}초"
+
+
+class TokenBucketPacing:
+    """분당 rate개 속도로 토큰이 채워지고, 최대 burst개까지 연속 시작 허용"""
+
+    def __init__(self, rate_per_minute=6, burst=1):
+        self.rate = rate_per_minute / 60.0
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait(self):
+        """토큰 하나를 얻을 때까지 대기하고 대기한 시간(초) 반환"""
+        waited = 0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def record(self, success):
+        """토큰 버킷은 결과와 무관하게 속도만 제한"""
+
+    def describe(self):
+        return f"토큰 버킷 분당 {self.rate * 60:g}개 (버스트 {self.burst})"
+
+
+class AdaptivePacing(FixedPacing):
+    """실패하면 간격을 늘리고 성공하면 줄이는 적응형 간격 (min_interval ~ max_interval)"""
+
+    def __init__(self, min_interval=2, max_interval=60, increase=2.0, decrease=0.75):
+        super().__init__(interval=min_interval)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.increase = increase
+        self.decrease = decrease
+
+    def record(self, success):
+        """성공 시 간격 축소, 실패 시 간격 확대"""
+        with self._lock:
+            self._last_done = time.monotonic()
+            factor = self.decrease if success else self.increase
+            self.interval = min(self.max_interval, max(self.min_interval, self.interval * factor))
+
+    def describe(self):
+        return f"적응형 간격 {self.min_interval}~{self.max_interval}초 (현재 {self.interval:.1f}초)"
+
+
+def create_pacing(spec):
+    """
+    문자열 설정으로 간격 정책 생성
+
+    Args:
+        spec: "fixed:10", "token:6,2" (분당 6개, 버스트 2), "adaptive:2,60" (최소 2초, 최대 60초)
+    """
+    kind, _, params = spec.partition(":")
+    values = [float(value) for value in params.split(",") if value.strip()]
+
+    if kind == "fixed":
+        return FixedPacing(*values[:1])
+    if kind == "token":
+        rate = values[0] if values else 6
+        burst = values[1] if len(values) > 1 else 1
+        if rate <= 0 or burst < 1:
+            raise ValueError(f"잘못된 토큰 버킷 설정: {spec} (분당 개수는 0보다 크고 버스트는 1 이상)")
+        return TokenBucketPacing(rate, int(burst))
+    if kind == "adaptive":
+        return AdaptivePacing(*values[:2])
+    raise ValueError(f"알 수 없는 간격 정책: {spec} (fixed, token, adaptive 중 선택)")
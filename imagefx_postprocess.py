@@ -0,0 +1,179 @@
+"""
+ImageFX 후처리 단계
+저장이 끝난 이미지를 프로세스 풀에 넘겨 WebP/AVIF 사본과 썸네일을 만들고, 프롬프트를 EXIF 메타데이터로 기록합니다.
+브라우저가 다음 프롬프트를 처리하는 동안 병렬로 실행되며, 대기 작업 수가 한도에 이르면 저장 단계가 기다립니다.
+"""
+
+import os
+import time
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from imagefx_metrics import RunMetrics
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+# 후처리 형식 이름 -> (Pillow 형식, 확장자)
+OUTPUT_FORMATS = {
+    "webp": ("WEBP", ".webp"),
+    "avif": ("AVIF", ".avif"),
+}
+
+EXIF_IMAGE_DESCRIPTION = 0x010E
+EXIF_XP_COMMENT = 0x9C9C  # UTF-16LE (한국어 프롬프트 보존용)
+
+
+def _prompt_exif(prompt):
+    exif = Image.Exif()
+    exif[EXIF_IMAGE_DESCRIPTION] = prompt
+    exif[EXIF_XP_COMMENT] = prompt.encode("utf-16-le") + b"\x00\x00"
+    return exif.tobytes()
+
+
+def _save(image, target, pil_format, **options):
+    """임시 파일에 저장한 뒤 이름을 바꿔 완성된 파일만 보이도록 함. 파일 크기 반환"""
+    temp_path = f"{target}.part"
+    try:
+        image.save(temp_path, format=pil_format, **options)
+        os.replace(temp_path, target)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    return os.path.getsize(target)
+
+
+def process_image(path, prompt, formats, thumbnail_size, quality):
+    """
+    (프로세스 풀에서 실행) 이미지 하나의 사본과 썸네일을 같은 폴더에 생성
+
+    원본(image_N.jpg)은 .objects 저장소와 하드 링크로 공유되므로 수정하지 않고,
+    프롬프트는 새로 만드는 파일에만 기록합니다.
+
+    Returns:
+        {"status": "ok"|"partial"|"error", "outputs": {형식: 파일명}, "errors": {형식: 오류}, "bytes", "duration"}
+    """
+    started = time.perf_counter()
+    base = os.path.splitext(path)[0]
+    outputs, errors = {}, {}
+    written = 0
+
+    with Image.open(path) as image:
+        image.load()
+        exif = _prompt_exif(prompt)
+
+        for name in formats:
+            pil_format, ext = OUTPUT_FORMATS[name]
+            try:
+                written += _save(image, base + ext, pil_format, quality=quality, exif=exif)
+                outputs[name] = os.path.basename(base + ext)
+            except Exception as e:
+                errors[name] = str(e)
+
+        if thumbnail_size:
+            target = f"{base}.thumb.jpg"
+            try:
+                thumbnail = image.convert("RGB")
+                thumbnail.thumbnail((thumbnail_size, thumbnail_size))
+                written += _save(thumbnail, target, "JPEG", quality=quality, exif=exif)
+                outputs["thumbnail"] = os.path.basename(target)
+            except Exception as e:
+                errors["thumbnail"] = str(e)
+
+    result = {
+        "status": "ok" if not errors else ("partial" if outputs else "error"),
+        "outputs": outputs,
+        "bytes": written,
+        "duration": time.perf_counter() - started,
+    }
+    if errors:
+        result["errors"] = errors
+    return result
+
+
+class PostProcessor:
+    """저장된 이미지를 프로세스 풀에서 변환하는 후처리기 (여러 워커가 공유 가능)"""
+
+    def __init__(self, formats=("webp",), thumbnail_size=256, quality=85, max_workers=2, max_pending=8,
+                 metrics=None):
+        """
+        Args:
+            formats: 만들 사본 형식 목록 ("webp", "avif")
+            thumbnail_size: 썸네일 긴 변 픽셀 수 (0이면 만들지 않음, 기본값: 256)
+            quality: 사본/썸네일 인코딩 품질 (기본값: 85)
+            max_workers: 프로세스 수 (기본값: 2)
+            max_pending: 동시에 대기할 수 있는 최대 작업 수. 초과 시 등록하는 쪽(저장 스레드)이 대기 (기본값: 8)
+            metrics: 후처리 구간("postprocess")을 기록할 RunMetrics
+        """
+        if Image is None:
+            raise RuntimeError("후처리를 사용하려면 Pillow 패키지가 필요합니다: pip install Pillow")
+        unknown = set(formats) - set(OUTPUT_FORMATS)
+        if unknown:
+            raise ValueError(f"알 수 없는 후처리 형식: {', '.join(sorted(unknown))} "
+                             f"({', '.join(OUTPUT_FORMATS)} 중 선택)")
+
+        self.formats = tuple(formats)
+        self.thumbnail_size = thumbnail_size
+        self.quality = quality
+        self.metrics = metrics or RunMetrics()
+        self.executor = ProcessPoolExecutor(max_workers=max_workers)
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    def submit(self, filepath, prompt, labels=None):
+        """
+        후처리 작업 등록 (대기 작업이 max_pending개면 자리가 날 때까지 대기)
+
+        Returns:
+            process_image() 결과로 완료되는 Future (실패해도 예외 대신 status "error" 결과)
+        """
+        labels = labels if labels is not None else RunMetrics.current_labels()
+        result = Future()
+        self._slots.acquire()
+        try:
+            future = self.executor.submit(process_image, filepath, prompt, self.formats,
+                                          self.thumbnail_size, self.quality)
+        except Exception as e:
+            self._slots.release()
+            result.set_result({"status": "error", "error": str(e)})
+            return result
+
+        def _done(done):
+            self._slots.release()
+            if done.exception() is not None:
+                outcome = {"status": "error", "error": str(done.exception())}
+            else:
+                outcome = done.result()
+            self.metrics.record("postprocess", outcome.pop("duration", 0.0), bytes=outcome.get("bytes", 0),
+                                outcome=outcome["status"], **labels)
+            result.set_result(outcome)
+
+        future.add_done_callback(_done)
+        return result
+
+    def after(self, write_future, filepath, prompt):
+        """
+        저장 작업이 끝나면 후처리를 등록 (저장 실패 시 status "skipped")
+
+        Returns:
+            후처리 결과로 완료되는 Future
+        """
+        labels = RunMetrics.current_labels()
+        result = Future()
+
+        def _written(done):
+            if done.exception() is not None:
+                result.set_result({"status": "skipped", "error": "이미지 저장 실패"})
+                return
+            # 저장 스레드에서 등록하므로 후처리가 밀리면 저장도 함께 대기 (backpressure)
+            self.submit(filepath, prompt, labels).add_done_callback(lambda post: result.set_result(post.result()))
+
+        write_future.add_done_callback(_written)
+        return result
+
+    def close(self):
+        """남은 후처리를 마치고 프로세스 풀 종료"""
+        self.executor.shutdown(wait=True)
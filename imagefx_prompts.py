@@ -0,0 +1,196 @@
+"""
+ImageFX 프롬프트 소스
+큰 텍스트/JSONL 파일을 한 줄씩 읽고, 템플릿 파일(주제 × 스타일 × 조명 등)은 필요할 때마다 조합을 만들어
+프롬프트 전체를 메모리에 올리지 않고 처리합니다. --shard i/N으로 여러 컴퓨터가 같은 소스를 나누어 처리할 수 있습니다.
+
+지원 형식 (확장자로 구분, .gz 압축 가능):
+    *.txt 등     한 줄에 프롬프트 하나 (빈 줄과 #으로 시작하는 줄은 무시)
+    *.jsonl      한 줄에 {"prompt": "...", ...} 또는 문자열 하나 (prompt 외 필드는 변수로 기록)
+    *.json       템플릿 {"template": "{subject}, {style}", "variables": {"subject": [...], "style": [...]}}
+                 (여러 개면 목록으로 작성)
+"""
+
+import sys
+import gzip
+import json
+import itertools
+import contextlib
+from string import Formatter
+
+
+def _open_text(path):
+    """텍스트 파일 열기 (.gz면 압축 해제하며 읽기, "-"면 표준 입력을 닫지 않고 그대로 읽기)"""
+    if path == "-":
+        # buffer를 새로 감싸면 sys.stdin이 미리 읽어 둔 줄이 사라지므로 sys.stdin 자체를 사용
+        return contextlib.nullcontext(sys.stdin)
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def _source_format(path):
+    name = path[:-3] if path.endswith(".gz") else path
+    if name.endswith(".jsonl"):
+        return "jsonl"
+    if name.endswith(".json"):
+        return "template"
+    return "text"
+
+
+def read_text_prompts(path):
+    """
+    한 줄에 프롬프트 하나인 파일을 한 줄씩 읽기
+
+    Returns:
+        (프롬프트, 변수) 제너레이터 (변수는 항상 빈 dict)
+    """
+    with _open_text(path) as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield line, {}
+
+
+def read_jsonl_prompts(path):
+    """
+    JSONL 파일을 한 줄씩 읽기 (잘못된 줄은 줄 번호와 함께 ValueError)
+
+    Returns:
+        (프롬프트, 변수) 제너레이터
+    """
+    with _open_text(path) as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"{path}:{line_number}: JSON 형식 오류 ({e})") from None
+
+            if isinstance(record, str):
+                prompt, variables = record, {}
+            elif isinstance(record, dict) and isinstance(record.get("prompt"), str):
+                variables = dict(record)
+                prompt = variables.pop("prompt")
+            else:
+                raise ValueError(f"{path}:{line_number}: 문자열 또는 \"prompt\" 필드가 있는 객체여야 합니다")
+
+            prompt = prompt.strip()
+            if prompt:
+                yield prompt, variables
+
+
+class PromptTemplate:
+    """변수 목록의 데카르트 곱으로 프롬프트를 만드는 템플릿"""
+
+    def __init__(self, template, variables):
+        """
+        Args:
+            template: str.format 형식 문자열 (예: "{subject}, {style} 스타일")
+            variables: 변수 이름 -> 값 목록 (값이 하나면 목록 대신 문자열 가능)
+        """
+        self.template = template
+        self.variables = {name: values if isinstance(values, list) else [values]
+                          for name, values in variables.items()}
+
+        fields = {field.split(".")[0].split("[")[0]
+                  for _, field, _, _ in Formatter().parse(template) if field}
+        missing = fields - set(self.variables)
+        if missing:
+            raise ValueError(f"템플릿 변수에 값이 없습니다: {', '.join(sorted(missing))}")
+        empty = [name for name, values in self.variables.items() if not values]
+        if empty:
+            raise ValueError(f"템플릿 변수 값 목록이 비어 있습니다: {', '.join(sorted(empty))}")
+
+    def __len__(self):
+        count = 1
+        for values in self.variables.values():
+            count *= len(values)
+        return count
+
+    def expand(self):
+        """
+        조합을 하나씩 생성 (마지막 변수가 가장 빠르게 바뀜)
+
+        Returns:
+            (프롬프트, 변수) 제너레이터
+        """
+        names = list(self.variables)
+        for combination in itertools.product(*(self.variables[name] for name in names)):
+            variables = dict(zip(names, combination))
+            yield self.template.format_map(variables).strip(), variables
+
+
+def load_templates(path):
+    """템플릿 파일 읽기 (객체 하나 또는 목록)"""
+    with _open_text(path) as f:
+        data = json.load(f)
+    specs = data if isinstance(data, list) else [data]
+
+    templates = []
+    for index, spec in enumerate(specs, 1):
+        if not isinstance(spec, dict) or not isinstance(spec.get("template"), str):
+            raise ValueError(f"{path}: {index}번째 템플릿에 \"template\" 문자열이 없습니다")
+        templates.append(PromptTemplate(spec["template"], spec.get("variables", {})))
+    return templates
+
+
+def expand_templates(path):
+    """
+    템플릿 파일의 모든 조합을 차례로 생성
+
+    Returns:
+        (프롬프트, 변수) 제너레이터
+    """
+    for template in load_templates(path):
+        yield from template.expand()
+
+
+def open_prompt_source(path):
+    """
+    확장자에 맞는 프롬프트 소스 열기 ("-"이면 표준 입력의 텍스트)
+
+    Returns:
+        (프롬프트, 변수) 제너레이터
+    """
+    source_format = "text" if path == "-" else _source_format(path)
+    if source_format == "jsonl":
+        return read_jsonl_prompts(path)
+    if source_format == "template":
+        return expand_templates(path)
+    return read_text_prompts(path)
+
+
+def count_prompts(path):
+    """
+    미리 알 수 있는 프롬프트 수 (템플릿만 계산하고, 한 줄씩 읽는 파일은 None)
+    """
+    if path != "-" and _source_format(path) == "template":
+        return sum(len(template) for template in load_templates(path))
+    return None
+
+
+def parse_shard(value):
+    """
+    "i/N" 형식 분할 지정 해석 (i는 0부터 N-1)
+
+    Returns:
+        (i, N)
+    """
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise ValueError(f"분할 지정은 i/N 형식이어야 합니다: {value}") from None
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"분할 번호는 0 이상 {count - 1} 이하여야 합니다: {value}")
+    return index, count
+
+
+def shard_of(job_id, count):
+    """
+    작업이 속한 분할 번호 (작업 ID의 프롬프트 해시 부분 기반)
+
+    같은 프롬프트의 반복(…-2, …-3)은 같은 분할에 속하고, 소스에 줄이 추가되어도 기존 작업의 분할은 바뀌지 않습니다.
+    """
+    return int(job_id.split("-")[0][:8], 16) % count
@@ -0,0 +1,307 @@
+"""
+ImageFX 재시도 스케줄러
+페이지 상태로 프롬프트 결과(성공, 일부 성공, 사용량 제한, 정책 차단, UI 멈춤)를 분류하고,
+다시 시도할 만한 프롬프트는 지터를 더한 지수 백오프 뒤에 다시 대기열에 넣습니다.
+연속 실패가 쌓이면 서킷 브레이커가 열려 모든 워커가 함께 쉬고, 실행이 끝나면 실효 처리량을 보고합니다.
+"""
+
+import re
+import time
+import heapq
+import random
+import logging
+import threading
+from collections import namedtuple
+
+from imagefx_metrics import RunMetrics
+
+logger = logging.getLogger("imagefx.scheduler")
+
+
+# 프롬프트 하나에서 기대하는 이미지 수
+EXPECTED_IMAGES = 4
+
+# 결과 분류
+SUCCESS = "success"
+PARTIAL = "partial"
+RATE_LIMITED = "rate_limited"
+POLICY_BLOCKED = "policy_blocked"
+UI_STUCK = "ui_stuck"
+
+OUTCOME_LABELS = {
+    SUCCESS: "성공",
+    PARTIAL: "일부 성공",
+    RATE_LIMITED: "사용량 제한",
+    POLICY_BLOCKED: "정책 차단",
+    UI_STUCK: "UI 멈춤",
+}
+
+# 다시 시도할 결과 (정책 차단은 같은 프롬프트를 다시 보내도 결과가 같으므로 제외)
+RETRIABLE_OUTCOMES = (RATE_LIMITED, UI_STUCK)
+
+# 서킷 브레이커의 연속 실패로 세는 결과 (정책 차단은 프롬프트 문제이므로 서비스 상태와 무관)
+BREAKER_OUTCOMES = (RATE_LIMITED, UI_STUCK)
+
+# 페이지 알림 문구 분류 패턴 (영어/한국어)
+RATE_LIMIT_PATTERNS = re.compile(
+    r"quota|rate.?limit|too many|limit reached|try again (later|tomorrow)|usage limit|"
+    r"한도|너무 많|잠시 후|나중에 다시|사용량",
+    re.IGNORECASE,
+)
+POLICY_PATTERNS = re.compile(
+    r"polic|violat|guideline|unsafe|inappropriate|couldn.t generate|can.t generate|unable to generate|"
+    r"정책|위반|가이드라인|부적절|생성할 수 없",
+    re.IGNORECASE,
+)
+
+
+def classify_outcome(image_count, page_state=None, expected=EXPECTED_IMAGES):
+    """
+    이미지 수와 페이지 상태로 프롬프트 결과 분류
+
+    Args:
+        image_count: 저장한 새 이미지 수
+        page_state: PAGE_STATE_SCRIPT 결과 {"messages": [...], "busy": bool} (+ 선택적 "http_status")
+
+    Returns:
+        SUCCESS, PARTIAL, RATE_LIMITED, POLICY_BLOCKED, UI_STUCK 중 하나
+    """
+    if image_count >= expected:
+        return SUCCESS
+    if image_count > 0:
+        return PARTIAL
+
+    page_state = page_state or {}
+    if page_state.get("http_status") == 429:
+        return RATE_LIMITED
+    text = "\n".join(page_state.get("messages") or [])
+    if RATE_LIMIT_PATTERNS.search(text):
+        return RATE_LIMITED
+    if POLICY_PATTERNS.search(text):
+        return POLICY_BLOCKED
+    return UI_STUCK
+
+
+# 스케줄러가 내주는 작업 (idx: 소스에서의 순번, attempt: 1부터 시작하는 시도 횟수)
+ScheduledJob = namedtuple("ScheduledJob", ["idx", "job_id", "prompt", "attempt"])
+
+
+class RetryScheduler:
+    """재시도 대기열과 서킷 브레이커를 갖춘 작업 스케줄러 (워커 풀에서 공유 가능)"""
+
+    def __init__(self, jobs, max_retries=2, base_delay=30, max_delay=600, jitter=0.5,
+                 breaker_threshold=3, breaker_cooldown=300, metrics=None):
+        """
+        Args:
+            jobs: (job_id, prompt) 이터레이터 (필요한 만큼만 읽음, 서비스 대기열처럼 지금 작업이 없으면
+                None을 내주는 열린 소스도 가능 - 새 작업이 들어오면 wake() 호출)
+            max_retries: 프롬프트당 최대 재시도 횟수 (기본값: 2, 0이면 재시도 안 함)
+            base_delay: 첫 재시도 대기(초), 재시도마다 2배 (기본값: 30)
+            max_delay: 재시도 대기 상한(초) (기본값: 600)
+            jitter: 대기 시간에 곱할 무작위 비율 범위 (0.5면 50~100%, 기본값: 0.5)
+            breaker_threshold: 서킷 브레이커를 여는 연속 실패 수 (기본값: 3, 0이면 사용 안 함)
+            breaker_cooldown: 브레이커가 열렸을 때 쉬는 시간(초), 연달아 열리면 2배씩 최대 4배 (기본값: 300)
+            metrics: 브레이커 휴지 구간("breaker_pause")을 기록할 RunMetrics
+        """
+        self._jobs = iter(jobs)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.metrics = metrics or RunMetrics()
+
+        self._condition = threading.Condition()
+        self._retries = []  # (실행 가능 시각, 순번, ScheduledJob) 힙
+        self._sequence = 0
+        self._next_idx = 0
+        self._source_done = False
+        self._in_flight = 0
+        self._stopped = False
+
+        # 서킷 브레이커: closed -> (연속 실패) open -> (휴지 후) half_open -> 시험 작업 결과에 따라 closed/open
+        self._state = "closed"
+        self._open_until = 0.0
+        self._trips_in_row = 0
+        self._probe_in_flight = False
+        self._consecutive_failures = 0
+
+        self.started = time.monotonic()
+        self.stats = {
+            "attempts": 0, "retries": 0, "gave_up": 0, "breaker_trips": 0, "paused": 0.0, "images": 0,
+            "outcomes": {outcome: 0 for outcome in OUTCOME_LABELS},
+        }
+
+    def __iter__(self):
+        while True:
+            job = self.next_job()
+            if job is None:
+                return
+            yield job
+
+    @property
+    def breaker_state(self):
+        """서킷 브레이커 상태 ("closed", "open", "half_open")"""
+        return self._state
+
+    def _backoff(self, attempt):
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return delay * random.uniform(1 - self.jitter, 1)
+
+    def _take(self, now):
+        """지금 실행할 작업을 꺼냄 (재시도 우선, 없으면 소스에서 하나 읽음)"""
+        if self._retries and self._retries[0][0] <= now:
+            return heapq.heappop(self._retries)[2]
+        if not self._source_done:
+            try:
+                item = next(self._jobs)
+            except StopIteration:
+                self._source_done = True
+                return None
+            if item is None:
+                return None  # 열린 소스에 아직 작업이 없음
+            job_id, prompt = item
+            self._next_idx += 1
+            return ScheduledJob(self._next_idx, job_id, prompt, 1)
+        return None
+
+    def next_job(self):
+        """
+        다음 작업을 반환 (브레이커가 열려 있거나 재시도 대기 중이면 실행 가능할 때까지 대기)
+
+        Returns:
+            ScheduledJob, 소스와 재시도가 모두 끝나고 처리 중인 작업도 없으면 None
+        """
+        with self._condition:
+            while True:
+                if self._stopped:
+                    return None
+                now = time.monotonic()
+                if self._state == "open":
+                    if now < self._open_until:
+                        self._condition.wait(self._open_until - now)
+                        continue
+                    self._state = "half_open"
+                    logger.info("🔌 서킷 브레이커 반개방: 시험 프롬프트 1개로 서비스 상태 확인")
+
+                if self._state == "half_open" and self._probe_in_flight:
+                    self._condition.wait(5)
+                    continue
+
+                job = self._take(now)
+                if job is not None:
+                    self._in_flight += 1
+                    self.stats["attempts"] += 1
+                    if self._state == "half_open":
+                        self._probe_in_flight = True
+                    return job
+
+                if self._source_done and not self._retries and not self._in_flight:
+                    self._condition.notify_all()
+                    return None
+
+                # 재시도 대기 중이거나, 처리 중인 작업의 결과(재시도 여부)를 기다림
+                timeout = self._retries[0][0] - now if self._retries else None
+                self._condition.wait(min(timeout, 5) if timeout is not None else 5)
+
+    def wake(self):
+        """열린 소스에 작업이 들어왔음을 알려 대기 중인 next_job을 깨움"""
+        with self._condition:
+            self._condition.notify_all()
+
+    def stop(self):
+        """새 작업과 예약된 재시도를 더 내주지 않음 (처리 중인 작업은 끝까지 진행)"""
+        with self._condition:
+            self._stopped = True
+            self._retries = []
+            self._condition.notify_all()
+
+    def report(self, job, outcome, images=0):
+        """
+        작업 결과 기록. 다시 시도할 결과면 백오프 뒤 재시도 대기열에 넣음
+
+        Returns:
+            재시도 예정이면 대기 시간(초), 아니면 None
+        """
+        with self._condition:
+            self._in_flight -= 1
+            self.stats["outcomes"][outcome] = self.stats["outcomes"].get(outcome, 0) + 1
+            self.stats["images"] += images
+
+            was_probe = self._state == "half_open" and self._probe_in_flight
+            if was_probe:
+                self._probe_in_flight = False
+
+            if outcome in BREAKER_OUTCOMES:
+                self._consecutive_failures += 1
+                if was_probe or (self.breaker_threshold
+                                 and self._consecutive_failures >= self.breaker_threshold
+                                 and self._state == "closed"):
+                    self._trip(outcome)
+            else:
+                self._consecutive_failures = 0
+                if self._state != "closed":
+                    logger.info("🔌 서킷 브레이커 닫힘: 처리 재개")
+                self._state = "closed"
+                self._trips_in_row = 0
+
+            delay = None
+            if outcome in RETRIABLE_OUTCOMES:
+                if job.attempt <= self.max_retries:
+                    delay = self._backoff(job.attempt)
+                    self._sequence += 1
+                    retry = job._replace(attempt=job.attempt + 1)
+                    heapq.heappush(self._retries, (time.monotonic() + delay, self._sequence, retry))
+                    self.stats["retries"] += 1
+                else:
+                    self.stats["gave_up"] += 1
+            self._condition.notify_all()
+            return delay
+
+    def _trip(self, outcome):
+        """브레이커 열기 (잠금을 쥔 채 호출)"""
+        cooldown = self.breaker_cooldown * min(4, 2 ** self._trips_in_row)
+        self._trips_in_row += 1
+        self._state = "open"
+        self._open_until = time.monotonic() + cooldown
+        self.stats["breaker_trips"] += 1
+        self.stats["paused"] += cooldown
+        self.metrics.record("breaker_pause", cooldown, outcome=outcome)
+        logger.warning(f"🛑 서킷 브레이커 열림: 연속 실패 {self._consecutive_failures}회 "
+                       f"(마지막: {OUTCOME_LABELS.get(outcome, outcome)}), {cooldown:.0f}초 동안 모든 작업 중지")
+
+    def throughput(self):
+        """
+        실효 처리량 (브레이커 휴지와 백오프 대기를 포함한 전체 경과 시간 기준)
+
+        Returns:
+            {"elapsed", "completed", "per_minute", "images_per_minute", "attempts_per_completed"}
+        """
+        with self._condition:
+            elapsed = time.monotonic() - self.started
+            completed = self.stats["outcomes"][SUCCESS] + self.stats["outcomes"][PARTIAL]
+            attempts = self.stats["attempts"]
+            images = self.stats["images"]
+        minutes = elapsed / 60 if elapsed > 0 else 0
+        return {
+            "elapsed": elapsed,
+            "completed": completed,
+            "per_minute": completed / minutes if minutes else 0.0,
+            "images_per_minute": images / minutes if minutes else 0.0,
+            "attempts_per_completed": attempts / completed if completed else None,
+        }
+
+    def print_summary(self):
+        """결과 분류별 개수와 실효 처리량 출력"""
+        rate = self.throughput()
+        stats = self.stats
+        outcomes = ", ".join(f"{OUTCOME_LABELS[outcome]} {count}"
+                             for outcome, count in stats["outcomes"].items() if count)
+        logger.info(f"\n📈 결과 분류: {outcomes}")
+        logger.info(f"   시도 {stats['attempts']}회, 재시도 {stats['retries']}회, 포기 {stats['gave_up']}개, "
+                    f"브레이커 {stats['breaker_trips']}회 ({stats['paused']:.0f}초 중지)")
+        per_completed = (f", 완료 1개당 {rate['attempts_per_completed']:.2f}회 시도"
+                         if rate["attempts_per_completed"] else "")
+        logger.info(f"   실효 처리량: 분당 {rate['per_minute']:.2f}개 프롬프트, "
+                    f"분당 {rate['images_per_minute']:.1f}장 이미지{per_completed}")
@@ -0,0 +1,270 @@
+"""
+ImageFX 페이지 주입 스크립트와 선택자 정의
+Selenium 백엔드와 CDP 백엔드가 같은 스크립트로 페이지를 조작하도록 한 곳에 모아 둡니다.
+"""
+
+
+# 프롬프트 입력창 후보 선택자 (kind, 선택자, 텍스트 필터)
+PROMPT_INPUT_SELECTORS = [
+    # contenteditable div (ImageFX는 div를 사용)
+    ("css", "[contenteditable='true']", None),
+    ("css", "[role='textbox']", None),
+    ("css", "textarea", None),
+]
+
+# 생성 버튼('상식 여행') 후보 선택자 (kind, 선택자, 텍스트 필터)
+GENERATE_BUTTON_SELECTORS = [
+    # "상식 여행" 텍스트 포함 (한국어 텍스트가 더 정확하므로 먼저 시도)
+    ("xpath", "//button[contains(., '상식 여행')]", None),
+    ("xpath", "//button[contains(., '상식')]", None),
+    # casino 아이콘이 있는 버튼
+    ("xpath", "//button[.//i[contains(text(), 'casino')]]", None),
+    # type=submit인 버튼
+    ("xpath", "//button[@type='submit' and contains(., '상식')]", None),
+    # 분석된 클래스명 (텍스트 확인)
+    ("css", "button.gdArnN", "상식"),
+    ("css", "button.fzQimn", "상식"),
+]
+
+# 페이지 내 생성 이미지 수집 헬퍼 (모든 주입 스크립트 앞에 붙여 사용)
+# 생성 이미지 조건: data: URL, 50KB 이상, 표시 너비 100 초과 (프로필 이미지/썸네일 제외)
+# 지문(fp)은 브라우저에서 계산하여 수 MB짜리 data URL을 Python으로 전송하지 않음
+IMAGE_HELPERS_JS = r"""
+const FX_SAMPLE_COUNT = 64;   // 지문에 사용할 구간 수
+const FX_SAMPLE_WIDTH = 64;   // 구간당 문자 수
+
+function fxHash(str) {
+    // cyrb53 해시 (64비트 중 53비트)
+    let h1 = 0xdeadbeef, h2 = 0x41c6ce57;
+    for (let i = 0; i < str.length; i++) {
+        const ch = str.charCodeAt(i);
+        h1 = Math.imul(h1 ^ ch, 2654435761);
+        h2 = Math.imul(h2 ^ ch, 1597334677);
+    }
+    h1 = Math.imul(h1 ^ (h1 >>> 16), 2246822507) ^ Math.imul(h2 ^ (h2 >>> 13), 3266489909);
+    h2 = Math.imul(h2 ^ (h2 >>> 16), 2246822507) ^ Math.imul(h1 ^ (h1 >>> 13), 3266489909);
+    return (h2 >>> 0).toString(16).padStart(8, '0') + (h1 >>> 0).toString(16).padStart(8, '0');
+}
+
+function fxFingerprint(src) {
+    // 앞부분(JPEG 헤더/양자화 테이블)은 같은 생성기 출력끼리 거의 같으므로
+    // 전체 길이 + 본문 전체에 고르게 퍼진 구간 + 끝부분을 해시 (약 4KB만 읽음)
+    const length = src.length;
+    const step = Math.max(FX_SAMPLE_WIDTH, Math.floor(length / FX_SAMPLE_COUNT));
+    const parts = [];
+    for (let offset = 0; offset < length; offset += step) {
+        parts.push(src.substr(offset, FX_SAMPLE_WIDTH));
+    }
+    parts.push(src.substr(Math.max(0, length - FX_SAMPLE_WIDTH)));
+    return length.toString(36) + '-' + fxHash(parts.join(''));
+}
+
+function fxPerceptualHash(img) {
+    // dHash: 9x8 회색조로 축소한 뒤 가로로 이웃한 픽셀 밝기 비교 (64비트, 16진수 16자리)
+    if (!img.complete || img.naturalWidth === 0) return null;
+    try {
+        const canvas = document.createElement('canvas');
+        canvas.width = 9;
+        canvas.height = 8;
+        const ctx = canvas.getContext('2d', {willReadFrequently: true});
+        ctx.drawImage(img, 0, 0, 9, 8);
+        const data = ctx.getImageData(0, 0, 9, 8).data;
+        const gray = (x, y) => {
+            const i = (y * 9 + x) * 4;
+            return data[i] * 0.299 + data[i + 1] * 0.587 + data[i + 2] * 0.114;
+        };
+        let hex = '';
+        for (let y = 0; y < 8; y++) {
+            let nibble = 0;
+            for (let x = 0; x < 8; x++) {
+                nibble = (nibble << 1) | (gray(x, y) < gray(x + 1, y) ? 1 : 0);
+                if (x % 4 === 3) {
+                    hex += nibble.toString(16);
+                    nibble = 0;
+                }
+            }
+        }
+        return hex;
+    } catch (e) {
+        return null;
+    }
+}
+
+function fxCollect(exclude, requireDecoded, perceptual) {
+    const descriptors = [];
+    for (const img of document.getElementsByTagName('img')) {
+        const src = img.getAttribute('src') || '';
+        if (!src.startsWith('data:') || src.length <= 50000) continue;
+        if (requireDecoded && (!img.complete || img.naturalWidth === 0)) continue;
+        const width = img.getBoundingClientRect().width;
+        if (width <= 100) continue;
+        const fp = fxFingerprint(src);
+        if (exclude.has(fp)) continue;
+        img.setAttribute('data-fx-fp', fp);
+        const descriptor = {
+            fp: fp,
+            length: src.length,
+            mime: src.substring(5, src.indexOf(';')),
+            display_width: Math.round(width),
+            width: img.naturalWidth,
+            height: img.naturalHeight,
+        };
+        if (perceptual) descriptor.phash = fxPerceptualHash(img);
+        descriptors.push(descriptor);
+    }
+    return descriptors;
+}
+"""
+
+# 생성 이미지 설명자 목록 반환 (arguments[0]: 제외할 지문 목록, arguments[1]: 지각 해시(phash) 포함 여부)
+HARVEST_IMAGES_SCRIPT = IMAGE_HELPERS_JS + r"""
+return fxCollect(new Set(arguments[0] || []), false, !!arguments[1]);
+"""
+
+# 지문으로 이미지를 찾아 화면에 표시하고 전체 data URL 반환 (다운로드 시 1회만 호출)
+# 가져온 이미지는 저장 작업에 넘겨지므로 정리 대상(data-fx-downloaded)으로 표시
+FETCH_IMAGE_SCRIPT = r"""
+const img = document.querySelector('img[data-fx-fp="' + arguments[0] + '"]');
+if (!img) return null;
+img.scrollIntoView({block: 'center'});
+img.setAttribute('data-fx-downloaded', '1');
+return img.getAttribute('src');
+"""
+
+# 지문 목록의 이미지를 정리 대상으로 표시 (네트워크 캡처로 같은 이미지를 응답에서 받은 경우), 표시한 수 반환
+MARK_DOWNLOADED_SCRIPT = r"""
+let marked = 0;
+for (const fp of arguments[0]) {
+    const img = document.querySelector('img[data-fx-fp="' + fp + '"]');
+    if (!img) continue;
+    img.setAttribute('data-fx-downloaded', '1');
+    marked += 1;
+}
+return marked;
+"""
+
+# 입력창 내용을 전체 선택 후 삭제 (input 이벤트가 발생하여 페이지 상태도 갱신됨)
+CLEAR_INPUT_SCRIPT = r"""
+const el = arguments[0];
+el.focus();
+const range = document.createRange();
+range.selectNodeContents(el);
+const selection = window.getSelection();
+selection.removeAllRanges();
+selection.addRange(range);
+document.execCommand('delete');
+return el.textContent;
+"""
+
+# DevTools Input.insertText를 사용할 수 없을 때 한 번에 텍스트 삽입
+INSERT_TEXT_SCRIPT = r"""
+arguments[0].focus();
+document.execCommand('insertText', false, arguments[1]);
+return arguments[0].textContent;
+"""
+
+# 새 이미지 감지용 스크립트 (execute_async_script)
+# 제외 목록에 없는 디코딩 완료 이미지 개수가 known_count와 달라지거나,
+# quiet_ms 동안 변화가 없거나, slice_ms가 지나면 설명자 목록 반환
+WAIT_FOR_IMAGES_SCRIPT = IMAGE_HELPERS_JS + r"""
+const exclude = new Set(arguments[0] || []);
+const knownCount = arguments[1];
+const quietMs = arguments[2];
+const sliceMs = arguments[3];
+const done = arguments[arguments.length - 1];
+
+let finished = false;
+let observer = null;
+let quietTimer = null;
+let sliceTimer = null;
+
+function finish(quiet) {
+    if (finished) return;
+    finished = true;
+    if (observer) observer.disconnect();
+    document.removeEventListener('load', onChange, true);
+    clearTimeout(quietTimer);
+    clearTimeout(sliceTimer);
+    done({images: fxCollect(exclude, true), quiet: quiet});
+}
+
+function onChange() {
+    if (fxCollect(exclude, true).length !== knownCount) finish(false);
+}
+
+if (fxCollect(exclude, true).length !== knownCount) {
+    finish(false);
+} else {
+    observer = new MutationObserver(onChange);
+    observer.observe(document.body, {childList: true, subtree: true, attributes: true, attributeFilter: ['src']});
+    // 이미지 디코딩 완료(load)는 MutationObserver로 잡히지 않으므로 캡처 단계에서 수신
+    document.addEventListener('load', onChange, true);
+    if (quietMs > 0) quietTimer = setTimeout(() => finish(true), quietMs);
+    sliceTimer = setTimeout(() => finish(false), sliceMs);
+}
+"""
+
+# 후보 선택자를 우선순위대로 평가하여 처음 일치하는 요소와 그 후보 번호 반환
+# arguments[0]: [{kind: 'xpath'|'css', value, text}], arguments[1]: 클릭 가능 여부까지 확인할지
+PROBE_SELECTORS_SCRIPT = r"""
+const candidates = arguments[0];
+const requireEnabled = arguments[1];
+
+function usable(el, text) {
+    if (!el || el.getClientRects().length === 0) return false;
+    if (requireEnabled && (el.disabled || el.getAttribute('aria-disabled') === 'true')) return false;
+    if (text && !(el.textContent || '').includes(text)) return false;
+    return true;
+}
+
+function matches(candidate) {
+    if (candidate.kind === 'xpath') {
+        const result = document.evaluate(candidate.value, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        const nodes = [];
+        for (let i = 0; i < result.snapshotLength; i++) nodes.push(result.snapshotItem(i));
+        return nodes;
+    }
+    return Array.from(document.querySelectorAll(candidate.value));
+}
+
+for (let i = 0; i < candidates.length; i++) {
+    for (const el of matches(candidates[i])) {
+        if (usable(el, candidates[i].text)) return [candidates[i].index, el];
+    }
+}
+return null;
+"""
+
+# 생성 결과 분류와 로그인 확인용 페이지 상태 (알림/스낵바/대화상자 문구, 생성 진행 표시, 주소, 입력창 유무)
+PAGE_STATE_SCRIPT = r"""
+const selectors = '[role="alert"], [role="alertdialog"], [role="status"], [aria-live="assertive"], '
+    + '[aria-live="polite"], [role="dialog"], mat-snack-bar-container, .mdc-snackbar__label';
+const messages = [];
+for (const el of document.querySelectorAll(selectors)) {
+    if (el.getClientRects().length === 0) continue;
+    const text = (el.innerText || el.textContent || '').trim();
+    if (text && !messages.includes(text)) messages.push(text.substring(0, 500));
+}
+const busy = !!document.querySelector('[role="progressbar"], [aria-busy="true"]');
+const hasInput = !!document.querySelector("[contenteditable='true']");
+return {messages: messages, busy: busy, url: location.href, has_input: hasInput};
+"""
+
+# 이미 받은 생성 이미지(저장 작업에 넘긴 것으로 표시된 data URL)를 1x1 투명 이미지로 바꿔 페이지 메모리 해제
+# 늦게 나타났거나 받지 않은 이미지는 건드리지 않음.
+# 요소를 지우지 않고 src만 바꾸므로 페이지 프레임워크의 DOM 구조는 유지됨. [교체 수, 해제한 문자 수] 반환
+PRUNE_IMAGES_SCRIPT = r"""
+const placeholder = 'data:image/gif;base64,R0lGODlhAQABAAAAACH5BAEAAAAALAAAAAABAAEAAAIBRAA7';
+let pruned = 0, freed = 0;
+for (const img of document.querySelectorAll('img[data-fx-downloaded][src^="data:"]')) {
+    const src = img.getAttribute('src');
+    img.setAttribute('src', placeholder);
+    img.removeAttribute('srcset');
+    img.removeAttribute('data-fx-fp');
+    img.removeAttribute('data-fx-downloaded');
+    img.setAttribute('data-fx-pruned', '1');
+    pruned += 1;
+    freed += src.length;
+}
+return [pruned, freed];
+"""
@@ -0,0 +1,86 @@
+"""
+ImageFX 선택자 전략 레지스트리
+여러 후보 선택자를 한 번의 스크립트 호출로 동시에 확인하고, 성공한 선택자를 기억하여 다음 프롬프트에서 먼저 시도합니다.
+"""
+
+import threading
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
+
+from imagefx_scripts import PROBE_SELECTORS_SCRIPT
+
+
+class SelectorRegistry:
+    """후보 선택자 목록과 마지막으로 성공한 선택자를 관리하는 레지스트리"""
+
+    def __init__(self, name, candidates, require_enabled=True):
+        """
+        Args:
+            name: 통계 출력용 이름 (예: "generate_button")
+            candidates: (kind, value, text) 목록. kind는 "xpath" 또는 "css", text는 요소 텍스트 필터(없으면 None)
+            require_enabled: True면 비활성화된 요소는 제외 (버튼용)
+        """
+        self.name = name
+        self.candidates = [
+            {"index": index, "kind": kind, "value": value, "text": text}
+            for index, (kind, value, text) in enumerate(candidates)
+        ]
+        self.require_enabled = require_enabled
+        self.preferred = None  # 마지막으로 성공한 후보 번호
+        self.stats = {"hits": 0, "misses": 0, "failures": 0, "invalidations": 0}
+        self._lock = threading.Lock()
+
+    def ordered_candidates(self):
+        """기억된 선택자를 맨 앞에 두고 나머지는 원래 우선순위대로"""
+        if self.preferred is None:
+            return self.candidates
+        preferred = self.candidates[self.preferred]
+        return [preferred] + [c for c in self.candidates if c is not preferred]
+
+    def resolve(self, driver, timeout=10, poll_frequency=0.2):
+        """
+        모든 후보를 한 번의 스크립트 호출로 확인하며 요소가 나타날 때까지 대기
+
+        Returns:
+            (element, candidate) 또는 찾지 못하면 (None, None)
+        """
+        candidates = self.ordered_candidates()
+        try:
+            index, element = WebDriverWait(driver, timeout, poll_frequency=poll_frequency).until(
+                lambda d: d.execute_script(PROBE_SELECTORS_SCRIPT, candidates, self.require_enabled)
+            )
+        except TimeoutException:
+            self.record_failure()
+            return None, None
+
+        return element, self.record_success(index)
+
+    def record_success(self, index):
+        """index번 후보가 일치했음을 기록하고 다음부터 먼저 시도하도록 기억. 해당 후보 반환"""
+        with self._lock:
+            if index == self.preferred:
+                self.stats["hits"] += 1
+            else:
+                self.stats["misses"] += 1
+                self.preferred = index
+        return self.candidates[index]
+
+    def record_failure(self):
+        """어떤 후보도 일치하지 않았음을 기록하고 기억된 선택자 폐기"""
+        with self._lock:
+            self.stats["failures"] += 1
+        self.invalidate()
+
+    def invalidate(self):
+        """기억된 선택자 폐기 (클릭 실패 등으로 더 이상 신뢰할 수 없을 때)"""
+        with self._lock:
+            if self.preferred is not None:
+                self.preferred = None
+                self.stats["invalidations"] += 1
+
+    def describe(self):
+        """통계 한 줄 요약"""
+        stats = self.stats
+        preferred = self.candidates[self.preferred]["value"] if self.preferred is not None else "-"
+        return (f"{self.name}: 적중 {stats['hits']}, 미적중 {stats['misses']}, 실패 {stats['failures']}, "
+                f"무효화 {stats['invalidations']} (현재 선택자: {preferred})")
@@ -0,0 +1,335 @@
+"""
+ImageFX 서비스 모드
+배치마다 브라우저 연결, 페이지 이동, 로그인 확인(input())을 반복하지 않도록 연결을 유지한 채 계속 실행하며,
+로컬 HTTP 엔드포인트나 스풀 디렉토리로 들어오는 프롬프트를 바로 처리합니다.
+작업 상태와 결과(저장 경로, 결과 분류)는 서비스 작업 저널에 기록되어 HTTP로 조회할 수 있습니다.
+
+    python imagefx_downloader.py --serve 8790 --spool-dir spool
+
+    curl -X POST http://127.0.0.1:8790/jobs -d '{"prompt": "A cat astronaut"}'
+    curl http://127.0.0.1:8790/jobs/<job_id>
+    curl http://127.0.0.1:8790/status
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import hashlib
+import logging
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from imagefx_journal import JobJournal
+from imagefx_prompts import open_prompt_source
+
+logger = logging.getLogger("imagefx.service")
+
+
+# 클라이언트가 지정하는 작업 ID 형식 (파일/로그에 그대로 쓰이므로 제한)
+JOB_ID_PATTERN = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+
+# HTTP 요청 본문 크기 상한
+MAX_REQUEST_BYTES = 1 << 20
+
+# 스풀 디렉토리에서 아직 쓰는 중인 파일로 보고 건너뛸 확장자 (다 쓴 뒤 이름을 바꿔 넣음)
+SPOOL_PARTIAL_SUFFIXES = (".tmp", ".part")
+
+
+class JobQueue:
+    """서비스에 제출된 작업 대기열 (RetryScheduler의 열린 소스: 비어 있으면 None을 내줌)"""
+
+    def __init__(self):
+        self._items = deque()
+        self._lock = threading.Lock()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        with self._lock:
+            return self._items.popleft() if self._items else None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._items)
+
+    def put(self, job_id, prompt):
+        with self._lock:
+            self._items.append((job_id, prompt))
+
+
+class ImageFXService:
+    """작업 제출/조회 HTTP 엔드포인트와 스풀 디렉토리 감시 (처리는 워커가 스케줄러에서 꺼내 진행)"""
+
+    def __init__(self, journal, scheduler, queue, workers, host="127.0.0.1", port=None, spool_dir=None,
+                 spool_poll=1.0):
+        """
+        Args:
+            journal: 서비스 작업 상태를 기록할 JobJournal
+            scheduler: 워커에 작업을 내주는 RetryScheduler (queue를 소스로 사용)
+            queue: 제출된 작업을 담을 JobQueue
+            workers: 상태 조회에 표시할 ImageFXDownloader 목록
+            host: HTTP 엔드포인트 주소 (기본값: 127.0.0.1 - 이 컴퓨터에서만 접근)
+            port: HTTP 엔드포인트 포트 (None이면 HTTP 사용 안 함)
+            spool_dir: 프롬프트 파일을 넣으면 접수하는 디렉토리 (None이면 사용 안 함)
+            spool_poll: 스풀 디렉토리 확인 간격(초) (기본값: 1)
+        """
+        self.journal = journal
+        self.scheduler = scheduler
+        self.queue = queue
+        self.workers = workers
+        self.host = host
+        self.port = port
+        self.spool_dir = spool_dir
+        self.spool_poll = spool_poll
+
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._httpd = None
+        self._threads = []
+        self.started = time.time()
+
+    @property
+    def url(self):
+        if self._httpd is None:
+            return None
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def submit(self, prompt, job_id=None, variables=None):
+        """
+        작업 하나 접수 (같은 작업 ID가 이미 있으면 실패한 작업만 다시 접수)
+
+        Returns:
+            (저널 기록, 새로 접수했는지 여부)
+        """
+        if not isinstance(prompt, str) or not prompt.strip():
+            raise ValueError("프롬프트는 비어 있지 않은 문자열이어야 합니다")
+        if job_id is not None and (not isinstance(job_id, str) or not JOB_ID_PATTERN.match(job_id)):
+            raise ValueError(f"작업 ID는 영문/숫자/_.- 64자 이하여야 합니다: {job_id!r}")
+        prompt = prompt.strip()
+
+        with self._lock:
+            previous = self.journal.jobs.get(job_id) if job_id else None
+            if previous and previous["state"] != JobJournal.FAILED:
+                return previous, False
+
+            job_id = job_id or uuid.uuid4().hex[:16]
+            fields = {"variables": variables} if variables else {}
+            record = self.journal.record(job_id, prompt, JobJournal.PENDING, **fields)
+            self.queue.put(job_id, prompt)
+        self.scheduler.wake()
+        return record, True
+
+    def submit_request(self, request):
+        """
+        HTTP 요청 본문 접수: {"prompt": ...} 또는 {"prompts": [...]} (항목은 문자열이나 {"prompt", "job_id", 변수...})
+
+        모든 항목을 먼저 확인하고, 하나라도 잘못되면 아무것도 접수하지 않습니다.
+
+        Returns:
+            [{"job_id", "state", "accepted"}]
+        """
+        if not isinstance(request, dict):
+            raise ValueError("요청 본문은 JSON 객체여야 합니다")
+        if "prompts" in request:
+            items = request["prompts"]
+            if not isinstance(items, list) or not items:
+                raise ValueError("\"prompts\"는 비어 있지 않은 목록이어야 합니다")
+        else:
+            items = [request]
+
+        jobs = []
+        for item in items:
+            if isinstance(item, str):
+                item = {"prompt": item}
+            if not isinstance(item, dict) or not isinstance(item.get("prompt"), str) or not item["prompt"].strip():
+                raise ValueError("각 작업에는 비어 있지 않은 \"prompt\" 문자열이 필요합니다")
+            variables = {key: value for key, value in item.items() if key not in ("prompt", "job_id")}
+            job_id = item.get("job_id")
+            if job_id is not None and (not isinstance(job_id, str) or not JOB_ID_PATTERN.match(job_id)):
+                raise ValueError(f"작업 ID는 영문/숫자/_.- 64자 이하여야 합니다: {job_id!r}")
+            jobs.append((item["prompt"], job_id, variables))
+
+        results = []
+        for prompt, job_id, variables in jobs:
+            record, accepted = self.submit(prompt, job_id=job_id, variables=variables)
+            results.append({"job_id": record["job_id"], "state": record["state"], "accepted": accepted})
+        return results
+
+    def job(self, job_id):
+        """작업의 마지막 저널 기록 (상태, 저장 경로, 결과 분류, 시도 횟수; 없으면 None)"""
+        return self.journal.jobs.get(job_id)
+
+    def status(self):
+        """서비스 상태 (대기열, 워커별 로그인 상태, 작업 상태별 수, 결과 분류와 실효 처리량)"""
+        stats = self.scheduler.stats
+        return {
+            "uptime": round(time.time() - self.started),
+            "queued": len(self.queue),
+            "breaker": self.scheduler.breaker_state,
+            "workers": {
+                worker.worker_name: {"logged_in": worker.logged_in, "last_outcome": worker.last_outcome}
+                for worker in self.workers
+            },
+            "jobs": self.journal.summary(),
+            "attempts": stats["attempts"],
+            "retries": stats["retries"],
+            "outcomes": dict(stats["outcomes"]),
+            "throughput": self.scheduler.throughput(),
+            "generation_latency": self._latency(),
+        }
+
+    def _latency(self):
+        """워커가 공유하는 생성 지연 모델의 현재 대기 계획과 분포 요약 (용량 계획용)"""
+        if not self.workers:
+            return None
+        deadlines = self.workers[0].deadlines
+        return {"plan": deadlines.plan()._asdict(), "complete": deadlines.summary("complete"),
+                "first": deadlines.summary("first")}
+
+    def resume(self):
+        """이전 실행에서 끝나지 않은 작업(pending/generating)을 다시 대기열에 넣음"""
+        unfinished = [record for record in list(self.journal.jobs.values())
+                      if record["state"] in (JobJournal.PENDING, JobJournal.GENERATING)]
+        for record in unfinished:
+            self.queue.put(record["job_id"], record["prompt"])
+        if unfinished:
+            logger.info(f"📋 이전 실행에서 끝나지 않은 작업 {len(unfinished)}개를 다시 대기열에 넣음")
+            self.scheduler.wake()
+        return len(unfinished)
+
+    def scan_spool(self):
+        """스풀 디렉토리의 프롬프트 파일을 들어온 순서대로 접수 (접수한 파일은 accepted/, 잘못된 파일은 rejected/로 이동)"""
+        entries = []
+        for name in os.listdir(self.spool_dir):
+            path = os.path.join(self.spool_dir, name)
+            if name.startswith(".") or name.endswith(SPOOL_PARTIAL_SUFFIXES) or not os.path.isfile(path):
+                continue
+            entries.append((os.path.getmtime(path), name))
+
+        for _, name in sorted(entries):
+            self._accept_spool_file(name)
+
+    def _accept_spool_file(self, name):
+        path = os.path.join(self.spool_dir, name)
+        stamped = f"{time.strftime('%Y%m%d_%H%M%S')}_{name}"
+        try:
+            with open(path, 'rb') as f:
+                file_digest = hashlib.sha1(f.read()).hexdigest()
+            items = list(open_prompt_source(path))
+        except (OSError, ValueError) as e:
+            rejected_dir = os.path.join(self.spool_dir, "rejected")
+            os.makedirs(rejected_dir, exist_ok=True)
+            os.replace(path, os.path.join(rejected_dir, stamped))
+            with open(os.path.join(rejected_dir, stamped + ".error"), 'w', encoding='utf-8') as f:
+                f.write(f"{e}\n")
+            logger.error(f"❌ 스풀 파일 {name}을 읽을 수 없어 rejected/로 옮김: {e}")
+            return
+
+        # 작업 ID는 파일 내용과 줄 순서로 정해지므로, 접수 도중 중단된 파일을 다시 넣어도 중복 접수되지 않음
+        jobs = []
+        for index, (prompt, variables) in enumerate(items, 1):
+            job_id = hashlib.sha1(f"{file_digest}:{index}".encode('utf-8')).hexdigest()[:16]
+            record, _ = self.submit(prompt, job_id=job_id, variables=variables)
+            jobs.append({"job_id": record["job_id"], "prompt": prompt})
+
+        accepted_dir = os.path.join(self.spool_dir, "accepted")
+        os.makedirs(accepted_dir, exist_ok=True)
+        with open(os.path.join(accepted_dir, stamped + ".jobs.jsonl"), 'w', encoding='utf-8') as f:
+            for job in jobs:
+                f.write(json.dumps(job, ensure_ascii=False) + "\n")
+        os.replace(path, os.path.join(accepted_dir, stamped))
+        logger.info(f"📥 스풀 파일 {name}: 프롬프트 {len(jobs)}개 접수")
+
+    def _spool_loop(self):
+        while not self._stopping.wait(self.spool_poll):
+            try:
+                self.scan_spool()
+            except Exception as e:
+                logger.error(f"❌ 스풀 디렉토리 확인 중 오류: {e}")
+
+    def _handler_class(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                logger.debug(f"HTTP {self.address_string()} {format % args}")
+
+            def _send_json(self, status, data):
+                body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                path = self.path.split("?")[0].rstrip("/")
+                if path == "/status":
+                    self._send_json(200, service.status())
+                elif path.startswith("/jobs/"):
+                    record = service.job(path[len("/jobs/"):])
+                    if record is None:
+                        self._send_json(404, {"error": "작업을 찾을 수 없습니다"})
+                    else:
+                        self._send_json(200, record)
+                else:
+                    self._send_json(404, {"error": "알 수 없는 경로"})
+
+            def do_POST(self):
+                if self.path.split("?")[0].rstrip("/") != "/jobs":
+                    self._send_json(404, {"error": "알 수 없는 경로"})
+                    return
+                # 본문 길이가 없거나 정수가 아니거나 음수면 읽지 않고 거부 (음수로 읽으면 연결이 끊길 때까지 막힘)
+                try:
+                    length = int(self.headers.get("Content-Length", ""))
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    self._send_json(400, {"error": "Content-Length 헤더가 없거나 올바르지 않습니다"})
+                    return
+                if length > MAX_REQUEST_BYTES:
+                    self._send_json(413, {"error": f"요청 본문이 {MAX_REQUEST_BYTES}바이트를 넘습니다"})
+                    return
+                try:
+                    request = json.loads(self.rfile.read(length) or b"{}")
+                    jobs = service.submit_request(request)
+                except ValueError as e:
+                    self._send_json(400, {"error": str(e)})
+                    return
+                self._send_json(202, {"jobs": jobs})
+
+        return Handler
+
+    def start(self):
+        """HTTP 엔드포인트와 스풀 디렉토리 감시 스레드 시작"""
+        if self.port is not None:
+            if self.host not in ("127.0.0.1", "localhost", "::1"):
+                logger.warning(f"⚠️ 서비스 엔드포인트가 {self.host}에 열립니다. 인증이 없으므로 신뢰할 수 있는 네트워크에서만 사용하세요.")
+            self._httpd = ThreadingHTTPServer((self.host, self.port), self._handler_class())
+            self._httpd.daemon_threads = True
+            self._threads.append(threading.Thread(target=self._httpd.serve_forever, name="imagefx-service",
+                                                  daemon=True))
+            logger.info(f"🛰️ 작업 접수 엔드포인트: {self.url} (POST /jobs, GET /jobs/<id>, GET /status)")
+
+        if self.spool_dir:
+            os.makedirs(self.spool_dir, exist_ok=True)
+            self._threads.append(threading.Thread(target=self._spool_loop, name="imagefx-spool", daemon=True))
+            logger.info(f"📂 스풀 디렉토리 감시: {os.path.abspath(self.spool_dir)}")
+
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        """작업 접수를 멈추고 스케줄러가 새 작업을 더 내주지 않게 함 (처리 중인 작업은 끝까지 진행)"""
+        self._stopping.set()
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self.scheduler.stop()
@@ -0,0 +1,50 @@
+import json
+import os
+import tarfile
+
+import pytest
+
+from imagefx_archive import ArchiveReader, ShardWriter
+
+
+def test_offsets_round_trip_across_shards(tmp_path):
+    writer = ShardWriter(str(tmp_path), max_shard_bytes=4096)
+    samples = {f"sample_{idx}": os.urandom(700 + idx * 300) for idx in range(6)}
+    for key, data in samples.items():
+        writer.add(key, {"jpg": data, "json": json.dumps({"key": key}).encode()})
+
+    # 기록 중인 샤드(.part)도 색인으로 바로 읽을 수 있음
+    reader = ArchiveReader(str(tmp_path))
+    assert reader.read("sample_5.jpg") == samples["sample_5"]
+
+    writer.close()
+    shards = sorted(name for name in os.listdir(tmp_path) if name.endswith(".tar"))
+    assert len(shards) > 1
+    assert not any(name.endswith(".part") for name in os.listdir(tmp_path))
+
+    reader = ArchiveReader(str(tmp_path))
+    for key, data in samples.items():
+        assert reader.read(f"{key}.jpg") == data
+        assert reader.metadata(key) == {"key": key}
+
+    # 샤드는 일반 tar로도 읽힘
+    with tarfile.open(tmp_path / shards[0]) as tar:
+        assert tar.getnames()[:2] == ["sample_0.jpg", "sample_0.json"]
+
+
+def test_reopen_continues_with_next_shard(tmp_path):
+    first = ShardWriter(str(tmp_path))
+    first.add("a", {"jpg": b"a"})
+    first.close()
+    second = ShardWriter(str(tmp_path))
+    assert second.add("b", {"jpg": b"b"})["shard"] == "imagefx-000001.tar"
+    second.close()
+    reader = ArchiveReader(str(tmp_path))
+    assert reader.read("a.jpg") == b"a" and reader.read("b.jpg") == b"b"
+
+
+def test_rejects_keys_with_dots(tmp_path):
+    writer = ShardWriter(str(tmp_path))
+    with pytest.raises(ValueError):
+        writer.add("bad.key", {"jpg": b""})
+    writer.close()
@@ -0,0 +1,44 @@
+import json
+
+from imagefx_catalog import Catalog, import_download_dir
+
+
+def test_record_search_and_prompt_normalization(tmp_path):
+    catalog = Catalog(str(tmp_path / "catalog.sqlite3"))
+    images = [{"path": f"run/image_{idx}.jpg", "sha256": f"{idx:064x}", "bytes": 10} for idx in (1, 2)]
+    catalog.record("run", "A Sunset over  the Ocean", "20260101_120000", images, job_id="job-1")
+    catalog.record("empty", "Nothing came back", "20260101_120100", [])
+
+    assert catalog.has_prompt("a sunset over the ocean")
+    assert not catalog.has_prompt("nothing came back")  # 이미지가 없는 생성은 건너뛰지 않음
+    results = catalog.search("ocean sunset")
+    assert [r["job_id"] for r in results] == ["job-1"]
+    assert [image["path"] for image in results[0]["images"]] == ["run/image_1.jpg", "run/image_2.jpg"]
+
+    # 같은 묶음을 다시 기록하면 갱신만 됨
+    catalog.record("run", "A Sunset over  the Ocean", "20260101_120000", images[:1])
+    assert catalog.stats()["generations"] == 2
+    assert catalog.find_prompt("A sunset over the ocean")[0]["image_count"] == 1
+    catalog.close()
+
+
+def test_import_handles_both_metadata_formats(tmp_path):
+    legacy = tmp_path / "downloads" / "20240101_120000_A cat"
+    legacy.mkdir(parents=True)
+    (legacy / "image_1.jpg").write_bytes(b"cat")
+    (legacy / "metadata.json").write_text(json.dumps({"prompt": "A cat", "timestamp": "20240101_120000",
+                                                      "image_urls": ["data:..."]}))
+    current = tmp_path / "downloads" / "20260101_120000_A dog_1a2b3c4d"
+    current.mkdir()
+    (current / "metadata.json").write_text(json.dumps({"prompt": "A dog", "timestamp": "20260101_120000",
+                                                       "images": [{"file": "image_1.jpg", "sha256": "ab"}]}))
+    (tmp_path / "downloads" / "broken").mkdir()
+    (tmp_path / "downloads" / "broken" / "metadata.json").write_text("{")
+
+    catalog = Catalog(str(tmp_path / "downloads" / "catalog.sqlite3"))
+    assert import_download_dir(catalog, str(tmp_path / "downloads")) == (2, 1)
+    assert import_download_dir(catalog, str(tmp_path / "downloads")) == (2, 1)
+    assert catalog.stats()["generations"] == 2
+    image = catalog.find_prompt("a cat")[0]["images"][0]
+    assert image["bytes"] == 3 and image["path"] == "20240101_120000_A cat/image_1.jpg"
+    catalog.close()
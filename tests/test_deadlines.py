@@ -0,0 +1,71 @@
+import threading
+from types import SimpleNamespace
+
+from imagefx_deadlines import GenerationDeadlines, LATENCY_BUCKETS, histogram_quantile
+
+
+def observation(first, last=None, gap=0.5):
+    return SimpleNamespace(first=first, last=last if last is not None else first + 1, max_gap=gap)
+
+
+def test_histogram_quantile():
+    counts = [0.0] * (len(LATENCY_BUCKETS) + 1)
+    assert histogram_quantile(counts, 0.5) is None
+    counts[LATENCY_BUCKETS.index(10)] = 10  # 7.5~10초 구간
+    assert histogram_quantile(counts, 0.5) == 8.75
+    counts[-1] = 1000
+    assert histogram_quantile(counts, 0.99) == LATENCY_BUCKETS[-1]
+
+
+def test_plan_learns_from_observations_and_persists(tmp_path):
+    path = str(tmp_path / "latency_model.json")
+    deadlines = GenerationDeadlines(path, default_timeout=120)
+    assert deadlines.plan().timeout == 120
+    for _ in range(30):
+        deadlines.observe(observation(6, 9))
+    plan = deadlines.plan()
+    assert 15 <= plan.timeout < 120
+    assert plan.first_image <= plan.timeout
+
+    deadlines.save()
+    assert GenerationDeadlines(path).plan() == plan
+
+
+def test_empty_waits_widen_the_deadline():
+    deadlines = GenerationDeadlines(min_samples=5)
+    for _ in range(10):
+        deadlines.observe(observation(6, 9))
+    before = deadlines.plan().timeout
+    deadlines.observe(SimpleNamespace(first=None, last=None, max_gap=None))
+    assert deadlines.plan().timeout == min(deadlines.max_timeout, before * 2)
+
+
+def test_concurrent_observers_save_safely(tmp_path):
+    deadlines = GenerationDeadlines(str(tmp_path / "latency_model.json"))
+    errors = []
+
+    def observe():
+        try:
+            for _ in range(200):
+                deadlines.observe(observation(5))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=observe) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["latency_model.json"]
+
+
+def test_save_failure_does_not_escape_observe(tmp_path, monkeypatch):
+    deadlines = GenerationDeadlines(str(tmp_path / "latency_model.json"))
+
+    def fail():
+        raise FileNotFoundError("gone")
+
+    monkeypatch.setattr(deadlines, "save", fail)
+    for _ in range(20):
+        deadlines.observe(observation(5))
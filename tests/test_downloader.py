@@ -0,0 +1,182 @@
+import base64
+import builtins
+import io
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("selenium")
+pytest.importorskip("requests")
+
+from imagefx_deadlines import GenerationDeadlines, WaitPlan  # noqa: E402
+import imagefx_downloader  # noqa: E402
+from imagefx_downloader import ImageFXDownloader, ImageWriter  # noqa: E402
+from imagefx_journal import JobJournal  # noqa: E402
+from imagefx_scheduler import PARTIAL, SUCCESS, RetryScheduler  # noqa: E402
+
+JPEG = b"\xff\xd8\xff" + bytes(range(256)) * 4
+GOOD_URL = "data:image/jpeg;base64," + base64.b64encode(JPEG).decode()
+BAD_URL = "data:image/jpeg;base64,@@@@"
+
+
+@pytest.fixture
+def writer(tmp_path):
+    writer = ImageWriter(str(tmp_path / ".objects"))
+    writer.CHUNK_CHARS = 7  # 청크 경계를 자주 넘도록
+    yield writer
+    writer.close()
+
+
+@pytest.mark.parametrize("encode", [
+    lambda data: base64.b64encode(data).decode(),
+    lambda data: "\n".join(base64.b64encode(data).decode()[i:i + 76] for i in range(0, 2000, 76)),
+    lambda data: base64.urlsafe_b64encode(data).decode().rstrip("="),
+])
+def test_chunked_decoder_accepts_loose_base64(writer, encode):
+    assert b"".join(writer._chunks("data:image/jpeg;base64," + encode(JPEG))) == JPEG
+
+
+def test_chunked_decoder_rejects_garbage(writer):
+    with pytest.raises(ValueError):
+        b"".join(writer._chunks(BAD_URL))
+
+
+@pytest.fixture
+def downloader(tmp_path):
+    downloader = ImageFXDownloader(download_dir=str(tmp_path), prune_images=False, heap_limit_mb=0, recycle_every=0)
+    downloader.page_state = lambda: {}
+    yield downloader
+    downloader.writer.close()
+
+
+def test_same_second_saves_use_separate_folders(downloader):
+    first = downloader.save_images("same prompt", [{"url": GOOD_URL} for _ in range(3)])
+    second = downloader.save_images("same prompt", [{"url": GOOD_URL}])
+    downloader.writer.close()
+    assert os.path.dirname(first[0]) != os.path.dirname(second[0])
+    assert all(os.path.exists(path) for path in first + second)
+
+
+@pytest.mark.parametrize("urls, state, outcome, written", [
+    ([BAD_URL] * 4, JobJournal.FAILED, None, 0),
+    ([GOOD_URL, BAD_URL, GOOD_URL, GOOD_URL], JobJournal.DOWNLOADED, PARTIAL, 3),
+    ([GOOD_URL] * 4, JobJournal.DOWNLOADED, SUCCESS, 4),
+])
+def test_journal_records_only_written_files(tmp_path, downloader, urls, state, outcome, written):
+    def process(prompt, prepared=False):
+        downloader.last_output_files = downloader.save_images(prompt, [{"url": url} for url in urls])
+        return bool(downloader.last_output_files)
+
+    downloader._process_prompt = process
+    journal = JobJournal(str(tmp_path / "journal.jsonl"))
+    downloader.process_job("job", "prompt", journal)
+    downloader.writer.close()
+
+    record = journal.jobs["job"]
+    assert record["state"] == state
+    if outcome:
+        assert record["outcome"] == outcome
+    assert len(record["outputs"]) == written
+    assert all(os.path.exists(path) for path in record["outputs"])
+    journal.close()
+
+
+def test_pipeline_prepares_next_prompt_before_writes_finish(tmp_path, downloader):
+    release = threading.Event()
+
+    class SlowWriter(ImageWriter):
+        def _store(self, image_url, filepath):
+            release.wait(5)  # 디스크가 느린 것처럼 저장을 붙잡아 둠
+            return super()._store(image_url, filepath)
+
+    downloader.writer.close()
+    downloader.writer = SlowWriter(str(tmp_path / ".objects"), metrics=downloader.metrics)
+    events = []
+
+    def process(prompt, prepared=False):
+        downloader.last_output_files = downloader.save_images(prompt, [{"url": GOOD_URL} for _ in range(4)])
+        events.append(("process", prompt, prepared))
+        return True
+
+    def prepare(prompt):
+        # 이 시점에 이전 프롬프트의 저장이 아직 끝나지 않아야 함
+        events.append(("prepare", prompt, downloader.last_batch_future.done()))
+        release.set()
+        return True
+
+    downloader._process_prompt = process
+    downloader.prepare_prompt = prepare
+    journal = JobJournal(str(tmp_path / "journal.jsonl"))
+    scheduler = RetryScheduler([("job-0", "first"), ("job-1", "second")], breaker_threshold=0)
+
+    assert downloader.run_pipeline(scheduler, journal, depth=2) == 2
+    assert events == [("process", "first", False), ("prepare", "second", False), ("process", "second", True)]
+    downloader.writer.close()
+    assert all(journal.jobs[job_id]["state"] == JobJournal.DOWNLOADED for job_id in ("job-0", "job-1"))
+    journal.close()
+
+
+def test_dom_fallback_shares_the_network_deadline(downloader):
+    class SilentCapture:
+        last_error_status = None
+
+        def wait(self, timeout, stop_condition=None):
+            started = time.monotonic()
+            while time.monotonic() - started < timeout:
+                if stop_condition():
+                    return []
+                time.sleep(0.05)
+            return []
+
+    class StuckDriver:
+        def set_script_timeout(self, seconds):
+            pass
+
+        def execute_async_script(self, script, initial, known, quiet_ms, slice_ms):
+            time.sleep(slice_ms / 1000)
+            return {"images": []}
+
+    deadlines = GenerationDeadlines()
+    deadlines.plan = lambda now=None: WaitPlan(3.0, 0.5, 1.0, "test")
+    downloader.deadlines = deadlines
+    downloader.network_capture = SilentCapture()
+    downloader.harvest_images = lambda **kwargs: []
+    downloader.driver = StuckDriver()
+
+    started = time.monotonic()
+    assert downloader.wait_for_network_images(initial_hashes=set()) == []
+    assert downloader.wait_for_images(initial_hashes=set(), tracker=downloader.last_wait) is False
+    assert time.monotonic() - started < 1.5
+    assert deadlines.abandoned == 1
+
+
+def test_piped_prompts_all_reach_the_scheduler(tmp_path, monkeypatch):
+    prompts = [f"prompt {idx}" for idx in range(5000)]
+    monkeypatch.setattr(sys, "stdin", io.StringIO("\n".join(prompts) + "\n"))
+    monkeypatch.setattr(sys, "argv", ["imagefx_downloader.py", "--prompts-file", "-", "--download-dir", str(tmp_path),
+                                      "--no-catalog", "--no-metrics", "--pipeline-depth", "0"])
+
+    def no_input(*args):
+        raise AssertionError("표준 입력 소스에서는 input()으로 로그인을 확인하면 안 됨")
+
+    received = []
+
+    def run_serial(self, scheduler, journal=None, pacer=None, total=None):
+        assert self.login_poll > 0  # 작업마다 페이지 상태로 로그인 확인
+        job = scheduler.next_job()
+        while job is not None:
+            received.append(job.prompt)
+            scheduler.report(job, SUCCESS, images=4)
+            job = scheduler.next_job()
+        return len(received)
+
+    monkeypatch.setattr(builtins, "input", no_input)
+    monkeypatch.setattr(ImageFXDownloader, "connect_to_browser", lambda self: True)
+    monkeypatch.setattr(ImageFXDownloader, "navigate_to_imagefx", lambda self: True)
+    monkeypatch.setattr(ImageFXDownloader, "run_serial", run_serial)
+    imagefx_downloader.main()
+
+    assert received == prompts
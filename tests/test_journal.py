@@ -0,0 +1,68 @@
+from imagefx_journal import JobJournal
+from imagefx_prompts import parse_shard, shard_of
+
+import pytest
+
+
+def test_resume_and_retry_failed(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = JobJournal(path)
+    journal.record("done", "a", JobJournal.GENERATING)
+    journal.record("done", "a", JobJournal.DOWNLOADED, outputs=["a/image_1.jpg"])
+    journal.record("failed", "b", JobJournal.FAILED, error="x")
+    journal.record("interrupted", "c", JobJournal.GENERATING)
+    journal.record("pending", "d", JobJournal.PENDING, variables={"style": "neon"})
+    journal.close()
+
+    # 마지막 기록이 중간에 잘려도 다시 열 수 있음
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"job_id": "trunc')
+    journal = JobJournal(path)
+    assert journal.state("done") == JobJournal.DOWNLOADED
+    assert journal.jobs["done"]["attempts"] == 1
+
+    runnable = [job_id for job_id in ("done", "failed", "interrupted", "pending", "new") if journal.should_run(job_id)]
+    assert runnable == ["interrupted", "pending", "new"]
+    assert [job_id for job_id in ("done", "failed", "new") if journal.should_run(job_id, retry_failed=True)] == ["failed"]
+
+    # 변수는 이후 기록에도 유지되고, 잘린 줄 뒤의 기록도 다음 실행에서 읽힘
+    journal.record("pending", "d", JobJournal.GENERATING)
+    journal.close()
+    journal = JobJournal(path)
+    assert journal.jobs["pending"]["variables"] == {"style": "neon"}
+    assert journal.jobs["pending"]["attempts"] == 1
+    journal.close()
+
+
+def test_job_ids_number_repeated_prompts():
+    ids = [job_id for job_id, _ in JobJournal.assign_job_ids(["a", "b", "a", "a"])]
+    assert ids[0] == ids[2].rsplit("-", 1)[0]
+    assert ids[2].endswith("-2") and ids[3].endswith("-3")
+    assert len(set(ids)) == 4
+
+
+def test_tracked_job_ids_match_full_assignment_within_shard():
+    prompts = [f"prompt {idx % 7}" for idx in range(50)]
+    full = [job_id for job_id, _ in JobJournal.assign_job_ids(prompts)]
+    for index in range(3):
+        tracked = JobJournal.assign_job_ids(prompts, track=lambda digest: shard_of(digest, 3) == index)
+        assert ([job_id for job_id, _ in tracked if shard_of(job_id, 3) == index]
+                == [job_id for job_id in full if shard_of(job_id, 3) == index])
+
+
+def test_shards_partition_jobs_and_keep_repeats_together():
+    ids = [job_id for job_id, _ in JobJournal.assign_job_ids([f"p{idx % 40}" for idx in range(200)])]
+    shards = [[job_id for job_id in ids if shard_of(job_id, 4) == index] for index in range(4)]
+    assert sorted(sum(shards, [])) == sorted(ids)
+    for job_id in ids:
+        assert shard_of(job_id, 4) == shard_of(job_id.split("-")[0], 4)
+
+
+@pytest.mark.parametrize("value", ["2/2", "-1/3", "a/b", "1", "0/0"])
+def test_parse_shard_rejects_invalid(value):
+    with pytest.raises(ValueError):
+        parse_shard(value)
+
+
+def test_parse_shard():
+    assert parse_shard("1/4") == (1, 4)
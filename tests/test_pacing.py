@@ -0,0 +1,16 @@
+import pytest
+
+from imagefx_pacing import TokenBucketPacing, create_pacing
+
+
+def test_token_spec_builds_bucket():
+    pacer = create_pacing("token:6,2")
+    assert isinstance(pacer, TokenBucketPacing)
+    assert pacer.burst == 2
+    assert pacer.wait() == 0 and pacer.wait() == 0
+
+
+@pytest.mark.parametrize("spec", ["token:0", "token:-3", "token:6,0", "token:6,0.5", "bogus:1"])
+def test_invalid_specs_are_rejected(spec):
+    with pytest.raises(ValueError):
+        create_pacing(spec)
@@ -0,0 +1,85 @@
+import time
+
+from imagefx_scheduler import (
+    RetryScheduler, classify_outcome, SUCCESS, PARTIAL, RATE_LIMITED, POLICY_BLOCKED, UI_STUCK,
+)
+
+
+def make_scheduler(prompts, **kwargs):
+    options = dict(base_delay=0.01, jitter=0, breaker_threshold=0)
+    options.update(kwargs)
+    return RetryScheduler(((f"job-{idx}", prompt) for idx, prompt in enumerate(prompts)), **options)
+
+
+def test_classify_outcome():
+    assert classify_outcome(4) == SUCCESS
+    assert classify_outcome(2) == PARTIAL
+    assert classify_outcome(0, {"http_status": 429}) == RATE_LIMITED
+    assert classify_outcome(0, {"messages": ["Too many requests, try again later"]}) == RATE_LIMITED
+    assert classify_outcome(0, {"messages": ["이 프롬프트는 정책을 위반합니다"]}) == POLICY_BLOCKED
+    assert classify_outcome(0, {}) == UI_STUCK
+
+
+def test_retry_then_give_up():
+    scheduler = make_scheduler(["a"], max_retries=2)
+    attempts = []
+    for job in scheduler:
+        attempts.append(job.attempt)
+        scheduler.report(job, UI_STUCK)
+    assert attempts == [1, 2, 3]
+    assert scheduler.stats["retries"] == 2
+    assert scheduler.stats["gave_up"] == 1
+
+
+def test_policy_blocked_is_not_retried():
+    scheduler = make_scheduler(["a", "b"])
+    seen = []
+    for job in scheduler:
+        seen.append((job.prompt, job.attempt))
+        assert scheduler.report(job, POLICY_BLOCKED if job.prompt == "a" else SUCCESS) is None
+    assert seen == [("a", 1), ("b", 1)]
+
+
+def test_backoff_doubles_and_is_capped():
+    scheduler = make_scheduler([], base_delay=10, max_delay=25)
+    assert [scheduler._backoff(attempt) for attempt in (1, 2, 3)] == [10, 20, 25]
+
+
+def test_breaker_opens_half_opens_and_closes():
+    scheduler = make_scheduler(["a", "b", "c", "d"], max_retries=0, breaker_threshold=2, breaker_cooldown=0.05)
+    for _ in range(2):
+        scheduler.report(scheduler.next_job(), RATE_LIMITED)
+    assert scheduler.breaker_state == "open"
+    assert scheduler.stats["breaker_trips"] == 1
+
+    # 휴지가 끝나면 시험 작업 하나만 내줌
+    started = time.monotonic()
+    probe = scheduler.next_job()
+    assert time.monotonic() - started >= 0.04
+    assert scheduler.breaker_state == "half_open"
+
+    # 시험 작업이 성공하면 닫힘
+    scheduler.report(probe, SUCCESS)
+    assert scheduler.breaker_state == "closed"
+    scheduler.report(scheduler.next_job(), SUCCESS)
+    assert scheduler.next_job() is None
+
+
+def test_failed_probe_reopens_with_longer_cooldown():
+    scheduler = make_scheduler(["a", "b", "c"], max_retries=0, breaker_threshold=1, breaker_cooldown=0.05)
+    scheduler.report(scheduler.next_job(), UI_STUCK)
+    assert scheduler.breaker_state == "open"
+    probe = scheduler.next_job()
+    assert scheduler.breaker_state == "half_open"
+    scheduler.report(probe, UI_STUCK)
+    assert scheduler.breaker_state == "open"
+    assert scheduler.stats["breaker_trips"] == 2
+    assert scheduler.stats["paused"] == 0.05 + 0.1
+
+
+def test_stop_drops_pending_retries():
+    scheduler = make_scheduler(["a"], base_delay=60)
+    job = scheduler.next_job()
+    assert scheduler.report(job, RATE_LIMITED) is not None
+    scheduler.stop()
+    assert scheduler.next_job() is None
@@ -0,0 +1,51 @@
+import json
+import socket
+import urllib.request
+
+import pytest
+
+from imagefx_journal import JobJournal
+from imagefx_scheduler import RetryScheduler
+from imagefx_service import ImageFXService, JobQueue
+
+
+@pytest.fixture
+def service(tmp_path):
+    journal = JobJournal(str(tmp_path / "service_journal.jsonl"))
+    queue = JobQueue()
+    service = ImageFXService(journal, RetryScheduler(queue), queue, [], port=0)
+    service.start()
+    yield service
+    service.stop()
+    journal.close()
+
+
+def post(service, headers, body=b""):
+    """원시 요청을 보내고 상태 코드 반환 (잘못된 헤더도 그대로 보냄)"""
+    with socket.create_connection(service._httpd.server_address, timeout=5) as connection:
+        connection.sendall(b"POST /jobs HTTP/1.1\r\nHost: localhost\r\n" + headers + b"\r\n" + body)
+        return int(connection.recv(4096).split(b" ", 2)[1])
+
+
+@pytest.mark.parametrize("headers", [b"", b"Content-Length: abc\r\n", b"Content-Length: -5\r\n"])
+def test_rejects_missing_or_invalid_content_length(service, headers):
+    assert post(service, headers) == 400
+
+
+def test_submit_is_idempotent_and_visible_in_status(service):
+    body = json.dumps({"prompt": "A cat astronaut", "job_id": "cat-001"}).encode()
+    assert post(service, b"Content-Length: %d\r\n" % len(body), body) == 202
+    assert post(service, b"Content-Length: %d\r\n" % len(body), body) == 202
+    assert len(service.queue) == 1
+
+    host, port = service._httpd.server_address[:2]
+    with urllib.request.urlopen(f"http://{host}:{port}/jobs/cat-001", timeout=5) as response:
+        assert json.load(response)["state"] == JobJournal.PENDING
+    with urllib.request.urlopen(f"http://{host}:{port}/status", timeout=5) as response:
+        assert json.load(response)["queued"] == 1
+
+
+def test_submit_request_validates_every_item_first(service):
+    with pytest.raises(ValueError):
+        service.submit_request({"prompts": ["ok", ""]})
+    assert len(service.queue) == 0